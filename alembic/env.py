@@ -5,6 +5,8 @@ from sqlalchemy import pool
 from app.database import Base
 from app.models import user
 from app.models import rbac
+from app.models import audit
+from app.models import oauth
 from app.config import settings
 
 from alembic import context
@@ -0,0 +1,47 @@
+"""Role inheritance with a materialized closure table
+
+Revision ID: a3c5e7f91b24
+Revises: f08b3c6d1e92
+Create Date: 2026-10-16 18:02:44.519380
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c5e7f91b24'
+down_revision: Union[str, Sequence[str], None] = 'f08b3c6d1e92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'role_parents',
+        sa.Column('role_id', sa.Integer(), nullable=False),
+        sa.Column('parent_id', sa.Integer(), nullable=False),
+        sa.CheckConstraint('role_id != parent_id', name='check_role_parent_not_self'),
+        sa.ForeignKeyConstraint(['role_id'], ['roles.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['parent_id'], ['roles.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('role_id', 'parent_id'),
+    )
+    op.create_table(
+        'role_closure',
+        sa.Column('descendant_id', sa.Integer(), nullable=False),
+        sa.Column('ancestor_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['descendant_id'], ['roles.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['ancestor_id'], ['roles.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('descendant_id', 'ancestor_id'),
+    )
+    op.create_index('idx_role_closure_ancestor', 'role_closure', ['ancestor_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_role_closure_ancestor', table_name='role_closure')
+    op.drop_table('role_closure')
+    op.drop_table('role_parents')
@@ -0,0 +1,78 @@
+"""Compact jti-based session key and binary refresh token hash
+
+Revision ID: b41c7e2f9a13
+Revises: 326ed2740ad2
+Create Date: 2026-10-16 09:12:40.118204
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41c7e2f9a13'
+down_revision: Union[str, Sequence[str], None] = '326ed2740ad2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 5000
+
+sessions = sa.table(
+    'sessions',
+    sa.column('id', sa.Integer),
+    sa.column('session_token', sa.String),
+    sa.column('session_key', sa.LargeBinary),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('sessions', sa.Column('session_key', sa.LargeBinary(length=16), nullable=True))
+
+    # Backfill: sessions issued before the jti claim are keyed on a hash of the
+    # stored access token, which is what lookups fall back to for such tokens.
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(sessions.c.id, sessions.c.session_token)
+            .where(sessions.c.id > last_id, sessions.c.session_token.isnot(None))
+            .order_by(sessions.c.id)
+            .limit(BACKFILL_BATCH)
+        ).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            key = hashlib.sha256(row.session_token.encode("utf-8")).digest()[:16]
+            bind.execute(sessions.update().where(sessions.c.id == row.id).values(session_key=key))
+        last_id = rows[-1].id
+
+    op.create_index(op.f('ix_sessions_session_key'), 'sessions', ['session_key'], unique=True)
+    op.drop_column('sessions', 'session_token')
+
+    # hex text (64 chars) -> raw 32-byte digest
+    op.drop_index('idx_session_refresh_hash', table_name='sessions')
+    op.alter_column('sessions', 'refresh_token_hash',
+               existing_type=sa.String(length=128),
+               type_=sa.LargeBinary(length=32),
+               existing_nullable=False,
+               postgresql_using="decode(refresh_token_hash, 'hex')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('sessions', 'refresh_token_hash',
+               existing_type=sa.LargeBinary(length=32),
+               type_=sa.String(length=128),
+               existing_nullable=False,
+               postgresql_using="encode(refresh_token_hash, 'hex')")
+    op.create_index('idx_session_refresh_hash', 'sessions', ['refresh_token_hash'], unique=False)
+
+    # The full access token cannot be recovered from its key; old sessions keep a NULL token.
+    op.add_column('sessions', sa.Column('session_token', sa.String(length=1024), nullable=True))
+    op.create_unique_constraint('sessions_session_token_key', 'sessions', ['session_token'])
+    op.drop_index(op.f('ix_sessions_session_key'), table_name='sessions')
+    op.drop_column('sessions', 'session_key')
@@ -0,0 +1,30 @@
+"""Per-user token version for mass revocation
+
+Revision ID: c62d8e0f4a17
+Revises: a3c5e7f91b24
+Create Date: 2026-10-16 19:27:13.804115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c62d8e0f4a17'
+down_revision: Union[str, Sequence[str], None] = 'a3c5e7f91b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('sessions', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('sessions', 'token_version')
+    op.drop_column('users', 'token_version')
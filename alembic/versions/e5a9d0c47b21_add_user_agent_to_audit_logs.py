@@ -0,0 +1,47 @@
+"""Add user_agent to audit_logs
+
+Revision ID: e5a9d0c47b21
+Revises: b41c7e2f9a13
+Create Date: 2026-10-16 11:03:27.540981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9d0c47b21'
+down_revision: Union[str, Sequence[str], None] = 'b41c7e2f9a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 5357d59587f0 was generated empty, so older databases may not have the table yet
+    if not sa.inspect(op.get_bind()).has_table('audit_logs'):
+        op.create_table(
+            'audit_logs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('action', sa.String(length=100), nullable=False),
+            sa.Column('details', sa.Text(), nullable=True),
+            sa.Column('ip_address', sa.String(length=45), nullable=True),
+            sa.Column('user_agent', sa.String(length=255), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index(op.f('ix_audit_logs_id'), 'audit_logs', ['id'], unique=False)
+        op.create_index('ix_audit_log_user_id', 'audit_logs', ['user_id'], unique=False)
+        op.create_index('ix_audit_log_created_at', 'audit_logs', ['created_at'], unique=False)
+        return
+
+    op.add_column('audit_logs', sa.Column('user_agent', sa.String(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('audit_logs', 'user_agent')
@@ -0,0 +1,36 @@
+"""Composite indexes for audit log keyset pagination
+
+Revision ID: f08b3c6d1e92
+Revises: e5a9d0c47b21
+Create Date: 2026-10-16 13:41:09.227415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f08b3c6d1e92'
+down_revision: Union[str, Sequence[str], None] = 'e5a9d0c47b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_audit_log_created_at_id', 'audit_logs', ['created_at', 'id'], unique=False)
+    op.create_index('ix_audit_log_user_id_created_at_id', 'audit_logs', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_audit_log_action_created_at_id', 'audit_logs', ['action', 'created_at', 'id'], unique=False)
+    # both are leading prefixes of the composite indexes above
+    op.drop_index('ix_audit_log_created_at', table_name='audit_logs')
+    op.drop_index('ix_audit_log_user_id', table_name='audit_logs')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_audit_log_user_id', 'audit_logs', ['user_id'], unique=False)
+    op.create_index('ix_audit_log_created_at', 'audit_logs', ['created_at'], unique=False)
+    op.drop_index('ix_audit_log_action_created_at_id', table_name='audit_logs')
+    op.drop_index('ix_audit_log_user_id_created_at_id', table_name='audit_logs')
+    op.drop_index('ix_audit_log_created_at_id', table_name='audit_logs')
@@ -0,0 +1,215 @@
+# app/core/admission.py
+"""
+Adaptive admission control for the auth routes.
+
+Each budget ("login", "token", "validation") has its own concurrency limit,
+adjusted AIMD-style from the latency of the requests it admits:
+
+    - a request slower than the budget's `target_ms`, or answered 503, cuts
+      the limit by `backoff` (multiplicative decrease), at most once per
+      round: requests admitted before the last cut cannot cut it again, so
+      one slow burst costs 10% rather than 10% per request in it
+    - a fast request while the budget is at least half used raises it by
+      1/limit, about +1 per limit's worth of requests (additive increase)
+
+A request arriving while its budget is full gets an immediate 503 with
+`Retry-After` instead of queueing behind bcrypt. Budgets are independent, so
+a login storm cannot shed token validation. Routes are mapped to budgets by
+"METHOD /path" in `Settings.admission_routes`; unlisted routes are never
+limited. A key may add a form field, "POST /auth/token grant_type=authorization_code",
+to send one grant of a shared endpoint to another budget; the middleware then
+reads that field from the (small, url-encoded) request body before admitting it.
+
+Counts are per worker process. The middleware runs on the event loop, but a
+lock keeps the counters safe anyway.
+"""
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.core.metrics import Counter, registry
+
+# request bodies read to find the grant type; larger ones go to the path's budget
+_MAX_PEEK_BYTES = 64 * 1024
+
+shed_total = registry.register(Counter(
+    "admission_shed_total", "Requests refused with 503 because their admission budget was full.", ("budget",),
+))
+
+
+class AIMDLimiter:
+    def __init__(
+        self,
+        name: str,
+        initial: float,
+        min_limit: float,
+        max_limit: float,
+        target_ms: float,
+        backoff: float = 0.9,
+        clock=time.perf_counter,
+    ):
+        self.name = name
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_seconds = target_ms / 1000
+        self.backoff = backoff
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                self.shed += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency_seconds: float, overloaded: bool = False):
+        with self._lock:
+            self.in_flight -= 1
+            if overloaded or latency_seconds > self.target_seconds:
+                now = self.clock()
+                if now - latency_seconds >= self._decreased_at:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._decreased_at = now
+            elif self.in_flight * 2 >= self.limit:
+                # only grow when the budget is actually used; idle budgets keep their limit
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def reset(self):
+        with self._lock:
+            self.limit = float(self.initial)
+            self.in_flight = 0
+            self.shed = 0
+            self._decreased_at = float("-inf")
+
+    def stats(self) -> dict:
+        return {"limit": int(self.limit), "in_flight": self.in_flight, "shed": self.shed}
+
+
+class AdmissionController:
+    def __init__(self, budgets: Dict[str, dict], routes: Dict[str, str]):
+        self.budgets = {
+            name: AIMDLimiter(
+                name,
+                initial=b["initial"],
+                min_limit=b["min"],
+                max_limit=b["max"],
+                target_ms=b["target_ms"],
+                backoff=b.get("backoff", 0.9),
+            )
+            for name, b in budgets.items()
+        }
+        unknown = set(routes.values()) - set(self.budgets)
+        if unknown:
+            raise ValueError(f"admission_routes uses undefined budgets: {sorted(unknown)}")
+        self.routes: Dict[str, AIMDLimiter] = {}
+        self.grant_routes: Dict[str, Dict[str, AIMDLimiter]] = {}
+        for key, name in routes.items():
+            route, _, grant = key.partition(" grant_type=")
+            if grant:
+                self.grant_routes.setdefault(route, {})[grant] = self.budgets[name]
+            else:
+                self.routes[route] = self.budgets[name]
+
+    @staticmethod
+    def _route(method: str, path: str) -> str:
+        return f"{method} {path.rstrip('/') or '/'}"
+
+    def splits_by_grant(self, method: str, path: str) -> bool:
+        return self._route(method, path) in self.grant_routes
+
+    def limiter_for(self, method: str, path: str, grant_type: str | None = None) -> Optional[AIMDLimiter]:
+        route = self._route(method, path)
+        by_grant = self.grant_routes.get(route)
+        if grant_type and by_grant and grant_type in by_grant:
+            return by_grant[grant_type]
+        return self.routes.get(route)
+
+    def reset(self):
+        for limiter in self.budgets.values():
+            limiter.reset()
+
+    def stats(self) -> dict:
+        return {name: limiter.stats() for name, limiter in self.budgets.items()}
+
+
+admission_controller = AdmissionController(settings.admission_budgets, settings.admission_routes)
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware admitting or shedding requests per budget."""
+
+    def __init__(self, app, controller: AdmissionController = admission_controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        grant_type = None
+        if self.controller.splits_by_grant(scope["method"], scope["path"]):
+            grant_type, receive = await _peek_grant_type(scope, receive)
+        limiter = self.controller.limiter_for(scope["method"], scope["path"], grant_type)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+        if not limiter.try_acquire():
+            shed_total.inc(limiter.name)
+            response = JSONResponse(
+                {"detail": "Authentication service busy, retry shortly"},
+                status_code=503,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            limiter.release(time.perf_counter() - started, overloaded=status == 503)
+
+
+async def _peek_grant_type(scope, receive):
+    """The form's grant_type, and a `receive` that replays the body read to find it."""
+    headers = dict(scope["headers"])
+    content_type = headers.get(b"content-type", b"").split(b";")[0].strip().lower()
+    try:
+        length = int(headers.get(b"content-length", b""))
+    except ValueError:
+        length = None
+    if content_type != b"application/x-www-form-urlencoded" or length is None or length > _MAX_PEEK_BYTES:
+        return None, receive
+
+    messages, body = [], b""
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        body += message.get("body", b"")
+        if not message.get("more_body", False) or len(body) > _MAX_PEEK_BYTES:
+            break
+
+    async def replay():
+        return messages.pop(0) if messages else await receive()
+
+    grant = parse_qs(body.decode("latin-1")).get("grant_type") if len(body) <= _MAX_PEEK_BYTES else None
+    # an ambiguous body goes to the path's budget; the form parser would use the last value
+    return (grant[0] if grant and len(grant) == 1 else None), replay
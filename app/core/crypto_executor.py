@@ -0,0 +1,182 @@
+# app/core/crypto_executor.py
+"""
+Dedicated executor for CPU-heavy auth work (bcrypt hashing, JWT signing).
+
+Password hashing and token signing are funnelled through a bounded pool that
+is separate from Starlette's request threadpool, so a login burst queues up
+here instead of starving cheap endpoints such as /auth/userinfo.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+
+
+class CryptoQueueFull(RuntimeError):
+    """Raised when the executor already holds `max_queue` pending operations."""
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict):
+    # Module level so it can be pickled into a process pool worker.
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+class _OperationStats:
+    __slots__ = ("count", "errors", "run_seconds", "wait_seconds", "max_seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.run_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        avg = self.run_seconds / self.count if self.count else 0.0
+        avg_wait = self.wait_seconds / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(avg * 1000, 3),
+            "avg_wait_ms": round(avg_wait * 1000, 3),
+            "max_ms": round(self.max_seconds * 1000, 3),
+        }
+
+
+class CryptoExecutor:
+    """
+    Bounded thread or process pool with per-operation latency metrics.
+
+    - `run()` blocks the caller (sync handlers / CRUD helpers)
+    - `arun()` can be awaited from async handlers
+    - more than `max_queue` pending operations raises `CryptoQueueFull`
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: Optional[int] = None, max_queue: int = 64):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unsupported crypto executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self._pool: Optional[Executor] = None
+        self._thread_pool: Optional[Executor] = None
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+        self._stats: Dict[str, _OperationStats] = {}
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self.kind == "process":
+                        self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                    else:
+                        self._pool = self._get_thread_pool()
+        return self._pool
+
+    def _get_thread_pool(self) -> Executor:
+        # caller holds the lock when creating the primary pool
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crypto")
+        return self._thread_pool
+
+    def submit(self, op: str, fn: Callable, *args: Any, **kwargs: Any) -> Future:
+        return self._submit(self._get_pool, op, fn, args, kwargs)
+
+    def submit_local(self, op: str, fn: Callable, *args: Any, **kwargs: Any) -> Future:
+        """
+        Like `submit()`, but always runs on a thread of this executor. Used for
+        work holding unpicklable in-process state (e.g. preloaded signing keys)
+        when the executor is configured as a process pool.
+        """
+        def _pool():
+            with self._lock:
+                return self._get_thread_pool()
+        return self._submit(_pool, op, fn, args, kwargs)
+
+    def _submit(self, get_pool: Callable[[], Executor], op: str, fn: Callable, args: tuple, kwargs: dict) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise CryptoQueueFull(f"Crypto executor queue is full ({self.max_queue} pending)")
+
+        with self._lock:
+            self._pending += 1
+        submitted = time.perf_counter()
+        result: Future = Future()
+
+        def _done(inner: Future):
+            elapsed = time.perf_counter() - submitted
+            with self._lock:
+                self._pending -= 1
+                stats = self._stats.setdefault(op, _OperationStats())
+                stats.count += 1
+                if inner.exception() is not None:
+                    stats.errors += 1
+                    run_seconds = elapsed
+                else:
+                    run_seconds = inner.result()[1]
+                stats.run_seconds += run_seconds
+                stats.wait_seconds += max(elapsed - run_seconds, 0.0)
+                stats.max_seconds = max(stats.max_seconds, run_seconds)
+            self._slots.release()
+
+            if inner.exception() is not None:
+                result.set_exception(inner.exception())
+            else:
+                result.set_result(inner.result()[0])
+
+        try:
+            inner = get_pool().submit(_timed_call, fn, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+            raise
+        inner.add_done_callback(_done)
+        return result
+
+    def run(self, op: str, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        return self.submit(op, fn, *args, **kwargs).result()
+
+    async def arun(self, op: str, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(op, fn, *args, **kwargs))
+
+    def run_local(self, op: str, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        return self.submit_local(op, fn, *args, **kwargs).result()
+
+    async def arun_local(self, op: str, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        return await asyncio.wrap_future(self.submit_local(op, fn, *args, **kwargs))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "pending": self._pending,
+                "rejected": self._rejected,
+                "operations": {op: s.as_dict() for op, s in self._stats.items()},
+            }
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            pools = {self._pool, self._thread_pool} - {None}
+            self._pool = self._thread_pool = None
+        for pool in pools:
+            pool.shutdown(wait=wait)
+
+
+crypto_executor = CryptoExecutor(
+    kind=settings.crypto_executor_kind,
+    max_workers=settings.crypto_executor_workers,
+    max_queue=settings.crypto_executor_max_queue,
+)
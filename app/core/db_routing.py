@@ -0,0 +1,210 @@
+# app/core/db_routing.py
+"""
+Read-replica routing.
+
+Sessions created by `SessionLocal` / `AsyncSessionLocal` send every statement
+to the primary except reads that opt in with a read type:
+
+    db.query(User).execution_options(read_type="admin")
+    select(UserSession).execution_options(read_type="session")
+
+A tagged read goes to a replica (round robin) only when
+
+    - the session has not written anything (its own writes stay visible),
+    - its client has not committed a write in the last
+      `replica_read_your_writes_seconds` (read-your-writes across requests),
+    - the replica's last measured lag is within
+      `replica_lag_tolerance_seconds[read_type]`,
+
+and falls back to the primary otherwise. Replica lag is probed every
+`replica_lag_probe_interval_seconds` by a background thread; a replica that
+has not been probed yet, or whose last probe failed, is not used.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# seconds the replica is behind; 0 when it has replayed everything it received
+_LAG_QUERIES = {
+    "postgresql": (
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+    ),
+}
+
+
+def probe_lag(engine: Engine) -> float:
+    query = _LAG_QUERIES.get(engine.dialect.name)
+    with engine.connect() as conn:
+        if query is None:
+            # reachable, but no replication to measure (e.g. SQLite copies in development)
+            conn.execute(text("SELECT 1"))
+            return 0.0
+        return float(conn.execute(text(query)).scalar() or 0.0)
+
+
+def client_key(request: Optional[Request]) -> Optional[str]:
+    """Read-your-writes key for a request: the same remote address the rate limiter keys on."""
+    return request.client.host if request is not None and request.client else None
+
+
+class Replica:
+    __slots__ = ("url", "engine", "async_engine", "lag")
+
+    def __init__(self, url: str, engine: Engine, async_engine=None):
+        self.url = url
+        self.engine = engine
+        self.async_engine = async_engine
+        self.lag: Optional[float] = None  # unknown until probed
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        replicas: List[Replica],
+        lag_tolerance_seconds: Dict[str, float],
+        read_your_writes_seconds: float = 10,
+        probe_interval_seconds: float = 5,
+        max_clients: int = 10000,
+        lag_probe: Callable[[Engine], float] = probe_lag,
+    ):
+        self.replicas = replicas
+        self.lag_tolerance_seconds = lag_tolerance_seconds
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self.probe_interval = probe_interval_seconds
+        self.max_clients = max_clients
+        self.lag_probe = lag_probe
+        self._recent_writes: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._next = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    # --- routing ---
+    def pick(self, read_type: str, client: Optional[str] = None) -> Optional[Replica]:
+        """Replica to serve a `read_type` read for `client`, or None for the primary."""
+        tolerance = self.lag_tolerance_seconds.get(read_type, 0.0)
+        eligible = [r for r in self.replicas if r.lag is not None and r.lag <= tolerance]
+        now = time.monotonic()
+        with self._lock:
+            if client is not None:
+                written_until = self._recent_writes.get(client)
+                if written_until is not None and written_until < now:
+                    del self._recent_writes[client]
+                    written_until = None
+                if written_until is not None:
+                    eligible = []
+            if not eligible:
+                self.primary_reads += 1
+                return None
+            self.replica_reads += 1
+            self._next += 1
+            return eligible[self._next % len(eligible)]
+
+    def note_write(self, client: Optional[str]):
+        if client is None or self.read_your_writes_seconds <= 0:
+            return
+        with self._lock:
+            self._recent_writes[client] = time.monotonic() + self.read_your_writes_seconds
+            self._recent_writes.move_to_end(client)
+            while len(self._recent_writes) > self.max_clients:
+                self._recent_writes.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "replicas": [{"url": r.engine.url.render_as_string(), "lag_seconds": r.lag} for r in self.replicas],
+                "replica_reads": self.replica_reads,
+                "primary_reads": self.primary_reads,
+                "read_your_writes_clients": len(self._recent_writes),
+            }
+
+    # --- lag probing ---
+    def refresh_lags(self):
+        for replica in self.replicas:
+            try:
+                replica.lag = self.lag_probe(replica.engine)
+            except Exception:
+                replica.lag = None
+                logger.warning("Replica lag probe failed for %s", replica.engine.url.render_as_string(), exc_info=True)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running or not self.replicas:
+            return
+        self.refresh_lags()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-lag-probe", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.probe_interval):
+            self.refresh_lags()
+
+
+class RoutingSession(Session):
+    """Session whose tagged reads may be served by a replica (see module docstring)."""
+
+    router: Optional[ReplicaRouter] = None
+    is_async = False  # sync_session_class of an AsyncSession: bind the replica's async engine
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        read_type = None
+        if clause is not None and getattr(clause, "is_select", False):
+            read_type = clause.get_execution_options().get("read_type")
+        if read_type is not None and self.router is not None and not self.info.get("pinned"):
+            replica = self.router.pick(read_type, self.info.get("client_key"))
+            if replica is not None:
+                return replica.async_engine.sync_engine if self.is_async else replica.engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+def routing_session_class(router: ReplicaRouter, is_async: bool = False) -> type:
+    return type("RoutingSession", (RoutingSession,), {"router": router, "is_async": is_async})
+
+
+def pin_to_primary(db):
+    """Send every later read of `db` (Session or AsyncSession) to the primary."""
+    db.info["pinned"] = True
+
+
+# --- read-your-writes: a session that writes stays on the primary, and so does its client for a while ---
+@event.listens_for(RoutingSession, "before_flush")
+def _pin_on_flush(session, flush_context, instances):
+    if session.new or session.dirty or session.deleted:
+        session.info["pinned"] = session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _pin_on_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        info = orm_execute_state.session.info
+        info["pinned"] = info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _note_committed_write(session):
+    if session.info.pop("wrote", False) and session.router is not None:
+        session.router.note_write(session.info.get("client_key"))
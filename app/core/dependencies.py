@@ -1,21 +1,19 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from app.database import get_async_db, get_db
 from app.crud import user_crud
-from app.core.security import decode_access_token
+from app.core.security import adecode_access_token, decode_access_token, session_key
 from app.schemas.user import UserOut
 from app.models.rbac import UserSession
+from app.core.session_cache import session_cache
+from app.core.rbac import rbac_resolver
+from app.core.token_versions import token_versions
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     payload = decode_access_token(token)
     if not payload or "sub" not in payload:
@@ -25,23 +23,82 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # --- Cached session validation (no DB round trip on a hit) ---
+    key = session_key(payload, token)
+    if session_cache.is_revoked(key):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Session is inactive or revoked")
+    cached = session_cache.get(key)
+    if cached and not cached.is_expired():
+        # tokens minted before the `tv` claim existed count as version 0
+        if not token_versions.is_current(db, cached.user_id, payload.get("tv", 0)):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Session is inactive or revoked")
+        return cached.user
+
     username = payload["sub"]
-    user = user_crud.get_user_by_username(db, username)
+    # the profile may come from a replica (primary if it has not replicated yet); validity
+    # (session row, token version) is always read from the primary, since a lagging replica
+    # would resurrect revoked sessions and the result is cached
+    user = user_crud.get_user_by_username(db, username, read_type="session") or user_crud.get_user_by_username(db, username)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    session = db.query(UserSession).filter_by(session_key=key, is_active=True, revoked=False).first()
 
     # --- New session validation ---
-    session = db.query(UserSession).filter_by(session_token=token, is_active=True, revoked=False).first()
+    if not token_versions.is_current(db, user.id, payload.get("tv", 0)):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Session is inactive or revoked")
+    if not session:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Session is inactive or revoked")
+
+    user_out = UserOut.from_orm(user)
+    grants = rbac_resolver.resolve(db, user.id)
+    session_cache.put(key, user_out, user.id, grants.roles, session.expires_at)
+    return user_out
+
+
+async def aget_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """`get_current_user` for async routes; token verification runs on the crypto executor."""
+    payload = await adecode_access_token(token)
+    if not payload or "sub" not in payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    key = session_key(payload, token)
+    if session_cache.is_revoked(key):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Session is inactive or revoked")
+    token_version = payload.get("tv", 0)
+    cached = session_cache.get(key)
+    if cached and not cached.is_expired():
+        if not await db.run_sync(lambda sync_db: token_versions.is_current(sync_db, cached.user_id, token_version)):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Session is inactive or revoked")
+        return cached.user
+
+    # profile from a replica, validity from the primary (see get_current_user)
+    user = (
+        await user_crud.aget_user_by_username(db, payload["sub"], read_type="session")
+        or await user_crud.aget_user_by_username(db, payload["sub"])
+    )
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    session_stmt = select(UserSession).filter_by(session_key=key, is_active=True, revoked=False)
+    session = (await db.execute(session_stmt)).scalars().first()
+
+    if not await db.run_sync(lambda sync_db: token_versions.is_current(sync_db, user.id, token_version)):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Session is inactive or revoked")
     if not session:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Session is inactive or revoked")
 
-    return UserOut.from_orm(user)
+    user_out = UserOut.from_orm(user)
+    grants = await db.run_sync(lambda sync_db: rbac_resolver.resolve(sync_db, user.id))
+    session_cache.put(key, user_out, user.id, grants.roles, session.expires_at)
+    return user_out
 
 
 def require_role(required_role: str):
-    def wrapper(current_user=Depends(get_current_user)):
-        roles = {role.name for role in current_user.roles}
-        if required_role not in roles:
+    def wrapper(current_user=Depends(get_current_user), db: Session = Depends(get_db)):
+        if required_role not in rbac_resolver.resolve(db, current_user.id).roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Role '{required_role}' required"
@@ -50,11 +107,8 @@ def require_role(required_role: str):
     return wrapper
 
 def require_permission(required_permission: str):
-    def wrapper(current_user=Depends(get_current_user)):
-        user_permissions = {
-            perm.name for role in current_user.roles for perm in role.permissions
-        }
-        if required_permission not in user_permissions:
+    def wrapper(current_user=Depends(get_current_user), db: Session = Depends(get_db)):
+        if not rbac_resolver.resolve(db, current_user.id).has_permission(required_permission):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Permission '{required_permission}' required"
@@ -0,0 +1,105 @@
+# app/core/discovery.py
+"""
+Pre-serialized JWKS and OpenID Connect discovery documents.
+
+Both documents are built once (at startup or on first use) and served as raw
+bytes with a strong ETag. `rebuild()` is called whenever signing keys change.
+"""
+import hashlib
+import json
+import logging
+import threading
+from typing import Callable, Dict
+
+from app.config import settings
+from app.core.keyring import key_ring, uses_key_ring
+
+logger = logging.getLogger(__name__)
+
+
+class CachedDocument:
+    __slots__ = ("body", "etag", "max_age")
+
+    def __init__(self, payload: dict, max_age: int):
+        self.body = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        self.max_age = max_age
+
+    def matches(self, if_none_match: str | None) -> bool:
+        if not if_none_match:
+            return False
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in candidates or self.etag in candidates
+
+
+def build_jwks() -> dict:
+    if not uses_key_ring():
+        # HS* tokens are verified with the shared secret; ring keys would only mislead clients
+        return {"keys": []}
+    # active key first, then retired keys still inside their overlap window
+    return {"keys": [key.to_jwk() for key in key_ring.verification_keys()]}
+
+
+def build_openid_configuration() -> dict:
+    issuer = settings.issuer.rstrip("/")
+    return {
+        "issuer": settings.issuer,
+        "authorization_endpoint": f"{issuer}/auth/authorize",
+        "token_endpoint": f"{issuer}/auth/token",
+        "userinfo_endpoint": f"{issuer}/auth/userinfo",
+        "revocation_endpoint": f"{issuer}/auth/token/revoke",
+        "jwks_uri": f"{issuer}/.well-known/jwks.json",
+        "response_types_supported": ["code"],
+        "grant_types_supported": ["authorization_code", "password", "refresh_token"],
+        "subject_types_supported": ["public"],
+        "id_token_signing_alg_values_supported": [settings.algorithm],
+        "code_challenge_methods_supported": ["S256", "plain"],
+        "token_endpoint_auth_methods_supported": ["none"],
+        "claims_supported": ["sub", "name", "email", "roles", "iss", "aud", "iat", "exp"]
+        + (["perm_bits", "perm_ver"] if settings.permission_bitmap_claim else []),
+        "permission_index_uri": f"{issuer}/.well-known/permission-index.json",
+    }
+
+
+class DocumentCache:
+    def __init__(self):
+        self._builders: Dict[str, tuple[Callable[[], dict], Callable[[], int]]] = {}
+        self._documents: Dict[str, CachedDocument] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, builder: Callable[[], dict], max_age: Callable[[], int]):
+        self._builders[name] = (builder, max_age)
+
+    def get(self, name: str) -> CachedDocument:
+        document = self._documents.get(name)
+        if document is None:
+            with self._lock:
+                document = self._documents.get(name)
+                if document is None:
+                    builder, max_age = self._builders[name]
+                    document = CachedDocument(builder(), max_age())
+                    self._documents[name] = document
+        return document
+
+    def rebuild(self):
+        """Drop every cached document and eagerly build them again."""
+        with self._lock:
+            self._documents.clear()
+        self.warm()
+
+    def warm(self):
+        for name in self._builders:
+            try:
+                self.get(name)
+            except FileNotFoundError as exc:
+                # leave it to be built on first request once the key exists
+                logger.warning("Could not prebuild %s: %s", name, exc)
+
+
+discovery_documents = DocumentCache()
+discovery_documents.register("jwks", build_jwks, lambda: settings.jwks_max_age_seconds)
+discovery_documents.register(
+    "openid-configuration", build_openid_configuration, lambda: settings.discovery_max_age_seconds
+)
+# keys rotated by another worker are republished once this one reloads them
+key_ring.on_reload(discovery_documents.rebuild)
@@ -0,0 +1,297 @@
+# app/core/jwt_backends.py
+"""
+Interchangeable JWT signing/verification engines.
+
+Every backend takes the same inputs: claims, a key and an algorithm name. Keys
+are `cryptography` key objects (private for signing, public for verifying) or
+the shared secret for HS*. Each backend converts a key into its own format once
+and caches the result, so nothing is re-parsed per token.
+
+    jose          python-jose (HS*, RS*, ES*)
+    authlib       authlib.jose (HS*, RS*, ES*, EdDSA)
+    cryptography  compact JWS built directly on `cryptography` (HS*, RS*, ES*, EdDSA)
+
+Run `python -m benchmarks.jwt_backends` to compare them.
+"""
+import base64
+import calendar
+import hashlib
+import hmac
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, padding, rsa
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature, encode_dss_signature
+
+
+class JWTBackendError(Exception):
+    """Signature, format or time-claim validation failure."""
+
+
+_HASHES = {"256": hashes.SHA256, "384": hashes.SHA384, "512": hashes.SHA512}
+_HMAC_HASHES = {"256": hashlib.sha256, "384": hashlib.sha384, "512": hashlib.sha512}
+_EC_CURVES = {"ES256": ec.SECP256R1, "ES384": ec.SECP384R1, "ES512": ec.SECP521R1}
+
+
+def generate_private_key(algorithm: str, key_size: int = 2048):
+    """New private key suitable for `algorithm` (RS*, ES*, EdDSA)."""
+    if algorithm.startswith("RS"):
+        return rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+    if algorithm in _EC_CURVES:
+        return ec.generate_private_key(_EC_CURVES[algorithm]())
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    raise ValueError(f"No asymmetric key type for algorithm {algorithm}")
+
+
+# --- base64url / JSON helpers ---
+def b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def b64url_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _json_bytes(obj: dict) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _numeric_dates(claims: dict) -> dict:
+    out = dict(claims)
+    for name in ("exp", "iat", "nbf"):
+        if isinstance(out.get(name), datetime):
+            out[name] = calendar.timegm(out[name].utctimetuple())
+    return out
+
+
+def _numeric_claim(claims: dict, name: str) -> Optional[float]:
+    value = claims.get(name)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise JWTBackendError(f"Invalid '{name}' claim")
+    return float(value)
+
+
+def _check_time_claims(claims: dict, leeway: int = 0):
+    now = time.time()
+    exp = _numeric_claim(claims, "exp")
+    if exp is not None and now > exp + leeway:
+        raise JWTBackendError("Token has expired")
+    nbf = _numeric_claim(claims, "nbf")
+    if nbf is not None and now + leeway < nbf:
+        raise JWTBackendError("Token not yet valid")
+
+
+def _json_object(segment: str, what: str) -> dict:
+    try:
+        value = json.loads(b64url_decode(segment))
+    except (ValueError, TypeError) as exc:
+        raise JWTBackendError(f"Malformed token {what}") from exc
+    if not isinstance(value, dict):
+        raise JWTBackendError(f"Malformed token {what}")
+    return value
+
+
+def get_unverified_header(token: str) -> dict:
+    return _json_object(token.split(".", 1)[0], "header")
+
+
+class JWTBackend:
+    name = ""
+    algorithms: frozenset = frozenset()
+
+    def __init__(self):
+        self._prepared: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+
+    def supports(self, algorithm: str) -> bool:
+        return algorithm in self.algorithms
+
+    def encode(self, claims: dict, key, algorithm: str, headers: Optional[dict] = None) -> str:
+        raise NotImplementedError
+
+    def decode(self, token: str, key, algorithms: List[str]) -> dict:
+        raise NotImplementedError
+
+    def _check_algorithm(self, algorithm: str):
+        if not self.supports(algorithm):
+            raise JWTBackendError(f"{self.name} backend does not support {algorithm}")
+
+    def _prepare(self, key, algorithm: str):
+        # keyed on identity; the key object itself is kept alive in the cache value
+        cache_key = (id(key), algorithm)
+        hit = self._prepared.get(cache_key)
+        if hit is not None and hit[0] is key:
+            return hit[1]
+        prepared = self._convert_key(key, algorithm)
+        with self._lock:
+            self._prepared[cache_key] = (key, prepared)
+        return prepared
+
+    def _convert_key(self, key, algorithm: str):
+        return key
+
+
+class JoseBackend(JWTBackend):
+    name = "jose"
+    algorithms = frozenset({"HS256", "HS384", "HS512", "RS256", "RS384", "RS512", "ES256", "ES384", "ES512"})
+
+    def __init__(self):
+        super().__init__()
+        from jose import jwk, jwt, JWTError
+
+        self._jwk, self._jwt, self._error = jwk, jwt, JWTError
+
+    def _convert_key(self, key, algorithm: str):
+        return self._jwk.construct(key, algorithm)
+
+    def encode(self, claims, key, algorithm, headers=None):
+        self._check_algorithm(algorithm)
+        return self._jwt.encode(claims, self._prepare(key, algorithm), algorithm=algorithm, headers=headers)
+
+    def decode(self, token, key, algorithms):
+        algorithm = get_unverified_header(token).get("alg")
+        if algorithm not in algorithms:
+            raise JWTBackendError("Algorithm not allowed")
+        self._check_algorithm(algorithm)
+        try:
+            return self._jwt.decode(
+                token, self._prepare(key, algorithm), algorithms=[algorithm], options={"verify_aud": False}
+            )
+        except (self._error, TypeError, ValueError) as exc:  # malformed claims can escape as TypeError/ValueError
+            raise JWTBackendError(str(exc)) from exc
+
+
+class AuthlibBackend(JWTBackend):
+    name = "authlib"
+    algorithms = frozenset(
+        {"HS256", "HS384", "HS512", "RS256", "RS384", "RS512", "ES256", "ES384", "ES512", "EdDSA"}
+    )
+
+    def __init__(self):
+        super().__init__()
+        from authlib.jose import ECKey, JsonWebToken, OctKey, OKPKey, RSAKey
+        from authlib.jose.errors import JoseError
+
+        self._jwt = JsonWebToken(sorted(self.algorithms))
+        self._error = JoseError
+        self._key_types = {"HS": OctKey, "RS": RSAKey, "ES": ECKey, "Ed": OKPKey}
+
+    def _convert_key(self, key, algorithm: str):
+        return self._key_types[algorithm[:2]].import_key(key)
+
+    def encode(self, claims, key, algorithm, headers=None):
+        self._check_algorithm(algorithm)
+        header = {"alg": algorithm, "typ": "JWT", **(headers or {})}
+        token = self._jwt.encode(header, _numeric_dates(claims), self._prepare(key, algorithm))
+        return token.decode("ascii")
+
+    def decode(self, token, key, algorithms):
+        algorithm = get_unverified_header(token).get("alg")
+        if algorithm not in algorithms:
+            raise JWTBackendError("Algorithm not allowed")
+        self._check_algorithm(algorithm)
+        try:
+            claims = self._jwt.decode(token, self._prepare(key, algorithm))
+            claims.validate()
+        except (self._error, TypeError, ValueError) as exc:  # malformed claims can escape as TypeError/ValueError
+            raise JWTBackendError(str(exc)) from exc
+        return dict(claims)
+
+
+class CryptographyBackend(JWTBackend):
+    """Compact JWS assembled by hand; the signature primitives come from `cryptography`."""
+
+    name = "cryptography"
+    algorithms = frozenset(
+        {"HS256", "HS384", "HS512", "RS256", "RS384", "RS512", "ES256", "ES384", "ES512", "EdDSA"}
+    )
+
+    def _convert_key(self, key, algorithm: str):
+        if algorithm.startswith("HS"):
+            return key.encode("utf-8") if isinstance(key, str) else key
+        return key
+
+    def _sign(self, data: bytes, key, algorithm: str) -> bytes:
+        family, bits = algorithm[:2], algorithm[2:]
+        if family == "HS":
+            return hmac.new(key, data, _HMAC_HASHES[bits]).digest()
+        if family == "RS":
+            return key.sign(data, padding.PKCS1v15(), _HASHES[bits]())
+        if family == "ES":
+            r, s = decode_dss_signature(key.sign(data, ec.ECDSA(_HASHES[bits]())))
+            size = (key.curve.key_size + 7) // 8
+            return r.to_bytes(size, "big") + s.to_bytes(size, "big")
+        return key.sign(data)  # EdDSA
+
+    def _verify(self, signature: bytes, data: bytes, key, algorithm: str) -> bool:
+        family, bits = algorithm[:2], algorithm[2:]
+        if family == "HS":
+            return hmac.compare_digest(signature, hmac.new(key, data, _HMAC_HASHES[bits]).digest())
+        try:
+            if family == "RS":
+                key.verify(signature, data, padding.PKCS1v15(), _HASHES[bits]())
+            elif family == "ES":
+                size = (key.curve.key_size + 7) // 8
+                if len(signature) != 2 * size:
+                    return False
+                der = encode_dss_signature(
+                    int.from_bytes(signature[:size], "big"), int.from_bytes(signature[size:], "big")
+                )
+                key.verify(der, data, ec.ECDSA(_HASHES[bits]()))
+            else:
+                key.verify(signature, data)
+        except InvalidSignature:
+            return False
+        return True
+
+    def encode(self, claims, key, algorithm, headers=None):
+        self._check_algorithm(algorithm)
+        header = {"alg": algorithm, "typ": "JWT", **(headers or {})}
+        signing_input = (
+            b64url_encode(_json_bytes(header)) + "." + b64url_encode(_json_bytes(_numeric_dates(claims)))
+        )
+        signature = self._sign(signing_input.encode("ascii"), self._prepare(key, algorithm), algorithm)
+        return signing_input + "." + b64url_encode(signature)
+
+    def decode(self, token, key, algorithms):
+        signing_input, _, encoded_signature = token.rpartition(".")
+        encoded_header, _, encoded_payload = signing_input.partition(".")
+        header = _json_object(encoded_header, "header")
+        try:
+            signature = b64url_decode(encoded_signature)
+            data = signing_input.encode("ascii")
+        except (ValueError, TypeError) as exc:  # UnicodeEncodeError is a ValueError
+            raise JWTBackendError("Malformed token") from exc
+
+        algorithm = header.get("alg")
+        if algorithm not in algorithms:
+            raise JWTBackendError("Algorithm not allowed")
+        self._check_algorithm(algorithm)
+        if not self._verify(signature, data, self._prepare(key, algorithm), algorithm):
+            raise JWTBackendError("Signature verification failed")
+
+        claims = _json_object(encoded_payload, "payload")
+        _check_time_claims(claims)
+        return claims
+
+
+BACKENDS = {
+    JoseBackend.name: JoseBackend,
+    AuthlibBackend.name: AuthlibBackend,
+    CryptographyBackend.name: CryptographyBackend,
+}
+
+
+def get_backend(name: str) -> JWTBackend:
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown JWT backend '{name}'. Choose one of: {', '.join(BACKENDS)}") from None
@@ -0,0 +1,288 @@
+# app/core/keyring.py
+"""
+Signing key ring: one active key plus the most recently retired ones, by `kid`.
+Keys are RSA, EC or Ed25519 depending on the configured algorithm, and every
+`kid` is the key's RFC 7638 thumbprint, so it is the same in every process and
+after a restart.
+
+Keys are held as preloaded key objects so signing never re-parses PEM. The next
+key is generated on a background thread ahead of time, which makes `rotate()`
+an in-memory swap. Retired keys stay available for verification (and in JWKS)
+so tokens signed just before a rotation remain valid until they expire.
+
+`rotate_keys` persists the ring: the active private key to PRIVATE_KEY_PATH and
+the retired public keys to `signing_keys_retired_path`. Other workers pick the
+change up from disk (`reload_if_changed`) when they meet an unknown `kid`, when
+JWKS is requested, and at most every `signing_key_reload_seconds` when signing.
+
+The ring is only used with an asymmetric `algorithm`. HS* tokens are signed
+with `secret_key`, and JWKS then publishes no keys at all.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from app.config import settings
+from app.core.jwt_backends import b64url_encode, generate_private_key
+
+# members hashed for an RFC 7638 thumbprint, per key type
+_THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "EC": ("crv", "kty", "x", "y"), "OKP": ("crv", "kty", "x")}
+_KEY_TYPES = {"RS": rsa.RSAPrivateKey, "ES": ec.EllipticCurvePrivateKey, "Ed": ed25519.Ed25519PrivateKey}
+_EC_CURVE_NAMES = {"secp256r1": "P-256", "secp384r1": "P-384", "secp521r1": "P-521"}
+
+
+def _b64url_uint(value: int, size: Optional[int] = None) -> str:
+    size = size or (value.bit_length() + 7) // 8 or 1
+    return b64url_encode(value.to_bytes(size, "big"))
+
+
+def public_jwk(public_key) -> dict:
+    """Public JWK members for an RSA, EC or Ed25519 key."""
+    if isinstance(public_key, rsa.RSAPublicKey):
+        numbers = public_key.public_numbers()
+        return {"kty": "RSA", "n": _b64url_uint(numbers.n), "e": _b64url_uint(numbers.e)}
+    if isinstance(public_key, ec.EllipticCurvePublicKey):
+        numbers = public_key.public_numbers()
+        size = (public_key.curve.key_size + 7) // 8
+        return {
+            "kty": "EC",
+            "crv": _EC_CURVE_NAMES[public_key.curve.name],
+            "x": _b64url_uint(numbers.x, size),
+            "y": _b64url_uint(numbers.y, size),
+        }
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        raw = public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+        return {"kty": "OKP", "crv": "Ed25519", "x": b64url_encode(raw)}
+    raise TypeError(f"Unsupported key type {type(public_key).__name__}")
+
+
+def jwk_thumbprint(public_key) -> str:
+    """RFC 7638 thumbprint of a public key, used as its `kid`."""
+    members = public_jwk(public_key)
+    canonical = json.dumps(
+        {name: members[name] for name in _THUMBPRINT_MEMBERS[members["kty"]]},
+        separators=(",", ":"),
+        sort_keys=True,
+    )
+    return b64url_encode(hashlib.sha256(canonical.encode("ascii")).digest())
+
+
+class SigningKey:
+    __slots__ = ("kid", "algorithm", "private_key", "public_key", "created_at")
+
+    def __init__(self, kid: str, private_key, algorithm: str = "RS256", public_key=None):
+        self.kid = kid
+        self.algorithm = algorithm
+        # preloaded key objects; JWT backends cache their own view of them.
+        # Retired keys read back from disk are verification-only (no private key).
+        self.private_key = private_key
+        self.public_key = public_key or private_key.public_key()
+        self.created_at = datetime.utcnow()
+
+    @classmethod
+    def generate(cls, key_size: int = 2048, algorithm: str = "RS256") -> "SigningKey":
+        private_key = generate_private_key(algorithm, key_size)
+        return cls(jwk_thumbprint(private_key.public_key()), private_key, algorithm)
+
+    def to_jwk(self) -> dict:
+        data = public_jwk(self.public_key)
+        data.update({"kid": self.kid, "use": "sig", "alg": self.algorithm})
+        return data
+
+    def private_pem(self) -> bytes:
+        return self.private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        )
+
+    def public_pem(self) -> bytes:
+        return self.public_key.public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+
+
+def _retired_path(private_key_path: str) -> str:
+    return settings.signing_keys_retired_path or f"{private_key_path}.retired.json"
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _write_atomic(path: str, data: bytes):
+    # readers in other workers see the old file or the new one, never half of it
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class KeyRing:
+    def __init__(self, max_retired: int = 2, key_size: int = 2048, algorithm: str = "RS256"):
+        self.key_size = key_size
+        self.algorithm = algorithm
+        self._active: Optional[SigningKey] = None
+        self._retired: "deque[SigningKey]" = deque(maxlen=max_retired)
+        self._next: Optional[SigningKey] = None
+        self._generating: Optional[threading.Thread] = None
+        self._lock = threading.RLock()
+        # kid the on-disk key was published under before kids were thumbprints
+        self._aliases: dict = {}
+        self._source: Optional[tuple] = None  # (private path, retired path, their mtimes) of the last load
+        self._checked_at = 0.0
+        self._listeners: List = []
+
+    # --- loading ---
+    def load(self, private_key_path: str, legacy_kid: Optional[str] = None):
+        """Make the PEM private key on disk the active key and read the retired public keys next to it."""
+        retired_path = _retired_path(private_key_path)
+        mtimes = (_mtime(private_key_path), _mtime(retired_path))
+        pem = Path(private_key_path).read_bytes()
+        private_key = serialization.load_pem_private_key(pem, password=None)
+        if not isinstance(private_key, _KEY_TYPES[self.algorithm[:2]]):
+            raise ValueError(f"Key at {private_key_path} cannot sign {self.algorithm} tokens")
+        active = SigningKey(jwk_thumbprint(private_key.public_key()), private_key, self.algorithm)
+        retired = []
+        if mtimes[1] is not None:
+            for entry in json.loads(Path(retired_path).read_text())["keys"]:
+                if entry["kid"] != active.kid:
+                    public_key = serialization.load_pem_public_key(entry["public_key"].encode("ascii"))
+                    retired.append(SigningKey(entry["kid"], None, entry["alg"], public_key=public_key))
+        with self._lock:
+            self._active = active
+            self._retired = deque(retired, maxlen=self._retired.maxlen)
+            if legacy_kid and legacy_kid != active.kid:
+                self._aliases.setdefault(legacy_kid, active)
+            self._source = (private_key_path, retired_path, mtimes)
+
+    def reload_if_changed(self, max_age: float = 0.0) -> bool:
+        """
+        Reload from disk if another process rotated the keys since the last load.
+        The files are stat'ed at most every `max_age` seconds; returns True on reload.
+        """
+        source = self._source
+        if source is None or time.monotonic() - self._checked_at < max_age:
+            return False
+        self._checked_at = time.monotonic()
+        private_key_path, retired_path, mtimes = source
+        if (_mtime(private_key_path), _mtime(retired_path)) == mtimes:
+            return False
+        with self._lock:
+            if self._source is not source:
+                return False  # reloaded by another thread meanwhile
+            self.load(private_key_path)
+        for listener in self._listeners:
+            listener()
+        return True
+
+    def on_reload(self, listener):
+        """Call `listener()` after keys were reloaded from disk (e.g. to rebuild JWKS)."""
+        self._listeners.append(listener)
+
+    def save(self, private_key_path: str, public_key_path: str):
+        """Persist the active key pair and the retired public keys for the other workers."""
+        with self._lock:
+            active, retired = self._active, list(self._retired)
+        entries = [
+            {"kid": key.kid, "alg": key.algorithm, "public_key": key.public_pem().decode("ascii")} for key in retired
+        ]
+        retired_path = _retired_path(private_key_path)
+        # retired keys first: a worker that sees the new private key must also find the old one
+        _write_atomic(retired_path, json.dumps({"keys": entries}, indent=2).encode("utf-8"))
+        _write_atomic(private_key_path, active.private_pem())
+        _write_atomic(public_key_path, active.public_pem())
+        with self._lock:
+            if self._active is active:
+                # our own write is not a change to pick up
+                self._source = (private_key_path, retired_path, (_mtime(private_key_path), _mtime(retired_path)))
+
+    @property
+    def active(self) -> SigningKey:
+        if self._active is None:
+            with self._lock:
+                if self._active is None:
+                    self.load(settings.private_key_path, settings.key_id)
+        else:
+            self.reload_if_changed(settings.signing_key_reload_seconds)
+        return self._active
+
+    # --- lookups ---
+    def _find(self, kid: Optional[str]) -> Optional[SigningKey]:
+        active = self.active
+        if kid is None or kid == active.kid:
+            return active
+        for key in list(self._retired):
+            if key.kid == kid:
+                return key
+        return self._aliases.get(kid)
+
+    def get(self, kid: Optional[str]) -> Optional[SigningKey]:
+        key = self._find(kid)
+        # an unknown kid may come from a key another worker rotated in
+        if key is None and self.reload_if_changed(max_age=1.0):
+            key = self._find(kid)
+        return key
+
+    def verification_keys(self) -> List[SigningKey]:
+        return [self.active, *list(self._retired)]
+
+    # --- rotation ---
+    def pregenerate(self):
+        """Start generating the next key in the background (no-op if one is ready or pending)."""
+        with self._lock:
+            if self._next is not None or (self._generating and self._generating.is_alive()):
+                return
+            self._generating = threading.Thread(target=self._generate_next, name="keyring-pregen", daemon=True)
+            self._generating.start()
+
+    def _generate_next(self):
+        key = SigningKey.generate(self.key_size, self.algorithm)
+        with self._lock:
+            if self._next is None:
+                self._next = key
+
+    def rotate(self) -> SigningKey:
+        """Promote the pre-generated key to active and retire the current one."""
+        pending = self._generating
+        if pending is not None and pending.is_alive():
+            pending.join()
+        # retire what is actually active, even if another worker rotated since we loaded
+        self.reload_if_changed()
+        with self._lock:
+            if self._active is None and Path(settings.private_key_path).exists():
+                self.load(settings.private_key_path, settings.key_id)
+            new_key, self._next = self._next, None
+            if new_key is None:
+                new_key = SigningKey.generate(self.key_size, self.algorithm)
+            if self._active is not None:
+                self._retired.appendleft(self._active)
+            self._active = new_key
+        self.pregenerate()
+        return new_key
+
+
+def uses_key_ring() -> bool:
+    # RS*/ES*/EdDSA tokens are signed with the key ring; HS* keep using `secret_key`
+    return not settings.algorithm.startswith("HS")
+
+
+key_ring = KeyRing(
+    max_retired=settings.signing_keys_retained,
+    key_size=settings.signing_key_size,
+    # HS* deployments never sign with the ring, but PRIVATE_KEY_PATH still holds an RSA key
+    algorithm="RS256" if settings.algorithm.startswith("HS") else settings.algorithm,
+)
@@ -0,0 +1,154 @@
+# app/core/login_throttle.py
+"""
+Per-account throttling of failed logins.
+
+IP limits do nothing against credential stuffing spread over many addresses,
+so failures are also counted per username. Counts live in two count-min
+sketches, one for the current `login_throttle_window_seconds` window and one
+for the previous window. The estimate is weighted the same way as the
+sliding-window rate limiter:
+
+    failures = current + previous * (share of the previous window still in range)
+
+Memory is fixed (2 x depth x width 16-bit counters, 1 MiB by default) however
+many usernames are attacked, and windows rotate in O(1). A sketch can only
+overestimate. Conservative update and a per-process hash key keep collisions
+rare, and the rarely hit ones cannot be crafted from outside.
+
+`authenticate_user` / `aauthenticate_user` check the throttle and record
+failures, so every password-accepting route is covered. Once a username
+reaches `login_throttle_threshold` they raise `LoginThrottled` (a 429 via the
+handler in main.py) before verifying the password, so an attack no longer
+costs a bcrypt per attempt. Accounts that are not being attacked never get
+near the threshold.
+"""
+import hashlib
+import math
+import secrets
+import threading
+import time
+from array import array
+from typing import List, Optional
+
+from app.config import settings
+from app.core.metrics import Counter, registry
+
+_MAX_COUNT = 0xFFFF
+
+throttled_total = registry.register(Counter(
+    "login_throttled_total", "Password logins rejected by the per-account throttle before bcrypt.",
+))
+
+
+class LoginThrottled(Exception):
+    """Too many recent failures for this username; retry after `retry_after` seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Too many failed login attempts, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class CountMinSketch:
+    __slots__ = ("width", "rows")
+
+    def __init__(self, width: int, depth: int):
+        self.width = width
+        self.rows = [array("H", bytes(2 * width)) for _ in range(depth)]
+
+    def add(self, indexes: List[int], amount: int = 1):
+        # conservative update: only raise the cells that are at the current minimum
+        target = min(self.estimate(indexes) + amount, _MAX_COUNT)
+        for row, index in zip(self.rows, indexes):
+            if row[index] < target:
+                row[index] = target
+
+    def estimate(self, indexes: List[int]) -> int:
+        return min(row[index] for row, index in zip(self.rows, indexes))
+
+
+class LoginThrottle:
+    def __init__(self, threshold: int, window_seconds: int, width: int = 1 << 16, depth: int = 4, clock=time.monotonic):
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.width = width
+        self.depth = depth
+        self.clock = clock
+        self._hash_key = secrets.token_bytes(16)
+        self._lock = threading.Lock()
+        self.clear()
+
+    def _indexes(self, username: str) -> List[int]:
+        digest = hashlib.blake2b(username.strip().lower().encode("utf-8"), key=self._hash_key, digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def _advance(self, now: float) -> float:
+        """Rotate windows up to `now`; returns the weight of the previous window."""
+        window = int(now // self.window_seconds)
+        if window != self._window:
+            self._previous = self._current if self._window is not None and window == self._window + 1 else CountMinSketch(self.width, self.depth)
+            self._current = CountMinSketch(self.width, self.depth)
+            self._window = window
+        return 1 - (now % self.window_seconds) / self.window_seconds
+
+    def failures(self, username: str) -> float:
+        indexes = self._indexes(username)
+        with self._lock:
+            weight = self._advance(self.clock())
+            return self._current.estimate(indexes) + self._previous.estimate(indexes) * weight
+
+    def retry_after(self, username: str) -> Optional[int]:
+        """Seconds until `username` may try again, or None if it is not throttled."""
+        if self.threshold <= 0:
+            return None
+        indexes = self._indexes(username)
+        with self._lock:
+            now = self.clock()
+            weight = self._advance(now)
+            current, previous = self._current.estimate(indexes), self._previous.estimate(indexes)
+        if current + previous * weight < self.threshold:
+            return None
+        throttled_total.inc()
+        if current >= self.threshold:
+            # the current window alone is over; it drops below once enough of it ages out next window
+            wait = self.window_seconds * weight + self.window_seconds * (1 - self.threshold / current)
+        else:
+            # wait for the previous window's weight to fall far enough
+            wait = self.window_seconds * (current + previous * weight - self.threshold) / previous
+        # the first whole second at which the estimate is strictly below the threshold
+        return math.floor(wait) + 1
+
+    def check(self, username: str):
+        """Raise `LoginThrottled` if `username` is throttled."""
+        retry_after = self.retry_after(username)
+        if retry_after is not None:
+            raise LoginThrottled(retry_after)
+
+    def record_failure(self, username: str):
+        if self.threshold <= 0:
+            return
+        indexes = self._indexes(username)
+        with self._lock:
+            self._advance(self.clock())
+            self._current.add(indexes)
+
+    def clear(self):
+        with self._lock:
+            self._window = None
+            self._current = CountMinSketch(self.width, self.depth)
+            self._previous = CountMinSketch(self.width, self.depth)
+
+    def stats(self) -> dict:
+        return {
+            "threshold": self.threshold,
+            "window_seconds": self.window_seconds,
+            "memory_bytes": 2 * 2 * self.width * self.depth,
+        }
+
+
+login_throttle = LoginThrottle(
+    threshold=settings.login_throttle_threshold,
+    window_seconds=settings.login_throttle_window_seconds,
+    width=settings.login_throttle_sketch_width,
+    depth=settings.login_throttle_sketch_depth,
+)
@@ -0,0 +1,116 @@
+# app/core/permission_index.py
+"""
+Permission bitmaps for access tokens.
+
+Permissions get dense bit positions in id order, so the bitmap grows with the
+number of permissions rather than the largest id. Creating or deleting one can
+shift positions, which always changes the index version. With
+`PERMISSION_BITMAP_CLAIM` enabled, access tokens carry
+
+    perm_bits   base64url bitmap; bit i is (byte i // 8) & (1 << i % 8)
+    perm_ver    version of the index the bitmap was built against
+
+and `/.well-known/permission-index.json` maps bit positions to permission
+names. A resource server caches the index by `perm_ver` and authorizes with a
+bit test instead of calling back for the user's permissions.
+
+Each worker rebuilds its index after a local RBAC change, after
+`permission_index_ttl_seconds` (picking up changes made by other workers), and
+immediately when asked to encode a permission it does not know yet.
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.discovery import CachedDocument
+from app.core.jwt_backends import b64url_decode, b64url_encode
+from app.core.rbac import rbac_resolver
+from app.models.rbac import Permission
+
+
+class PermissionIndex:
+    __slots__ = ("names", "positions", "version")
+
+    def __init__(self, permissions: Iterable[tuple[int, str]]):
+        # names[i] is the permission on bit i
+        self.names: List[str] = [name for _, name in sorted(permissions)]
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        canonical = json.dumps(self.names, separators=(",", ":")).encode("utf-8")
+        self.version = hashlib.sha256(canonical).hexdigest()[:12]
+
+    def encode(self, names: Iterable[str]) -> str:
+        bits = 0
+        for name in names:
+            position = self.positions.get(name)
+            if position is not None:
+                bits |= 1 << position
+        return b64url_encode(bits.to_bytes((bits.bit_length() + 7) // 8, "little"))
+
+    def decode(self, bitmap: str) -> frozenset:
+        bits = int.from_bytes(b64url_decode(bitmap), "little")
+        return frozenset(
+            name for position, name in enumerate(self.names) if bits >> position & 1
+        )
+
+    def to_document(self) -> dict:
+        return {
+            "version": self.version,
+            "bit_order": "lsb0",
+            "permissions": {str(i): name for i, name in enumerate(self.names)},
+        }
+
+
+class PermissionIndexCache:
+    """The current index and its published document, rebuilt after any RBAC change or `ttl_seconds`."""
+
+    def __init__(self, ttl_seconds: float, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._rbac_version = None
+        self._built_at = 0.0
+        self._index: Optional[PermissionIndex] = None
+        self._document: Optional[CachedDocument] = None
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, names: Iterable[str] = ()) -> PermissionIndex:
+        """The index, rebuilt first if any of `names` is missing (created by another worker)."""
+        return self._current(db, names)[0]
+
+    def document(self, db: Session) -> CachedDocument:
+        return self._current(db)[1]
+
+    def _current(self, db: Session, names: Iterable[str] = ()) -> tuple[PermissionIndex, CachedDocument]:
+        version = rbac_resolver.version
+        now = self.clock()
+        with self._lock:
+            index = self._index
+            if (
+                index is not None
+                and self._rbac_version == version
+                and now - self._built_at < self.ttl_seconds
+                and all(name in index.positions for name in names)
+            ):
+                return index, self._document
+        index = PermissionIndex(db.execute(select(Permission.id, Permission.name)).all())
+        document = CachedDocument(index.to_document(), settings.permission_index_max_age_seconds)
+        with self._lock:
+            self._rbac_version, self._built_at, self._index, self._document = version, now, index, document
+        return index, document
+
+
+permission_index = PermissionIndexCache(ttl_seconds=settings.permission_index_ttl_seconds)
+
+
+def permission_claims(db: Session, permission_names: Iterable[str]) -> dict:
+    """`perm_bits` / `perm_ver` claims for an access token, or {} when disabled."""
+    if not settings.permission_bitmap_claim:
+        return {}
+    permission_names = list(permission_names)
+    index = permission_index.get(db, permission_names)
+    return {"perm_bits": index.encode(permission_names), "perm_ver": index.version}
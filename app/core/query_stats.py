@@ -0,0 +1,122 @@
+# app/core/query_stats.py
+"""
+Per-request SQL accounting.
+
+Engine-level `before/after_cursor_execute` listeners (every engine, async
+ones included) add each statement and its DB time to the current request's
+`RequestQueries`, held in a context variable set by `QueryStatsMiddleware`.
+Per request:
+
+    - with `DEBUG=true`, responses carry `X-DB-Query-Count`,
+      `X-DB-Query-Time-Ms` and `X-DB-N-Plus-One` headers
+    - a statement executed `n_plus_one_threshold` times or more (same SQL,
+      any parameters) is logged as an N+1 suspect with the route
+    - a statement slower than `slow_query_ms` is logged with the route
+
+Statements outside a request (audit writer, archiver, scripts) are not counted.
+"""
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.core.metrics import Counter as MetricCounter, registry
+
+logger = logging.getLogger(__name__)
+
+n_plus_one_total = registry.register(MetricCounter(
+    "db_n_plus_one_suspects_total", "Requests that repeated one statement n_plus_one_threshold+ times.", ("route",),
+))
+slow_queries_total = registry.register(MetricCounter(
+    "db_slow_queries_total", "Statements slower than slow_query_ms.", ("route",),
+))
+
+
+class RequestQueries:
+    __slots__ = ("scope", "count", "seconds", "statements")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    @property
+    def route(self) -> str:
+        route = (self.scope or {}).get("route")
+        return getattr(route, "path", None) or (self.scope or {}).get("path", "-")
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.seconds += elapsed
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def current_queries() -> Optional[RequestQueries]:
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started", None)
+    queries = _current.get()
+    if queries is None or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    queries.record(statement, elapsed)
+    if elapsed * 1000 >= settings.slow_query_ms:
+        route = queries.route
+        slow_queries_total.inc(route)
+        logger.warning("Slow query (%.1f ms) in %s: %s", elapsed * 1000, route, " ".join(statement.split())[:500])
+
+
+class QueryStatsMiddleware:
+    """Pure ASGI middleware scoping a `RequestQueries` to each HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        queries = RequestQueries(scope)
+        token = _current.set(queries)
+
+        async def send_with_headers(message):
+            if settings.debug and message["type"] == "http.response.start":
+                repeated = queries.repeated(settings.n_plus_one_threshold)
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-db-query-count", str(queries.count).encode()),
+                    (b"x-db-query-time-ms", f"{queries.seconds * 1000:.2f}".encode()),
+                    (b"x-db-n-plus-one", str(len(repeated)).encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            repeated = queries.repeated(settings.n_plus_one_threshold)
+            if repeated:
+                route = queries.route
+                n_plus_one_total.inc(route)
+                for statement, n in repeated:
+                    logger.warning("Possible N+1 in %s: %d x %s", route, n, " ".join(statement.split())[:500])
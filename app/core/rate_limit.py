@@ -0,0 +1,179 @@
+# app/core/rate_limit.py
+"""
+The application's one rate limiter.
+
+Counters live in `rate_limit_storage_uri`, so every worker shares them:
+
+    memory://                        per process; single worker / development
+    sqlite:///./rate_limits.db       file shared by all workers on one host (tests, local)
+    redis://host:6379/0              cluster-wide; needs the `redis` extra
+
+`rate_limit_strategy` is `sliding-window-counter` by default (a weighted
+sum of the current and previous fixed windows, so there is no burst at a
+window boundary). `fixed-window` and, except on SQLite, `moving-window`
+also work. Limits are named per route in `Settings.rate_limits`:
+
+    @limiter.limit(route_limit("auth.token"))
+"""
+import math
+import sqlite3
+import threading
+import time
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from limits.storage import SlidingWindowCounterSupport, Storage
+from slowapi import Limiter
+from slowapi.errors import RateLimitExceeded
+from slowapi.util import get_remote_address
+
+from app.config import settings
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport):
+    """
+    `limits` storage in a SQLite file. Every operation is its own
+    `BEGIN IMMEDIATE` transaction, so processes sharing the file see one
+    consistent set of counters. Sliding windows leave one row per key and
+    window behind, so expired rows are deleted every `PURGE_INTERVAL_SECONDS`.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+    PURGE_INTERVAL_SECONDS = 60
+
+    def __init__(self, uri: str, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        # sqlite:///relative.db, sqlite:////absolute.db, or sqlite:// for a private in-memory store
+        self.path = uri[len("sqlite:///"):] if uri.startswith("sqlite:///") else ""
+        self.path = self.path or ":memory:"
+        self._conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limits_expires_at ON rate_limits (expires_at)")
+        self._next_purge = 0.0
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                result = fn(self._conn, now)
+                if now >= self._next_purge:
+                    self._conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+                    self._next_purge = now + self.PURGE_INTERVAL_SECONDS
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    @staticmethod
+    def _get(conn, key: str, now: float) -> int:
+        row = conn.execute("SELECT count FROM rate_limits WHERE key = ? AND expires_at > ?", (key, now)).fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _incr(conn, key: str, expiry: float, amount: int, now: float) -> int:
+        # an expired row restarts from zero with a fresh expiry
+        return conn.execute(
+            """
+            INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                count = CASE WHEN expires_at <= ? THEN excluded.count ELSE count + excluded.count END,
+                expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END
+            RETURNING count
+            """,
+            (key, amount, now + expiry, now, now),
+        ).fetchone()[0]
+
+    # --- fixed window ---
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        return self._transaction(lambda conn, now: self._incr(conn, key, expiry, amount, now))
+
+    def get(self, key: str) -> int:
+        return self._transaction(lambda conn, now: self._get(conn, key, now))
+
+    def get_expiry(self, key: str) -> float:
+        def expiry(conn, now):
+            row = conn.execute("SELECT expires_at FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else now
+        return self._transaction(expiry)
+
+    def check(self) -> bool:
+        try:
+            self._conn.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> int | None:
+        return self._transaction(lambda conn, now: conn.execute("DELETE FROM rate_limits").rowcount)
+
+    def clear(self, key: str) -> None:
+        self._transaction(lambda conn, now: conn.execute("DELETE FROM rate_limits WHERE key = ?", (key,)))
+
+    # --- sliding window counter ---
+    @staticmethod
+    def _window(key: str, expiry: int, now: float) -> tuple[str, str, float]:
+        window = int(now // expiry)
+        # share of the previous window still inside the sliding window
+        previous_weight = 1 - (now % expiry) / expiry
+        return f"{key}/{window - 1}", f"{key}/{window}", previous_weight
+
+    def _sliding_window(self, conn, key: str, expiry: int, now: float) -> tuple[int, float, int, float]:
+        previous_key, current_key, previous_weight = self._window(key, expiry, now)
+        previous_count = self._get(conn, previous_key, now)
+        current_count = self._get(conn, current_key, now)
+        previous_ttl = previous_weight * expiry if previous_count else 0.0
+        return previous_count, previous_ttl, current_count, previous_weight * expiry + expiry
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+
+        def acquire(conn, now):
+            previous_count, previous_ttl, current_count, _ = self._sliding_window(conn, key, expiry, now)
+            if math.floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                return False
+            # the current window is still read as "previous" during the next one
+            self._incr(conn, self._window(key, expiry, now)[1], 2 * expiry, amount, now)
+            return True
+
+        return self._transaction(acquire)
+
+    def get_sliding_window(self, key: str, expiry: int) -> tuple[int, float, int, float]:
+        return self._transaction(lambda conn, now: self._sliding_window(conn, key, expiry, now))
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key, _ = self._window(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
+
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.rate_limit_storage_uri,
+    strategy=settings.rate_limit_strategy,
+    # keep limiting (per process) if the shared store goes away
+    in_memory_fallback_enabled=True,
+)
+
+
+def route_limit(name: str) -> str:
+    """The limit configured for `name` in `Settings.rate_limits`, e.g. "5/minute"."""
+    return settings.rate_limits[name]
+
+
+def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
+    headers = {}
+    view_limit = getattr(request.state, "view_rate_limit", None)
+    if view_limit is not None:
+        reset_at, _ = limiter.limiter.get_window_stats(view_limit[0], *view_limit[1])
+        headers["Retry-After"] = str(max(1, math.ceil(reset_at - time.time())))
+    return JSONResponse({"detail": f"Rate limit exceeded: {exc.detail}"}, status_code=429, headers=headers)
@@ -0,0 +1,154 @@
+# app/core/rbac.py
+"""
+Compiled per-user RBAC grants.
+
+A user's effective role and permission names (assigned roles plus every
+ancestor role from `role_closure`) are loaded with one query and frozen into a
+`Grants` object, so guards check membership in memory instead of walking lazy
+`roles` / `permissions` relationships or the role hierarchy.
+
+Entries are stamped with a process-wide RBAC version. Committing any change to
+`Role`, `Permission`, `user_roles`, `role_permissions` or the role hierarchy
+through an ORM session bumps the version, which invalidates every entry at
+once. Changes committed by other workers are picked up when an entry's TTL
+runs out.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import FrozenSet, Iterable
+
+from sqlalchemy import event, inspect, select, union
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.rbac import Permission, Role, role_closure, role_permissions, user_roles
+from app.models.user import User
+
+_RBAC_TABLES = frozenset({"roles", "permissions", "user_roles", "role_permissions", "role_parents", "role_closure"})
+
+
+class Grants:
+    __slots__ = ("user_id", "roles", "permissions", "version", "cached_until", "_roles_lower")
+
+    def __init__(self, user_id: int, roles: FrozenSet[str], permissions: FrozenSet[str], version: int, cached_until: float):
+        self.user_id = user_id
+        self.roles = roles
+        self.permissions = permissions
+        self.version = version
+        self.cached_until = cached_until
+        self._roles_lower = frozenset(name.lower() for name in roles)
+
+    def has_any_role(self, names: Iterable[str]) -> bool:
+        """Case-insensitive; true if the user holds at least one of `names`."""
+        return not self._roles_lower.isdisjoint(name.lower() for name in names)
+
+    def has_permission(self, name: str) -> bool:
+        return name in self.permissions
+
+
+class RBACResolver:
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version = 0
+        self._grants: "OrderedDict[int, Grants]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, db: Session, user_id: int) -> Grants:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._grants.get(user_id)
+            if entry is not None and entry.version == self.version and entry.cached_until >= now:
+                self._grants.move_to_end(user_id)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            # read the version before querying so a concurrent bump marks this entry stale
+            version = self.version
+
+        grants = self._load(db, user_id, version, now + self.ttl_seconds)
+        if self.ttl_seconds > 0:
+            with self._lock:
+                self._grants[user_id] = grants
+                self._grants.move_to_end(user_id)
+                while len(self._grants) > self.max_entries:
+                    self._grants.popitem(last=False)
+        return grants
+
+    def _load(self, db: Session, user_id: int, version: int, cached_until: float) -> Grants:
+        effective = union(
+            select(user_roles.c.role_id).where(user_roles.c.user_id == user_id),
+            select(role_closure.c.ancestor_id)
+            .join(user_roles, user_roles.c.role_id == role_closure.c.descendant_id)
+            .where(user_roles.c.user_id == user_id),
+        ).subquery()
+        rows = db.execute(
+            select(Role.name, Permission.name)
+            .join(effective, effective.c.role_id == Role.id)
+            .outerjoin(role_permissions, role_permissions.c.role_id == Role.id)
+            .outerjoin(Permission, Permission.id == role_permissions.c.permission_id)
+        ).all()
+        return Grants(
+            user_id,
+            frozenset(role for role, _ in rows),
+            frozenset(permission for _, permission in rows if permission is not None),
+            version,
+            cached_until,
+        )
+
+    def bump(self):
+        with self._lock:
+            self.version += 1
+            self._grants.clear()
+
+    def clear(self):
+        self.bump()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"version": self.version, "entries": len(self._grants), "hits": self.hits, "misses": self.misses}
+
+
+rbac_resolver = RBACResolver(
+    ttl_seconds=settings.rbac_cache_ttl_seconds,
+    max_entries=settings.rbac_cache_max_entries,
+)
+
+
+# --- invalidation: flag sessions that touch RBAC state, bump once they commit ---
+def _touches_rbac(obj) -> bool:
+    if isinstance(obj, (Role, Permission)):
+        return True
+    return isinstance(obj, User) and inspect(obj).attrs.roles.history.has_changes()
+
+
+@event.listens_for(Session, "before_flush")
+def _flag_orm_changes(session, flush_context, instances):
+    # deleting a user also cascades away its user_roles rows
+    removed = any(isinstance(obj, (Role, Permission, User)) for obj in session.deleted)
+    if removed or any(_touches_rbac(obj) for obj in (*session.new, *session.dirty)):
+        session.info["rbac_dirty"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _flag_bulk_statements(orm_execute_state):
+    # session.execute(insert(user_roles)...), query(...).delete(), etc.
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    if table is not None and table.name in _RBAC_TABLES:
+        orm_execute_state.session.info["rbac_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session):
+    if session.info.pop("rbac_dirty", False):
+        rbac_resolver.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop("rbac_dirty", None)
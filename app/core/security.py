@@ -1,44 +1,90 @@
 # app/core/security.py
 from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 import secrets
 import hashlib
 import os
 
-from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as OrmSession, selectinload
 
 from app.config import settings
+from app.core.crypto_executor import crypto_executor
+from app.core.discovery import discovery_documents
+from app.core.keyring import key_ring, uses_key_ring
+from app.core.metrics import timed
+from app.core.jwt_backends import JWTBackendError, get_backend, get_unverified_header
+from app.core.session_cache import session_cache
+from app.core.rbac import rbac_resolver
+from app.core.permission_index import permission_claims
+from app.core.token_versions import token_versions
 from app.models.rbac import UserSession
 from app.models.user import User
-from cryptography.hazmat.primitives.asymmetric import rsa
-from cryptography.hazmat.primitives import serialization
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# new hashes are bcrypt; argon2 is accepted for users imported with existing hashes
+pwd_context = CryptContext(schemes=["bcrypt", "argon2"], deprecated="auto")
+jwt_backend = get_backend(settings.jwt_backend)
 
-def hash_refresh_token(token: str) -> str:
-    return hashlib.sha256(token.encode()).hexdigest()
+def hash_refresh_token(token: str) -> bytes:
+    """Return the 32-byte SHA-256 digest of a raw refresh token for storage/lookup."""
+    return hashlib.sha256(token.encode("utf-8")).digest()
 
-# --- password helpers (unchanged) ---
-def hash_password(password: str) -> str:
+# --- compact session identity ---
+def new_jti() -> str:
+    """Short random `jti` claim identifying the session an access token belongs to."""
+    return secrets.token_urlsafe(16)
+
+def session_key(payload: dict, token: str) -> bytes:
+    """
+    Fixed-width (16 byte) lookup key for the session behind an access token.
+    Tokens minted before the `jti` claim existed are keyed on the token itself,
+    matching the backfill done by the migration.
+    """
+    return hashlib.sha256((payload.get("jti") or token).encode("utf-8")).digest()[:16]
+
+# --- password helpers (run on the crypto executor) ---
+def _hash_password(password: str) -> str:
     return pwd_context.hash(password[:72])
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password[:72], hashed_password)
 
-# --- access / id token helpers (HS256) ---
+def hash_password(password: str) -> str:
+    return crypto_executor.run("hash_password", _hash_password, password)
+
+@timed("verify_password")
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return crypto_executor.run("verify_password", _verify_password, plain_password, hashed_password)
+
+# --- access / id token helpers ---
+def _sign(op: str, claims: dict) -> str:
+    if uses_key_ring():
+        key = key_ring.active
+        return crypto_executor.run_local(
+            op, jwt_backend.encode, claims, key.private_key, key.algorithm, {"kid": key.kid}
+        )
+    return crypto_executor.run_local(op, jwt_backend.encode, claims, settings.secret_key, settings.algorithm)
+
+@timed("create_access_token")
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.access_token_expire_minutes))
     to_encode.update({"exp": expire, "iat": datetime.utcnow()})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+    encoded_jwt = _sign("sign_access_token", to_encode)
     return encoded_jwt
 
-def create_id_token(user: User, expires_delta: Optional[timedelta] = None, aud: Optional[str] = None) -> str:
+def access_token_claims(user: User, db: OrmSession, jti: str) -> dict:
+    """Claims for a new access token; roles (and the optional permission bitmap) come from compiled grants."""
+    grants = rbac_resolver.resolve(db, user.id)
+    claims = {"sub": user.username, "roles": sorted(grants.roles), "jti": jti, "tv": user.token_version or 0}
+    claims.update(permission_claims(db, grants.permissions))
+    return claims
+
+def _id_token_claims(user: User, role_names: List[str], expires_delta: Optional[timedelta], aud: Optional[str]) -> dict:
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.access_token_expire_minutes))
-    role_names = [role.name for role in user.roles]
-    to_encode = {
+    return {
         "sub": str(user.id),
         "name": user.full_name,
         "email": user.email,
@@ -48,12 +94,21 @@ def create_id_token(user: User, expires_delta: Optional[timedelta] = None, aud:
         "iat": datetime.utcnow(),
         "exp": expire,
     }
-    return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+
+@timed("create_id_token")
+def create_id_token(user: User, expires_delta: Optional[timedelta] = None, aud: Optional[str] = None) -> str:
+    role_names = [role.name for role in user.roles]
+    return _sign("sign_id_token", _id_token_claims(user, role_names, expires_delta, aud))
 
 def decode_access_token(token: str) -> Optional[dict]:
     try:
-        return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-    except JWTError:
+        if uses_key_ring():
+            key = key_ring.get(get_unverified_header(token).get("kid"))
+            if key is None:
+                return None
+            return jwt_backend.decode(token, key.public_key, [key.algorithm])
+        return jwt_backend.decode(token, settings.secret_key, [settings.algorithm])
+    except JWTBackendError:
         return None
 
 # --- refresh token helpers (secure) ---
@@ -61,18 +116,13 @@ def generate_refresh_token(length: int = 48) -> str:
     """Return a URL-safe cryptographically-secure refresh token (raw)."""
     return secrets.token_urlsafe(length)
 
-def _hash_refresh_token(raw: str) -> str:
-    """Return hex SHA-256 of the refresh token for storage/lookup."""
-    h = hashlib.sha256()
-    h.update(raw.encode("utf-8"))
-    return h.hexdigest()
-
 def _is_session_expired(session: UserSession) -> bool:
     if session.expires_at is None:
         return False
     return session.expires_at < datetime.utcnow()
 
 # --- session management (DB helpers) ---
+@timed("create_session")
 def create_session(user: User, db: OrmSession, access_expire_minutes: int, refresh_expire_days: int):
     """Create a new session with access & refresh token."""
     
@@ -80,19 +130,21 @@ def create_session(user: User, db: OrmSession, access_expire_minutes: int, refre
     refresh_token = secrets.token_urlsafe(64)
     refresh_hash = hash_refresh_token(refresh_token)
 
+    jti = new_jti()
     access_token = create_access_token(
-        {"sub": user.username, "roles": [r.name for r in user.roles]},
+        access_token_claims(user, db, jti),
         expires_delta=timedelta(minutes=access_expire_minutes),
     )
 
     # Store session
     session = UserSession(
         user_id=user.id,
-        session_token=access_token,
+        session_key=session_key({"jti": jti}, access_token),
         refresh_token_hash=refresh_hash,
         expires_at=datetime.utcnow() + timedelta(days=refresh_expire_days),
         is_active=True,
         revoked=False,
+        token_version=user.token_version or 0,
     )
     db.add(session)
     db.commit()
@@ -114,21 +166,24 @@ def verify_refresh_token(raw_token: str, db: OrmSession) -> Optional[UserSession
     Given a raw refresh token from client, find the active session and validate.
     Returns the UserSession if valid, otherwise None.
     """
-    refresh_hash = _hash_refresh_token(raw_token)
+    refresh_hash = hash_refresh_token(raw_token)
     session = db.query(UserSession).filter(
-        UserSession.refresh_token == refresh_hash
+        UserSession.refresh_token_hash == refresh_hash
     ).first()
 
     if not session:
         return None
     if session.revoked or not session.is_active:
         return None
+    if not token_versions.is_current(db, session.user_id, session.token_version):
+        return None
     if _is_session_expired(session):
         # defensively revoke it
         session.revoked = True
         session.is_active = False
         db.add(session)
         db.commit()
+        session_cache.revoke(session.session_key)
         return None
     return session
 
@@ -137,26 +192,111 @@ def revoke_session(session: UserSession, db: OrmSession):
     session.revoked = True
     session.is_active = False
     db.commit()
+    session_cache.revoke(session.session_key)
 
-def rotate_keys(private_key_path: str, public_key_path: str):
+# --- async variants (AsyncSession routes) ---
+# Hashing, signing and verification run on the crypto executor so the event loop
+# never blocks on them. Sync-only helpers (RBAC grants, token versions) are
+# reused through `AsyncSession.run_sync`.
+async def ahash_password(password: str) -> str:
+    return await crypto_executor.arun("hash_password", _hash_password, password)
 
-    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
-    public_key = private_key.public_key()
+@timed("verify_password")
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    return await crypto_executor.arun("verify_password", _verify_password, plain_password, hashed_password)
 
-    # Write new private key
-    with open(private_key_path, "wb") as f:
-        f.write(private_key.private_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PrivateFormat.PKCS8,
-            encryption_algorithm=serialization.NoEncryption()
-        ))
+async def _asign(op: str, claims: dict) -> str:
+    if uses_key_ring():
+        key = key_ring.active
+        return await crypto_executor.arun_local(
+            op, jwt_backend.encode, claims, key.private_key, key.algorithm, {"kid": key.kid}
+        )
+    return await crypto_executor.arun_local(op, jwt_backend.encode, claims, settings.secret_key, settings.algorithm)
 
-    # Write new public key
-    with open(public_key_path, "wb") as f:
-        f.write(public_key.public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-        ))
+@timed("create_access_token")
+async def acreate_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    to_encode = data.copy()
+    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=settings.access_token_expire_minutes))
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
+    return await _asign("sign_access_token", to_encode)
 
-    return True
+@timed("create_id_token")
+async def acreate_id_token(user: User, expires_delta: Optional[timedelta] = None, aud: Optional[str] = None) -> str:
+    """`user.roles` must already be loaded (lazy loads are not allowed on an AsyncSession)."""
+    role_names = [role.name for role in user.roles]
+    return await _asign("sign_id_token", _id_token_claims(user, role_names, expires_delta, aud))
+
+async def adecode_access_token(token: str) -> Optional[dict]:
+    return await crypto_executor.arun_local("verify_access_token", decode_access_token, token)
+
+@timed("create_session")
+async def acreate_session(user: User, db: AsyncSession, access_expire_minutes: int, refresh_expire_days: int):
+    """Async `create_session`."""
+    refresh_token = secrets.token_urlsafe(64)
+    jti = new_jti()
+    claims = await db.run_sync(lambda sync_db: access_token_claims(user, sync_db, jti))
+    access_token = await acreate_access_token(claims, expires_delta=timedelta(minutes=access_expire_minutes))
+
+    session = UserSession(
+        user_id=user.id,
+        session_key=session_key({"jti": jti}, access_token),
+        refresh_token_hash=hash_refresh_token(refresh_token),
+        expires_at=datetime.utcnow() + timedelta(days=refresh_expire_days),
+        is_active=True,
+        revoked=False,
+        token_version=user.token_version or 0,
+    )
+    db.add(session)
+    await db.commit()
+    return session, refresh_token, access_token
+
+async def arotate_refresh_session(session: UserSession, db: AsyncSession, new_session_key: Optional[bytes] = None) -> str:
+    """Async `rotate_refresh_session`; optionally re-keys the session in the same commit."""
+    new_refresh_token = secrets.token_urlsafe(64)
+    session.refresh_token_hash = hash_refresh_token(new_refresh_token)
+    if new_session_key is not None:
+        session.session_key = new_session_key
+    await db.commit()
+    return new_refresh_token
+
+async def averify_refresh_token(raw_token: str, db: AsyncSession) -> Optional[UserSession]:
+    """Async `verify_refresh_token`; the session's user and roles come back eagerly loaded."""
+    session = (
+        await db.execute(
+            select(UserSession)
+            .options(selectinload(UserSession.user).selectinload(User.roles))
+            .where(UserSession.refresh_token_hash == hash_refresh_token(raw_token))
+        )
+    ).scalar_one_or_none()
+
+    if not session:
+        return None
+    if session.revoked or not session.is_active:
+        return None
+    user_id, version = session.user_id, session.token_version
+    if not await db.run_sync(lambda sync_db: token_versions.is_current(sync_db, user_id, version)):
+        return None
+    if _is_session_expired(session):
+        session.revoked = True
+        session.is_active = False
+        await db.commit()
+        session_cache.revoke(session.session_key)
+        return None
+    return session
 
+def rotate_keys(private_key_path: str, public_key_path: str):
+    """
+    Promote the pre-generated key to active. The previous key is retired but
+    stays in JWKS and keeps verifying tokens until it falls out of the ring.
+    """
+    key_ring.rotate()
+
+    # Persist the new active key pair and the retired public keys, so every
+    # worker (and this one after a restart) verifies the same set of kids
+    key_ring.save(private_key_path, public_key_path)
+
+    # pick up the new key material and republish JWKS / discovery
+    settings.load_keys()
+    discovery_documents.rebuild()
+
+    return True
@@ -0,0 +1,132 @@
+# app/core/session_cache.py
+"""
+In-process, revocation-aware cache of validated sessions.
+
+Known-good sessions are kept in a TTL-bounded LRU so steady-state authenticated
+requests need no DB round trip. Sessions revoked through this process go into a
+negative set and are rejected immediately; revocations made by other workers
+take effect once the positive entry's TTL runs out.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, FrozenSet, Optional, Set
+
+from app.config import settings
+
+
+class CachedSession:
+    __slots__ = ("user", "user_id", "roles", "expires_at", "cached_until")
+
+    def __init__(self, user, user_id: int, roles: FrozenSet[str], expires_at: Optional[datetime], cached_until: float):
+        self.user = user
+        self.user_id = user_id
+        self.roles = roles
+        self.expires_at = expires_at
+        self.cached_until = cached_until
+
+    def is_expired(self) -> bool:
+        return self.expires_at is not None and self.expires_at < datetime.utcnow()
+
+
+class SessionCache:
+    def __init__(self, ttl_seconds: float, max_entries: int, revoked_ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.revoked_ttl_seconds = revoked_ttl_seconds
+        self._valid: "OrderedDict[bytes, CachedSession]" = OrderedDict()
+        self._revoked: "OrderedDict[bytes, float]" = OrderedDict()
+        self._by_user: Dict[int, Set[bytes]] = {}
+        self._lock = threading.Lock()
+
+    # --- lookups ---
+    def get(self, key: bytes) -> Optional[CachedSession]:
+        if self.ttl_seconds <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._valid.get(key)
+            if entry is None:
+                return None
+            if entry.cached_until < now:
+                self._drop(key)
+                return None
+            self._valid.move_to_end(key)
+            return entry
+
+    def is_revoked(self, key: bytes) -> bool:
+        with self._lock:
+            until = self._revoked.get(key)
+            if until is None:
+                return False
+            if until < time.monotonic():
+                del self._revoked[key]
+                return False
+            return True
+
+    # --- population ---
+    def put(self, key: bytes, user, user_id: int, roles, expires_at: Optional[datetime] = None):
+        if self.ttl_seconds <= 0:
+            return
+        entry = CachedSession(
+            user=user,
+            user_id=user_id,
+            roles=frozenset(roles),
+            expires_at=expires_at,
+            cached_until=time.monotonic() + self.ttl_seconds,
+        )
+        with self._lock:
+            if key in self._revoked:
+                return
+            self._drop(key)
+            self._valid[key] = entry
+            self._by_user.setdefault(user_id, set()).add(key)
+            while len(self._valid) > self.max_entries:
+                oldest = next(iter(self._valid))
+                self._drop(oldest)
+
+    # --- invalidation ---
+    def revoke(self, key: Optional[bytes]):
+        if not key:
+            return
+        with self._lock:
+            self._drop(key)
+            self._mark_revoked(key)
+
+    def revoke_user(self, user_id: int):
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._drop(key)
+                self._mark_revoked(key)
+
+    def clear(self):
+        with self._lock:
+            self._valid.clear()
+            self._revoked.clear()
+            self._by_user.clear()
+
+    # --- internals (caller holds the lock) ---
+    def _drop(self, key: bytes):
+        entry = self._valid.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_user.get(entry.user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[entry.user_id]
+
+    def _mark_revoked(self, key: bytes):
+        self._revoked[key] = time.monotonic() + self.revoked_ttl_seconds
+        self._revoked.move_to_end(key)
+        while len(self._revoked) > self.max_entries:
+            self._revoked.popitem(last=False)
+
+
+session_cache = SessionCache(
+    ttl_seconds=settings.session_cache_ttl_seconds,
+    max_entries=settings.session_cache_max_entries,
+    # a revoked token only needs remembering until the access token itself expires
+    revoked_ttl_seconds=settings.access_token_expire_minutes * 60,
+)
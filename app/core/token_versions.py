@@ -0,0 +1,77 @@
+# app/core/token_versions.py
+"""
+Per-user token version, for O(1) mass revocation.
+
+Every access token carries the user's `token_version` as the `tv` claim and
+every session row records the version it was issued under. Bumping the
+version with a single-row UPDATE invalidates everything issued before it;
+no session rows are touched. Validation compares the claim against a cached
+per-user value, so steady-state checks need no DB round trip. Bumps made by
+this process apply immediately; bumps from other workers once the entry's
+TTL runs out.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.user import User
+
+
+class TokenVersionCache:
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._versions: "OrderedDict[int, tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, user_id: int) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._versions.get(user_id)
+            if entry is not None and entry[1] >= now:
+                self._versions.move_to_end(user_id)
+                return entry[0]
+        version = db.scalar(select(User.token_version).where(User.id == user_id)) or 0
+        self.set(user_id, version)
+        return version
+
+    def set(self, user_id: int, version: int):
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._versions[user_id] = (version, time.monotonic() + self.ttl_seconds)
+            self._versions.move_to_end(user_id)
+            while len(self._versions) > self.max_entries:
+                self._versions.popitem(last=False)
+
+    def is_current(self, db: Session, user_id: int, version: int) -> bool:
+        return version >= self.get(db, user_id)
+
+    def forget(self, user_ids):
+        """Drop cached versions so the next check reads the bumped value."""
+        with self._lock:
+            for user_id in user_ids:
+                self._versions.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+
+
+token_versions = TokenVersionCache(
+    ttl_seconds=settings.token_version_cache_ttl_seconds,
+    max_entries=settings.token_version_cache_max_entries,
+)
+
+
+def bump_token_version(db: Session, user_id: int) -> int:
+    """Invalidate every token and session issued to the user so far."""
+    db.execute(update(User).where(User.id == user_id).values(token_version=User.token_version + 1))
+    db.commit()
+    version = db.scalar(select(User.token_version).where(User.id == user_id))
+    token_versions.set(user_id, version)
+    return version
@@ -0,0 +1,104 @@
+import base64
+import heapq
+import json
+from datetime import datetime
+from itertools import islice
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from app.models.audit import AuditLog
+from app.utils.audit_archive import audit_archive, sort_key
+
+
+def encode_cursor(created_at: datetime, log_id: int) -> str:
+    """Opaque keyset cursor pointing just past (created_at, id)."""
+    raw = json.dumps([created_at.isoformat(), log_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, log_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(log_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+def filter_audit_logs(
+    db: Session,
+    user_id: int | None = None,
+    action: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+):
+    query = db.query(AuditLog).execution_options(read_type="audit")
+    if user_id is not None:
+        query = query.filter(AuditLog.user_id == user_id)
+    if action:
+        query = query.filter(AuditLog.action == action)
+    if since:
+        query = query.filter(AuditLog.created_at >= since)
+    if until:
+        query = query.filter(AuditLog.created_at < until)
+    return query
+
+def list_audit_logs(
+    db: Session,
+    limit: int = 50,
+    cursor: str | None = None,
+    user_id: int | None = None,
+    action: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> tuple[list[AuditLog], str | None]:
+    """
+    Newest-first page of audit logs using keyset pagination on (created_at, id),
+    so every page costs one index range scan regardless of depth. Archived
+    segments overlapping the range are merged in.
+    Returns the page and the cursor for the next one (None on the last page).
+    """
+    query = filter_audit_logs(db, user_id, action, since, until)
+    before = None
+    if cursor:
+        before = decode_cursor(cursor)
+        query = query.filter(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(*before))
+
+    hot = (
+        query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    archived = audit_archive.iter_logs(user_id, action, since, until, before=before, descending=True)
+    rows = list(islice(_dedupe(heapq.merge(hot, archived, key=sort_key, reverse=True)), limit + 1))
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*sort_key(rows[-1]))
+    return rows, next_cursor
+
+def iter_audit_logs(
+    db: Session,
+    batch_size: int = 1000,
+    user_id: int | None = None,
+    action: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+):
+    """
+    Oldest-first stream of matching audit logs for export, archived ones included.
+    Rows are fetched `batch_size` at a time through a server-side cursor where
+    the driver supports one, so memory stays flat for any range.
+    """
+    query = (
+        filter_audit_logs(db, user_id, action, since, until)
+        .order_by(AuditLog.created_at.asc(), AuditLog.id.asc())
+        .yield_per(batch_size)
+    )
+    archived = audit_archive.iter_logs(user_id, action, since, until)
+    yield from _dedupe(heapq.merge(archived, query, key=sort_key))
+
+def _dedupe(logs):
+    # a row can briefly exist in both a segment and the table if archival was interrupted
+    last_id = None
+    for log in logs:
+        if log.id != last_id:
+            yield log
+        last_id = log.id
@@ -0,0 +1,69 @@
+"""
+Set-based admin operations over many users at once.
+
+Inputs are processed in chunks of `admin_bulk_chunk_size` ids, one statement
+per chunk, and committed once at the end.
+"""
+from typing import Iterable, Iterator, List
+from sqlalchemy import and_, delete, exists, insert, literal, select, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.rbac import Role, UserSession, user_roles
+from app.models.user import User
+
+
+def _chunks(user_ids: Iterable[int], size: int) -> Iterator[List[int]]:
+    ids = sorted(set(user_ids))
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+def assign_role(db: Session, role: Role, user_ids: Iterable[int], chunk_size: int | None = None) -> dict:
+    """INSERT ... SELECT the role for every existing user that does not have it yet."""
+    result = {"affected": 0, "chunks": 0}
+    for chunk in _chunks(user_ids, chunk_size or settings.admin_bulk_chunk_size):
+        already = exists().where(and_(user_roles.c.user_id == User.id, user_roles.c.role_id == role.id))
+        rows = db.execute(
+            insert(user_roles).from_select(
+                ["user_id", "role_id"],
+                select(User.id, literal(role.id)).where(User.id.in_(chunk), ~already),
+            )
+        )
+        result["affected"] += rows.rowcount
+        result["chunks"] += 1
+    db.commit()
+    return result
+
+def remove_role(db: Session, role: Role, user_ids: Iterable[int], chunk_size: int | None = None) -> dict:
+    result = {"affected": 0, "chunks": 0}
+    for chunk in _chunks(user_ids, chunk_size or settings.admin_bulk_chunk_size):
+        rows = db.execute(
+            delete(user_roles).where(user_roles.c.role_id == role.id, user_roles.c.user_id.in_(chunk))
+        )
+        result["affected"] += rows.rowcount
+        result["chunks"] += 1
+    db.commit()
+    return result
+
+def revoke_sessions(db: Session, user_ids: Iterable[int], chunk_size: int | None = None) -> dict:
+    """
+    Revoke every open session of the users and bump their token versions, so
+    access tokens already issued stop validating too. `affected` counts sessions.
+    """
+    result = {"affected": 0, "chunks": 0}
+    for chunk in _chunks(user_ids, chunk_size or settings.admin_bulk_chunk_size):
+        rows = db.execute(
+            update(UserSession)
+            .where(UserSession.user_id.in_(chunk), UserSession.revoked == False)
+            .values(revoked=True, is_active=False)
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(
+            update(User)
+            .where(User.id.in_(chunk))
+            .values(token_version=User.token_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        result["affected"] += rows.rowcount
+        result["chunks"] += 1
+    db.commit()
+    return result
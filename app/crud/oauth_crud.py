@@ -4,7 +4,9 @@ from sqlalchemy.orm import Session
 from app.models.oauth import AuthorizationCode, OAuthClient
 
 def get_client_by_client_id(db: Session, client_id: str) -> OAuthClient:
-    return db.query(OAuthClient).filter(OAuthClient.client_id == client_id).first()
+    query = db.query(OAuthClient).filter(OAuthClient.client_id == client_id)
+    # clients rarely change; a brand-new one may not have reached the replica yet
+    return query.execution_options(read_type="client").first() or query.first()
 
 def create_authorization_code(
     db: Session,
@@ -0,0 +1,107 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Set
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from app.models.rbac import Permission, Role, role_closure, role_parents, role_permissions
+
+
+class RoleCycleError(ValueError):
+    """Adding the parent would make a role inherit from itself."""
+
+
+def _parent_graph(db: Session) -> Dict[int, Set[int]]:
+    graph: Dict[int, Set[int]] = defaultdict(set)
+    for role_id, parent_id in db.execute(select(role_parents.c.role_id, role_parents.c.parent_id)):
+        graph[role_id].add(parent_id)
+    return graph
+
+def _ancestors(graph: Dict[int, Set[int]], role_id: int) -> Set[int]:
+    seen: Set[int] = set()
+    stack = list(graph.get(role_id, ()))
+    while stack:
+        current = stack.pop()
+        if current not in seen:
+            seen.add(current)
+            stack.extend(graph.get(current, ()))
+    return seen
+
+def ancestor_ids(db: Session, role_id: int) -> Set[int]:
+    return set(db.scalars(select(role_closure.c.ancestor_id).where(role_closure.c.descendant_id == role_id)))
+
+def descendant_ids(db: Session, role_id: int) -> Set[int]:
+    return set(db.scalars(select(role_closure.c.descendant_id).where(role_closure.c.ancestor_id == role_id)))
+
+def add_role_parent(db: Session, role: Role, parent: Role):
+    """
+    Make `role` inherit from `parent`. Every descendant of `role` (and `role`
+    itself) gains `parent` and its ancestors in the closure.
+    """
+    if role.id == parent.id or role.id in ancestor_ids(db, parent.id):
+        raise RoleCycleError(f"Role '{parent.name}' already inherits from '{role.name}'")
+    if db.execute(
+        select(role_parents).where(role_parents.c.role_id == role.id, role_parents.c.parent_id == parent.id)
+    ).first():
+        return
+
+    db.execute(insert(role_parents).values(role_id=role.id, parent_id=parent.id))
+    ancestors = ancestor_ids(db, parent.id) | {parent.id}
+    descendants = descendant_ids(db, role.id) | {role.id}
+    existing = set(db.execute(
+        select(role_closure.c.descendant_id, role_closure.c.ancestor_id)
+        .where(role_closure.c.descendant_id.in_(descendants), role_closure.c.ancestor_id.in_(ancestors))
+    ).tuples())
+    rows = [
+        {"descendant_id": d, "ancestor_id": a}
+        for d in descendants for a in ancestors if (d, a) not in existing
+    ]
+    if rows:
+        db.execute(insert(role_closure), rows)
+    db.commit()
+
+def remove_role_parent(db: Session, role: Role, parent: Role):
+    """
+    Drop the `role` -> `parent` edge. Only the closure rows of `role` and its
+    descendants are recomputed; ancestors still reachable by another path stay.
+    """
+    result = db.execute(
+        delete(role_parents).where(role_parents.c.role_id == role.id, role_parents.c.parent_id == parent.id)
+    )
+    if not result.rowcount:
+        db.rollback()
+        return
+    _recompute(db, _parent_graph(db), descendant_ids(db, role.id) | {role.id})
+    db.commit()
+
+def rebuild_role_closure(db: Session):
+    """Recompute the whole closure from role_parents (repair / backfill)."""
+    graph = _parent_graph(db)
+    db.execute(delete(role_closure))
+    rows = [
+        {"descendant_id": role_id, "ancestor_id": ancestor}
+        for role_id in list(graph) for ancestor in _ancestors(graph, role_id)
+    ]
+    if rows:
+        db.execute(insert(role_closure), rows)
+    db.commit()
+
+def _recompute(db: Session, graph: Dict[int, Set[int]], role_ids: Iterable[int]):
+    for role_id in role_ids:
+        current = ancestor_ids(db, role_id)
+        wanted = _ancestors(graph, role_id)
+        if current - wanted:
+            db.execute(delete(role_closure).where(
+                role_closure.c.descendant_id == role_id, role_closure.c.ancestor_id.in_(current - wanted)
+            ))
+        if wanted - current:
+            db.execute(insert(role_closure), [
+                {"descendant_id": role_id, "ancestor_id": ancestor} for ancestor in wanted - current
+            ])
+
+def effective_permission_names(db: Session, role: Role) -> Set[str]:
+    """Permissions of `role` and all of its ancestors, in one indexed query."""
+    role_ids = select(role_closure.c.ancestor_id).where(role_closure.c.descendant_id == role.id)
+    return set(db.scalars(
+        select(Permission.name)
+        .join(role_permissions, role_permissions.c.permission_id == Permission.id)
+        .where((role_permissions.c.role_id == role.id) | role_permissions.c.role_id.in_(role_ids))
+    ))
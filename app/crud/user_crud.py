@@ -1,7 +1,10 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from app.models.user import User
-from app.core.security import hash_password, verify_password
-from app.models.rbac import UserSession
+from app.core.security import averify_password, hash_password, verify_password
+from app.core.token_versions import bump_token_version, token_versions
+from app.core.login_throttle import login_throttle
 
 def create_user(db: Session, username: str, email: str, password: str):
     hashed_pw = hash_password(password)
@@ -11,8 +14,11 @@ def create_user(db: Session, username: str, email: str, password: str):
     db.refresh(user)
     return user
 
-def get_user_by_username(db: Session, username: str):
-    return db.query(User).filter(User.username == username).first()
+def get_user_by_username(db: Session, username: str, read_type: str | None = None):
+    query = db.query(User).filter(User.username == username)
+    if read_type:
+        query = query.execution_options(read_type=read_type)
+    return query.first()
 
 def get_users(db: Session, skip: int = 0, limit: int = 100):
     return db.query(User).offset(skip).limit(limit).all()
@@ -28,28 +34,41 @@ def delete_user(db: Session, user: User):
     return user 
 
 def authenticate_user(db: Session, username: str, password: str):
+    # raises LoginThrottled before bcrypt once the account has too many recent failures
+    login_throttle.check(username)
     user = get_user_by_username(db, username)
     if not user or not verify_password(password, user.password_hash):
+        login_throttle.record_failure(username)
         return None
     return user 
 
 
+async def aget_user_by_username(db: AsyncSession, username: str, read_type: str | None = None):
+    # roles are loaded up front: the id token needs them and lazy loads are not allowed here
+    stmt = select(User).options(selectinload(User.roles)).where(User.username == username)
+    if read_type:
+        stmt = stmt.execution_options(read_type=read_type)
+    return (await db.execute(stmt)).scalar_one_or_none()
+
+async def aauthenticate_user(db: AsyncSession, username: str, password: str):
+    login_throttle.check(username)
+    user = await aget_user_by_username(db, username)
+    if not user or not await averify_password(password, user.password_hash):
+        login_throttle.record_failure(username)
+        return None
+    return user
+
+
 def change_password(db: Session, user: User, new_password: str):
     user.password_hash = hash_password(new_password)
-    # revoke all user sessions
-    db.query(UserSession).filter_by(user_id=user.id, revoked=False).update({
-        "revoked": True,
-        "is_active": False
-    })
+    # invalidate every token and session issued before the change, in the same commit
+    user.token_version = User.token_version + 1
     db.add(user)
     db.commit()
     db.refresh(user)
+    token_versions.set(user.id, user.token_version)
     return user
 
 def update_user_roles(db: Session, user: User, new_role_list):
     # (update roles logic)
-    db.query(UserSession).filter_by(user_id=user.id, revoked=False).update({
-        "revoked": True,
-        "is_active": False
-    })
-    db.commit()
+    bump_token_version(db, user.id)
@@ -1,32 +1,115 @@
 # app/database.py
+import logging
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from fastapi import Request
 from app.config import settings  # Load centralized settings
+from app.core.db_pool import pool_options
+from app.core.db_routing import Replica, ReplicaRouter, client_key, routing_session_class
+
+logger = logging.getLogger(__name__)
 
 # --- SQLAlchemy Engine ---
 # Create the database engine using the URL from settings
+# pool size / overflow / recycle come from Settings; see app/core/db_pool.py
 engine = create_engine(
     settings.database_url,
-    pool_pre_ping=True,  # Optional: prevent stale connections
+    **pool_options(settings.database_url),
+)
+
+# --- Async Engine ---
+# Used by the async hot-path routes; same database, async driver
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def async_database_url(url: str) -> str:
+    """Map a sync URL (sqlite://, postgresql[+psycopg2]://) to its async-driver equivalent."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' URLs; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=_ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+_async_url = settings.async_database_url or async_database_url(settings.database_url)
+async_engine = create_async_engine(_async_url, **pool_options(_async_url, is_async=True))
+
+# --- Read Replicas ---
+# Tagged read-only queries may be served here; see app/core/db_routing.py
+replica_router = ReplicaRouter(
+    [
+        Replica(
+            url,
+            create_engine(url, **pool_options(url)),
+            create_async_engine(async_database_url(url), **pool_options(async_database_url(url), is_async=True)),
+        )
+        for url in settings.database_replica_urls
+    ],
+    lag_tolerance_seconds=settings.replica_lag_tolerance_seconds,
+    read_your_writes_seconds=settings.replica_read_your_writes_seconds,
+    probe_interval_seconds=settings.replica_lag_probe_interval_seconds,
 )
 
-# --- Session Factory ---
+# --- Session Factories ---
 # SessionLocal is used to create database sessions
 SessionLocal = sessionmaker(
+    class_=routing_session_class(replica_router),
     autocommit=False,
     autoflush=False,
     bind=engine
 )
 
+# expire_on_commit=False: attributes stay readable after commit without an implicit (sync) reload
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    sync_session_class=routing_session_class(replica_router, is_async=True),
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # --- Base Class for Models ---
 Base = declarative_base()
 
-# --- Dependency for FastAPI ---
-# Optional helper function for FastAPI dependency injection
-def get_db():
-    db = SessionLocal()
+# --- Dependencies for FastAPI ---
+# `get_db` is the canonical request-scoped session provider: every sync route
+# and auth dependency (get_current_user, role_required, require_*) depends on
+# it, and FastAPI caches a dependency per request, so a request holds one
+# pooled connection.
+#
+# `get_async_db` is its counterpart for the async hot-path routes (token,
+# refresh, userinfo, /me), whose whole dependency chain is async
+# (aget_current_user). An AsyncSession cannot be used from sync code outside
+# `run_sync`, nor a sync Session from the event loop, so the two cannot share
+# one session. A route uses one or the other, never both; a request that ends
+# up with both holds two connections and is logged.
+#
+# The audit writer and the CLI scripts open their own sessions because they
+# run outside any request.
+def _claim(request: Request | None, provider: str):
+    if request is None:
+        return
+    other = getattr(request.state, "db_provider", None)
+    if other is not None and other != provider:
+        logger.warning(
+            "%s %s depends on both get_db and get_async_db and holds two connections",
+            request.method, request.url.path,
+        )
+    request.state.db_provider = provider
+
+
+def get_db(request: Request = None):
+    _claim(request, "sync")
+    db = SessionLocal(info={"client_key": client_key(request)})
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db(request: Request = None):
+    _claim(request, "async")
+    async with AsyncSessionLocal(info={"client_key": client_key(request)}) as db:
+        yield db
@@ -1,18 +1,74 @@
-from fastapi import FastAPI
-from app.routes import auth, admin, jwks, authorize, callback
-from fastapi import FastAPI
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from app.config import settings
+from app.routes import auth, admin, jwks, authorize, callback, metrics
+from app.core.admission import AdmissionMiddleware
+from app.core.crypto_executor import crypto_executor, CryptoQueueFull
+from app.core.discovery import discovery_documents
+from app.core.keyring import key_ring
+from app.core.login_throttle import LoginThrottled
+from app.core.metrics import MetricsMiddleware
+from app.core.query_stats import QueryStatsMiddleware
+from app.database import async_engine, replica_router
+from app.utils.audit import audit_writer
+from app.utils.audit_archive import audit_archive
+from app.core.rate_limit import limiter, rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 
-limiter = Limiter(key_func=get_remote_address)
 
-app = FastAPI(title="Custom Identity Platform API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    discovery_documents.warm()
+    key_ring.pregenerate()
+    audit_writer.start()
+    audit_archive.start()
+    replica_router.start()
+    yield
+    replica_router.stop()
+    audit_archive.stop()
+    audit_writer.stop()
+    crypto_executor.shutdown(wait=True)
+    await async_engine.dispose()
+
+
+app = FastAPI(title="Custom Identity Platform API", version="0.1.0", lifespan=lifespan)
 app.state.limiter = limiter
+app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 app.add_middleware(SlowAPIMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+if settings.admission_enabled:
+    # outside the limiter and routing so shed requests cost almost nothing
+    app.add_middleware(AdmissionMiddleware)
+if settings.metrics_enabled:
+    # added last so it wraps everything, rate-limited responses included
+    app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(CryptoQueueFull)
+def crypto_queue_full_handler(request: Request, exc: CryptoQueueFull):
+    # Shed load quickly instead of piling more work behind bcrypt
+    return JSONResponse(
+        {"detail": "Authentication service busy, retry shortly"},
+        status_code=503,
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(LoginThrottled)
+def login_throttled_handler(request: Request, exc: LoginThrottled):
+    return JSONResponse(
+        {"detail": "Too many failed login attempts for this account"},
+        status_code=429,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 
 app.include_router(auth.router)
 app.include_router(admin.router)
 app.include_router(jwks.router)
 app.include_router(authorize.router)
-app.include_router(callback.router)
\ No newline at end of file
+app.include_router(callback.router)
+if settings.metrics_enabled:
+    app.include_router(metrics.router)
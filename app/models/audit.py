@@ -1,6 +1,6 @@
 from datetime import datetime
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, synonym
 from app.database import Base
 
 class AuditLog(Base):
@@ -11,11 +11,17 @@ class AuditLog(Base):
     action = Column(String(100), nullable=False)
     details = Column(Text, nullable=True)
     ip_address = Column(String(45), nullable=True)  # supports IPv6
+    user_agent = Column(String(255), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", back_populates="audit_logs")
 
+    # log_event() and callers refer to the action as the event type
+    event_type = synonym("action")
+
+    # keyset pagination on (created_at, id), optionally narrowed by user or action
     __table_args__ = (
-        Index("ix_audit_log_user_id", "user_id"),
-        Index("ix_audit_log_created_at", "created_at"),
+        Index("ix_audit_log_created_at_id", "created_at", "id"),
+        Index("ix_audit_log_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_audit_log_action_created_at_id", "action", "created_at", "id"),
     )
\ No newline at end of file
@@ -2,7 +2,7 @@ from datetime import datetime
 import re
 from sqlalchemy import (
     Column, Integer, String, Boolean, ForeignKey, DateTime,
-    Table, Index, CheckConstraint, Text
+    Table, Index, CheckConstraint, Text, LargeBinary
 )
 from sqlalchemy.orm import relationship, validates
 from app.database import Base
@@ -22,6 +22,25 @@ role_permissions = Table(
     Column('permission_id', Integer, ForeignKey('permissions.id', ondelete="CASCADE"), primary_key=True)
 )
 
+# role inheritance: a role gets every permission of its parents
+role_parents = Table(
+    'role_parents',
+    Base.metadata,
+    Column('role_id', Integer, ForeignKey('roles.id', ondelete="CASCADE"), primary_key=True),
+    Column('parent_id', Integer, ForeignKey('roles.id', ondelete="CASCADE"), primary_key=True),
+    CheckConstraint("role_id != parent_id", name="check_role_parent_not_self"),
+)
+
+# materialized transitive closure of role_parents: one row per strict ancestor,
+# maintained by app.crud.rbac_crud; keyed for "all ancestors of these roles"
+role_closure = Table(
+    'role_closure',
+    Base.metadata,
+    Column('descendant_id', Integer, ForeignKey('roles.id', ondelete="CASCADE"), primary_key=True),
+    Column('ancestor_id', Integer, ForeignKey('roles.id', ondelete="CASCADE"), primary_key=True),
+    Index('idx_role_closure_ancestor', 'ancestor_id'),
+)
+
 # --- Models ---
 class Role(Base):
     __tablename__ = 'roles'
@@ -34,6 +53,14 @@ class Role(Base):
 
     permissions = relationship('Permission', secondary=role_permissions, back_populates='roles')
     users = relationship('User', secondary=user_roles, back_populates='roles')
+    # read-only; edit through rbac_crud.add_role_parent / remove_role_parent so the closure stays in sync
+    parents = relationship(
+        'Role',
+        secondary=role_parents,
+        primaryjoin=lambda: Role.id == role_parents.c.role_id,
+        secondaryjoin=lambda: Role.id == role_parents.c.parent_id,
+        viewonly=True,
+    )
 
     __table_args__ = (
         Index('idx_role_name', 'name'),
@@ -73,15 +100,12 @@ class UserSession(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=False, index=True)
-    session_token = Column(String(1024), unique=True, nullable=True)
-    refresh_token_hash = Column(String(128), unique=True, nullable=False, index=True)
+    session_key = Column(LargeBinary(16), unique=True, nullable=True, index=True)  # sha256(jti)[:16]
+    refresh_token_hash = Column(LargeBinary(32), unique=True, nullable=False, index=True)  # sha256 digest
     is_active = Column(Boolean, default=True, nullable=False)
     revoked = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     expires_at = Column(DateTime, nullable=True)
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)  # users.token_version at issue
 
     user = relationship('User', back_populates='sessions')
-
-    __table_args__ = (
-        Index('idx_session_refresh_hash', 'refresh_token_hash'),
-    )
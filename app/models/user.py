@@ -16,6 +16,8 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     mfa_secret = Column(String, nullable=True)  # Store TOTP secret
+    # bumped to invalidate every token issued before; embedded as the `tv` claim
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
 
     roles = relationship("Role", secondary="user_roles", back_populates="users")
     sessions = relationship("UserSession", back_populates="user", cascade="all, delete-orphan")
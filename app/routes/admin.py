@@ -1,13 +1,27 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from datetime import datetime
+import io
+from fastapi import APIRouter, Depends, File, Query, UploadFile, status, HTTPException
+from fastapi.responses import StreamingResponse
 from app.utils.auth import role_required
 from sqlalchemy.orm import Session
 from app.core.dependencies import get_db
-from app.models.audit import AuditLog
 from app.utils.auth import role_required
 from typing import List, Optional
 from app.models.user import User
 from app.models.rbac import Role, UserSession
 from app.schemas.user import UserOut
+from app.core.admission import admission_controller
+from app.core.crypto_executor import crypto_executor
+from app.core.session_cache import session_cache
+from app.core.rbac import rbac_resolver
+from app.core.db_pool import pool_stats
+from app.database import async_engine, engine, replica_router
+from app.utils.audit import log_event, audit_writer
+from app.utils import audit_export, user_import
+from app.config import settings
+from app.crud import audit_crud, bulk_crud, rbac_crud
+from app.core.token_versions import token_versions
+from app.schemas.admin import BulkRoleRequest, BulkSessionRevokeRequest, BulkResult
 
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -16,27 +30,111 @@ router = APIRouter(prefix="/admin", tags=["admin"])
 def admin_dashboard(current_user=Depends(role_required(["Admin"]))):
     return {"message": f"Welcome, {current_user.username}! Access granted."}
 
+@router.get("/crypto-executor")
+def crypto_executor_stats(current_user=Depends(role_required(["Admin"]))):
+    """
+    Queue depth and per-operation latency of the bcrypt / token signing executor.
+    """
+    return crypto_executor.stats()
+
+@router.get("/audit-writer")
+def audit_writer_stats(current_user=Depends(role_required(["Admin"]))):
+    """
+    Queue depth and queued / flushed / dropped counters of the audit writer.
+    """
+    return audit_writer.stats()
+
+@router.get("/rbac-cache")
+def rbac_cache_stats(current_user=Depends(role_required(["Admin"]))):
+    """
+    RBAC version and hit / miss counters of the compiled grant cache.
+    """
+    return rbac_resolver.stats()
+
+@router.get("/admission")
+def admission_stats(current_user=Depends(role_required(["Admin"]))):
+    """
+    Adaptive concurrency limit, in-flight and shed counts of each admission budget.
+    """
+    return admission_controller.stats()
+
+@router.get("/db-replicas")
+def db_replica_stats(current_user=Depends(role_required(["Admin"]))):
+    """
+    Measured lag of each read replica and replica / primary read counters.
+    """
+    return replica_router.stats()
+
+@router.get("/db-pool")
+def db_pool_stats(current_user=Depends(role_required(["Admin"]))):
+    """
+    Connection pool gauges (checked out, overflow, checkout wait time) of this worker's engines.
+    """
+    return {
+        "primary": pool_stats(engine),
+        "primary_async": pool_stats(async_engine),
+        "replicas": [pool_stats(replica.engine) for replica in replica_router.replicas],
+    }
+
 @router.get("/audit-logs")
 def get_audit_logs(
     current_user=Depends(role_required(["Admin"])),
-    skip: int = 0,
-    limit: int = 50,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+    user_id: int | None = None,
+    action: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
     db: Session = Depends(get_db),
 ):
     """
-    Retrieve audit logs for admin users with pagination.
-    
-    - **skip**: Number of records to skip
+    Retrieve audit logs for admin users, newest first, with cursor pagination.
+
     - **limit**: Maximum number of records to return
+    - **cursor**: `next_cursor` from the previous page
+    - **user_id** / **action**: exact-match filters
+    - **since** / **until**: created_at range (inclusive / exclusive)
+    """
+    try:
+        logs, next_cursor = audit_crud.list_audit_logs(
+            db, limit=limit, cursor=cursor, user_id=user_id, action=action, since=since, until=until
+        )
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return {"count": len(logs), "logs": logs, "next_cursor": next_cursor}
+
+@router.get("/audit-logs/export")
+def export_audit_logs(
+    current_user=Depends(role_required(["Admin"])),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    user_id: int | None = None,
+    action: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Stream every matching audit log, oldest first, as NDJSON or CSV.
+
+    - **format**: `ndjson` (default) or `csv`
+    - **gzip**: compress the stream; served as a `.gz` attachment
+    - **user_id** / **action** / **since** / **until**: same filters as `/admin/audit-logs`
     """
-    logs = (
-        db.query(AuditLog)
-        .order_by(AuditLog.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+    logs = audit_crud.iter_audit_logs(
+        db,
+        batch_size=settings.audit_export_batch_size,
+        user_id=user_id,
+        action=action,
+        since=since,
+        until=until,
+    )
+    filename = audit_export.export_filename(format, gzip)
+    return StreamingResponse(
+        audit_export.encode_audit_logs(logs, format, gzip),
+        media_type="application/gzip" if gzip else audit_export.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
-    return {"count": len(logs), "logs": logs}
 
 @router.get("/users", response_model=List[UserOut])
 def list_users(
@@ -47,7 +145,7 @@ def list_users(
     email: str | None = None,
     db: Session = Depends(get_db),
 ):
-    query = db.query(User)
+    query = db.query(User).execution_options(read_type="admin")
     if username:
         query = query.filter(User.username.ilike(f"%{username}%"))
     if email:
@@ -80,6 +178,53 @@ def create_role(
     db.refresh(role)
     return {"detail": f"Role '{name}' created"}
 
+def _get_role_or_404(db: Session, name: str) -> Role:
+    role = db.query(Role).filter_by(name=name).first()
+    if not role:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Role '{name}' not found")
+    return role
+
+@router.post("/roles/{name}/parents")
+def add_role_parent(
+    name: str,
+    parent: str,
+    current_user=Depends(role_required(["Admin"])),
+    db: Session = Depends(get_db),
+):
+    """
+    Make role `name` inherit every permission of role `parent`.
+    """
+    role, parent_role = _get_role_or_404(db, name), _get_role_or_404(db, parent)
+    try:
+        rbac_crud.add_role_parent(db, role, parent_role)
+    except rbac_crud.RoleCycleError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    log_event(user_id=current_user.id, event_type="role parent added", details=f"{name} -> {parent}")
+    return {"detail": f"Role '{name}' now inherits from '{parent}'"}
+
+@router.delete("/roles/{name}/parents/{parent}")
+def remove_role_parent(
+    name: str,
+    parent: str,
+    current_user=Depends(role_required(["Admin"])),
+    db: Session = Depends(get_db),
+):
+    role, parent_role = _get_role_or_404(db, name), _get_role_or_404(db, parent)
+    rbac_crud.remove_role_parent(db, role, parent_role)
+    log_event(user_id=current_user.id, event_type="role parent removed", details=f"{name} -> {parent}")
+    return {"detail": f"Role '{name}' no longer inherits from '{parent}'"}
+
+@router.get("/roles/{name}/permissions", response_model=List[str])
+def get_role_permissions(
+    name: str,
+    current_user=Depends(role_required(["Admin"])),
+    db: Session = Depends(get_db),
+):
+    """
+    Effective permissions of a role, including everything inherited from its ancestors.
+    """
+    return sorted(rbac_crud.effective_permission_names(db, _get_role_or_404(db, name)))
+
 @router.get("/sessions")
 def list_sessions(
     current_user=Depends(role_required(["Admin"])),
@@ -88,7 +233,7 @@ def list_sessions(
     limit: int = 50,
     db: Session = Depends(get_db),
 ):
-    query = db.query(UserSession).filter(UserSession.is_active == True)
+    query = db.query(UserSession).filter(UserSession.is_active == True).execution_options(read_type="admin")
     if user_id:
         query = query.filter(UserSession.user_id == user_id)
     sessions = query.offset(skip).limit(limit).all()
@@ -118,7 +263,6 @@ def deactivate_user(
     db.refresh(user)
 
     # Optionally log the admin action
-    from app.utils.audit import log_event
     log_event(user_id=current_user.id, event_type=f"deactivated user {user.username}")
 
     return {"detail": f"User '{user.username}' deactivated"}
@@ -136,9 +280,86 @@ def revoke_session(
     session.revoked = True
     session.is_active = False
     db.commit()
+    session_cache.revoke(session.session_key)
 
     log_event(user_id=current_user.id, event_type=f"revoked session {session.id}")
 
     return {"detail": f"Session {session.id} revoked"}
 
 
+
+
+# --- bulk operations: set-based SQL, chunked, one audit record per request ---
+@router.post("/bulk/roles/assign", response_model=BulkResult)
+def bulk_assign_role(
+    body: BulkRoleRequest,
+    current_user=Depends(role_required(["Admin"])),
+    db: Session = Depends(get_db),
+):
+    role = _get_role_or_404(db, body.role)
+    result = bulk_crud.assign_role(db, role, body.user_ids)
+    log_event(
+        user_id=current_user.id,
+        event_type="bulk role assign",
+        details=f"role={role.name} requested={len(body.user_ids)} affected={result['affected']}",
+    )
+    return {"requested": len(body.user_ids), **result}
+
+@router.post("/bulk/roles/remove", response_model=BulkResult)
+def bulk_remove_role(
+    body: BulkRoleRequest,
+    current_user=Depends(role_required(["Admin"])),
+    db: Session = Depends(get_db),
+):
+    role = _get_role_or_404(db, body.role)
+    result = bulk_crud.remove_role(db, role, body.user_ids)
+    log_event(
+        user_id=current_user.id,
+        event_type="bulk role remove",
+        details=f"role={role.name} requested={len(body.user_ids)} affected={result['affected']}",
+    )
+    return {"requested": len(body.user_ids), **result}
+
+@router.post("/bulk/sessions/revoke", response_model=BulkResult)
+def bulk_revoke_sessions(
+    body: BulkSessionRevokeRequest,
+    current_user=Depends(role_required(["Admin"])),
+    db: Session = Depends(get_db),
+):
+    """
+    Revoke every session of the given users; their outstanding access tokens stop validating as well.
+    """
+    result = bulk_crud.revoke_sessions(db, body.user_ids)
+    token_versions.forget(body.user_ids)
+    for user_id in set(body.user_ids):
+        session_cache.revoke_user(user_id)
+    log_event(
+        user_id=current_user.id,
+        event_type="bulk session revoke",
+        details=f"requested={len(body.user_ids)} sessions={result['affected']}",
+    )
+    return {"requested": len(body.user_ids), **result}
+
+
+@router.post("/users/import")
+def import_users(
+    file: UploadFile = File(...),
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    current_user=Depends(role_required(["Admin"])),
+    db: Session = Depends(get_db),
+):
+    """
+    Bulk-create users from a CSV or NDJSON upload (see `app.utils.user_import`).
+    Existing usernames / emails are skipped and malformed rows (including ones
+    that are not UTF-8) counted as invalid; returns counts and throughput.
+    Very large directories are better served by `python -m app.utils.user_import`.
+    """
+    stream = io.TextIOWrapper(file.file, encoding="utf-8", errors="surrogateescape", newline="")
+    # the import commits through the request's session, so it uses the same database (and overrides)
+    stats = user_import.import_users(user_import.read_records(stream, format), db=db)
+    log_event(
+        user_id=current_user.id,
+        event_type="bulk user import",
+        details=f"read={stats.read} created={stats.created} skipped={stats.skipped} invalid={stats.invalid}",
+    )
+    return stats.as_dict()
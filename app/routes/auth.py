@@ -2,50 +2,48 @@ import pyotp
 import base64
 from datetime import timedelta, datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Body, Form
-from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
+from fastapi.security import OAuth2PasswordBearer
 from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal
+from app.database import get_async_db, get_db
 from app.crud import user_crud
 from app.config import settings
 from app.schemas.user import UserCreate, UserOut, RefreshTokenRequest, MFAValidateRequest
-from app.core.dependencies import get_current_user
-from app.core.security import create_session, create_access_token, create_id_token, verify_refresh_token, rotate_refresh_session
+from app.core.dependencies import aget_current_user, get_current_user
+from app.core.session_cache import session_cache
+from app.core.security import (
+    acreate_access_token, acreate_id_token, acreate_session, arotate_refresh_session, averify_refresh_token,
+    verify_refresh_token, access_token_claims,
+    hash_refresh_token, new_jti, session_key,
+)
 from app.models.rbac import UserSession
 from app.models.user import User
 from app.core.utils import verify_code_challenge
 from app.crud.oauth_crud import consume_authorization_code, get_client_by_client_id
 from app.utils.audit import log_event
 from fastapi import Request
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-
-# Limiter instance
-limiter = Limiter(key_func=get_remote_address)
+from app.core.rate_limit import limiter, route_limit
+from app.core.login_throttle import login_throttle
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/token")
-@limiter.limit("5/minute") # requests per minute per IP
-def token_endpoint(
+@limiter.limit(route_limit("auth.token"))  # per IP, counted across all workers
+async def token_endpoint(
     grant_type: str = Form(...),
     code: str | None = Form(None),
     redirect_uri: str | None = Form(None),
     client_id: str | None = Form(None),
     code_verifier: str | None = Form(None),
-    form_data: OAuth2PasswordRequestForm = Depends(),  # password grant
-    db: Session = Depends(get_db),
+    # password grant; plain form fields because OAuth2PasswordRequestForm rejects other grant types
+    username: str | None = Form(None),
+    password: str | None = Form(None),
+    db: AsyncSession = Depends(get_async_db),
     request: Request = None,
 ):
     """
@@ -61,29 +59,34 @@ def token_endpoint(
         if not code or not client_id or not redirect_uri:
             raise HTTPException(400, "Missing required OAuth parameters")
 
-        client = get_client_by_client_id(db, client_id)
-        if not client:
-            raise HTTPException(400, "Invalid client_id")
-        if redirect_uri not in client.redirect_uri_list():
-            raise HTTPException(400, "Invalid redirect_uri")
+        def redeem(sync_db: Session):
+            client = get_client_by_client_id(sync_db, client_id)
+            if not client:
+                raise HTTPException(400, "Invalid client_id")
+            if redirect_uri not in client.redirect_uri_list():
+                raise HTTPException(400, "Invalid redirect_uri")
+
+            auth_code = consume_authorization_code(sync_db, code)
+            if not auth_code:
+                raise HTTPException(400, "Invalid or expired authorization code")
 
-        auth_code = consume_authorization_code(db, code)
-        if not auth_code:
-            raise HTTPException(400, "Invalid or expired authorization code")
+            if auth_code.client_id != client.id or auth_code.redirect_uri != redirect_uri:
+                raise HTTPException(400, "Authorization code mismatch")
 
-        if auth_code.client_id != client.id or auth_code.redirect_uri != redirect_uri:
-            raise HTTPException(400, "Authorization code mismatch")
+            if auth_code.code_challenge:
+                if not code_verifier:
+                    raise HTTPException(400, "Missing code_verifier")
+                if not verify_code_challenge(code_verifier, auth_code.code_challenge, auth_code.code_challenge_method):
+                    raise HTTPException(400, "Invalid code_verifier")
 
-        if auth_code.code_challenge:
-            if not code_verifier:
-                raise HTTPException(400, "Missing code_verifier")
-            if not verify_code_challenge(code_verifier, auth_code.code_challenge, auth_code.code_challenge_method):
-                raise HTTPException(400, "Invalid code_verifier")
+            user = auth_code.user
+            user.roles  # load now; the id token needs them outside this block
+            return client, user
 
-        user = auth_code.user
+        client, user = await db.run_sync(redeem)
 
         # Create session
-        session, refresh_token, access_token = create_session(
+        session, refresh_token, access_token = await acreate_session(
             user,
             db,
             settings.access_token_expire_minutes,
@@ -92,7 +95,7 @@ def token_endpoint(
 
         log_event(user_id=user.id, event_type="authorization_code login", request=request)
 
-        id_token = create_id_token(user, expires_delta=timedelta(minutes=settings.access_token_expire_minutes), aud=client.client_id)
+        id_token = await acreate_id_token(user, expires_delta=timedelta(minutes=settings.access_token_expire_minutes), aud=client.client_id)
 
         return {
             "access_token": access_token,
@@ -106,7 +109,10 @@ def token_endpoint(
     # 2️⃣ Password Grant
     # -------------------------------
     if grant_type == "password":
-        user = user_crud.authenticate_user(db, form_data.username, form_data.password)
+        if not username or not password:
+            raise HTTPException(400, "Missing username or password")
+        # throttled accounts are refused (429) inside, before bcrypt
+        user = await user_crud.aauthenticate_user(db, username, password)
         if not user:
             raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid username or password")
         
@@ -122,12 +128,13 @@ def token_endpoint(
                 )
             totp = pyotp.TOTP(user.mfa_secret)
             if not totp.verify(code, valid_window=1):
+                login_throttle.record_failure(username)
                 raise HTTPException(
                     status.HTTP_401_UNAUTHORIZED,
                     "Invalid MFA code"
                 )
 
-        session, refresh_token, access_token = create_session(
+        session, refresh_token, access_token = await acreate_session(
             user,
             db,
             settings.access_token_expire_minutes,
@@ -135,7 +142,7 @@ def token_endpoint(
         )
         log_event(user_id=user.id, event_type="password_grant login", request=request)
 
-        id_token = create_id_token(user, expires_delta=timedelta(minutes=settings.access_token_expire_minutes))
+        id_token = await acreate_id_token(user, expires_delta=timedelta(minutes=settings.access_token_expire_minutes))
 
         return {
             "access_token": access_token,
@@ -153,33 +160,32 @@ def token_endpoint(
 
 # --- Refresh Token Endpoint ---
 @router.post("/token/refresh")
-def refresh_token(
+async def refresh_token(
     refresh_token: str = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     request: Request = None
 ):
     """
     Rotate the refresh token and issue a new access token + id token.
     """
-    session = verify_refresh_token(refresh_token, db)
+    session = await averify_refresh_token(refresh_token, db)
     if not session:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
     user = session.user
-
-    # rotate - old session revoked & new created
-    new_session, raw_refresh = rotate_refresh_session(db, session, settings.refresh_token_expire_days)
+    previous_key = session.session_key
 
     # create new access token and id token
     access_expires = timedelta(minutes=settings.access_token_expire_minutes)
-    access_token = create_access_token({"sub": user.username, "roles": [r.name for r in user.roles]}, expires_delta=access_expires)
-    id_token = create_id_token(user, expires_delta=access_expires)
+    jti = new_jti()
+    claims = await db.run_sync(lambda sync_db: access_token_claims(user, sync_db, jti))
+    access_token = await acreate_access_token(claims, expires_delta=access_expires)
+    id_token = await acreate_id_token(user, expires_delta=access_expires)
 
-    # link access token optionally to session
-    new_session.session_token = access_token
-    db.add(new_session)
-    db.commit()
-    db.refresh(new_session)
+    # rotate - old refresh token invalidated, new one issued on the same session, which is
+    # re-keyed to the new access token in the same commit; the previous one stops validating
+    raw_refresh = await arotate_refresh_session(session, db, session_key({"jti": jti}, access_token))
+    session_cache.revoke(previous_key)
 
     log_event(user_id=user.id, event_type="refresh_token used", request=request)
 
@@ -193,7 +199,7 @@ def refresh_token(
 
 
 @router.post("/me")
-def protected_endpoint(current_user = Depends(get_current_user)):
+async def protected_endpoint(current_user = Depends(aget_current_user)):
     return current_user
 
 
@@ -211,16 +217,17 @@ def register_user(user_in: UserCreate, db: Session = Depends(get_db)):
 @router.post("/logout")
 def logout(request: RefreshTokenRequest, db: Session = Depends(get_db)):
     refresh_token = request.refresh_token
-    session = db.query(UserSession).filter(UserSession.refresh_token == refresh_token).first()
+    session = db.query(UserSession).filter(UserSession.refresh_token_hash == hash_refresh_token(refresh_token)).first()
     if session:
         session.revoked = True
         session.is_active = False
         db.commit()
+        session_cache.revoke(session.session_key)
     return {"message": "Successfully logged out"}
 
 
 @router.get("/userinfo", response_model=UserOut)
-def userinfo(current_user: UserOut = Depends(get_current_user)):
+async def userinfo(current_user: UserOut = Depends(aget_current_user)):
     """
     Return user claims for the authenticated user.
     Access token must be provided in the Authorization header.
@@ -242,9 +249,8 @@ def revoke_token(
     if refresh_token:
         session = verify_refresh_token(refresh_token, db)
         # If verify_refresh_token returns None, try to find a session by hash to allow revocation of expired/revoked tokens
-        from app.core.security import _hash_refresh_token
-        refresh_hash = _hash_refresh_token(refresh_token)
-        target = db.query(UserSession).filter_by(refresh_token=refresh_hash).first()
+        refresh_hash = hash_refresh_token(refresh_token)
+        target = db.query(UserSession).filter_by(refresh_token_hash=refresh_hash).first()
     else:
         target = db.query(UserSession).filter_by(id=session_id).first()
 
@@ -261,6 +267,7 @@ def revoke_token(
     target.is_active = False
     db.add(target)
     db.commit()
+    session_cache.revoke(target.session_key)
     return {"detail": "Session revoked"}
 
 @router.post("/mfa/setup")
@@ -286,7 +293,7 @@ def mfa_setup(current_user: User = Depends(get_current_user), db: Session = Depe
     return {"provisioning_uri": provisioning_uri}
 
 @router.post("/mfa/verify")
-@limiter.limit("5/minute")
+@limiter.limit(route_limit("auth.mfa_verify"))
 def verify_mfa(request: MFAValidateRequest, current_user=Depends(get_current_user), db: Session = Depends(get_db)):
     if not current_user.mfa_secret:
         return JSONResponse({"detail": "MFA not enabled"}, status_code=400)
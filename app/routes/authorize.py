@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from app.core.dependencies import get_db, get_current_user  # existing
 from app.crud import oauth_crud, user_crud
 from app.core.utils import generate_code_challenge_s256
+from app.core.rate_limit import limiter, route_limit
 from typing import Optional
 
 router = APIRouter()
@@ -75,7 +76,9 @@ def authorize_get(
 
 
 @router.post("/auth/authorize")
+@limiter.limit(route_limit("auth.authorize"))  # per IP; the per-account throttle is in authenticate_user
 def authorize_post(
+    request: Request,
     response_type: str = Form(...),
     client_id: str = Form(...),
     redirect_uri: str = Form(...),
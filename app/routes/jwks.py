@@ -1,15 +1,34 @@
-from fastapi import APIRouter
-from jose import jwk
-from jose.utils import base64url_encode
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.backends import default_backend
-from app.config import settings  # adjust import as needed
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.orm import Session
+from app.core.dependencies import get_db
+from app.core.discovery import discovery_documents, CachedDocument
+from app.core.keyring import key_ring
+from app.core.permission_index import permission_index
 
 router = APIRouter()
 
+
+def _document_response(request: Request, document: CachedDocument) -> Response:
+    headers = {
+        "ETag": document.etag,
+        "Cache-Control": f"public, max-age={document.max_age}",
+    }
+    if document.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=document.body, media_type="application/json", headers=headers)
+
+
 @router.get("/.well-known/jwks.json")
-def get_jwks():
-    with open(settings.public_key_path, "rb") as f:
-        public_key = serialization.load_pem_public_key(f.read())
-    jwk_key = jwk.construct(public_key, algorithm="RS256")
-    return {"keys": [jwk_key.to_dict()]}
+def get_jwks(request: Request):
+    key_ring.reload_if_changed(max_age=1.0)  # rebuilds the document if another worker rotated
+    return _document_response(request, discovery_documents.get("jwks"))
+
+
+@router.get("/.well-known/openid-configuration")
+def get_openid_configuration(request: Request):
+    return _document_response(request, discovery_documents.get("openid-configuration"))
+
+
+@router.get("/.well-known/permission-index.json")
+def get_permission_index(request: Request, db: Session = Depends(get_db)):
+    return _document_response(request, permission_index.document(db))
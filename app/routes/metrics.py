@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Response
+
+from app.core.admission import admission_controller
+from app.core.crypto_executor import crypto_executor
+from app.core.db_pool import pool_stats
+from app.core.metrics import registry
+from app.database import async_engine, engine, replica_router
+from app.utils.audit import audit_writer
+
+router = APIRouter(tags=["metrics"])
+
+_POOL_GAUGES = (
+    ("checked_out", "db_pool_checked_out", "gauge", "Connections currently checked out."),
+    ("overflow", "db_pool_overflow", "gauge", "Connections open beyond pool_size."),
+    ("size", "db_pool_size", "gauge", "Configured pool_size."),
+    ("timeouts", "db_pool_checkout_timeouts_total", "counter", "Checkouts that gave up after pool_timeout."),
+    ("wait_seconds_total", "db_pool_checkout_wait_seconds_total", "counter", "Time spent waiting for a free connection."),
+)
+
+
+def _engines():
+    yield "primary", engine
+    yield "primary_async", async_engine
+    for i, replica in enumerate(replica_router.replicas):
+        yield f"replica{i}", replica.engine
+
+
+def _collect_db_pools():
+    stats = [(name, pool_stats(e)) for name, e in _engines()]
+    for key, name, kind, help in _POOL_GAUGES:
+        yield name, kind, help, [(name, {"engine": engine_name}, s[key]) for engine_name, s in stats if key in s]
+
+
+def _collect_runtime():
+    crypto = crypto_executor.stats()
+    audit = audit_writer.stats()
+    replicas = replica_router.stats()
+    yield "crypto_executor_pending", "gauge", "Crypto operations queued or running.", [
+        ("crypto_executor_pending", {}, crypto["pending"])
+    ]
+    yield "crypto_executor_rejected_total", "counter", "Crypto operations rejected with a full queue.", [
+        ("crypto_executor_rejected_total", {}, crypto["rejected"])
+    ]
+    yield "audit_queue_depth", "gauge", "Audit events waiting to be written.", [
+        ("audit_queue_depth", {}, audit["queue_depth"])
+    ]
+    yield "audit_events_dropped_total", "counter", "Audit events dropped on a full queue.", [
+        ("audit_events_dropped_total", {}, audit["dropped"])
+    ]
+    yield "db_replica_reads_total", "counter", "Tagged reads by where they were served.", [
+        ("db_replica_reads_total", {"target": "replica"}, replicas["replica_reads"]),
+        ("db_replica_reads_total", {"target": "primary"}, replicas["primary_reads"]),
+    ]
+
+
+def _collect_admission():
+    budgets = admission_controller.stats()
+    yield "admission_limit", "gauge", "Current adaptive concurrency limit per budget.", [
+        ("admission_limit", {"budget": name}, b["limit"]) for name, b in budgets.items()
+    ]
+    yield "admission_in_flight", "gauge", "Admitted requests still running per budget.", [
+        ("admission_in_flight", {"budget": name}, b["in_flight"]) for name, b in budgets.items()
+    ]
+
+
+registry.add_collector(_collect_db_pools)
+registry.add_collector(_collect_runtime)
+registry.add_collector(_collect_admission)
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
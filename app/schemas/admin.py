@@ -0,0 +1,15 @@
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class BulkRoleRequest(BaseModel):
+    role: str
+    user_ids: List[int] = Field(..., min_length=1, max_length=100000)
+
+class BulkSessionRevokeRequest(BaseModel):
+    user_ids: List[int] = Field(..., min_length=1, max_length=100000)
+
+class BulkResult(BaseModel):
+    requested: int
+    affected: int
+    chunks: int
@@ -1,22 +1,157 @@
 # app/utils/audit.py
+"""
+Audit logging.
+
+`log_event()` is called on hot paths (every login and refresh), so it only
+enqueues a row. A background `AuditWriter` drains the queue and writes
+multi-row INSERTs every `audit_batch_size` events or `audit_flush_interval_ms`,
+whichever comes first. The writer is started/stopped by the FastAPI lifespan;
+when it is not running (scripts, tests) events are written synchronously.
+"""
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+from fastapi import Request
+from sqlalchemy import insert
+
+from app.config import settings
+from app.core.metrics import timed
 from app.database import SessionLocal
 from app.models.audit import AuditLog
-from fastapi import Request
 
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        batch_size: int = 100,
+        flush_interval_ms: int = 250,
+        max_queue: int = 10000,
+        overflow_policy: str = "drop",
+        block_timeout_ms: int = 100,
+    ):
+        if overflow_policy not in ("drop", "block"):
+            raise ValueError(f"Unsupported audit overflow policy: {overflow_policy}")
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout_ms / 1000
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the flusher after writing everything still queued."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+        self._thread = None
+
+    def submit(self, row: dict) -> bool:
+        if not self.running:
+            self._write([row])
+            return True
+        try:
+            if self.overflow_policy == "block":
+                self._queue.put(row, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.queued += 1
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self.running,
+                "overflow_policy": self.overflow_policy,
+                "queue_depth": self._queue.qsize(),
+                "queued": self.queued,
+                "flushed": self.flushed,
+                "dropped": self.dropped,
+                "failed": self.failed,
+            }
+
+    # --- flusher thread ---
+    def _run(self):
+        batch: list[dict] = []
+        deadline = time.monotonic() + self.flush_interval
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0.001)))
+            except queue.Empty:
+                pass
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                if batch:
+                    self._write(batch)
+                    batch = []
+                deadline = time.monotonic() + self.flush_interval
+        if batch:
+            self._write(batch)
+
+    def _write(self, rows: list[dict]):
+        db = self.session_factory()
+        try:
+            db.execute(insert(AuditLog), rows)
+            db.commit()
+            with self._lock:
+                self.flushed += len(rows)
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self.failed += len(rows)
+            logger.exception("Failed to write %d audit events", len(rows))
+        finally:
+            db.close()
+
+
+audit_writer = AuditWriter(
+    batch_size=settings.audit_batch_size,
+    flush_interval_ms=settings.audit_flush_interval_ms,
+    max_queue=settings.audit_queue_size,
+    overflow_policy=settings.audit_overflow_policy,
+    block_timeout_ms=settings.audit_block_timeout_ms,
+)
+
+
+@timed("log_event")
 def log_event(user_id: int | None, event_type: str, request: Request = None, details: str | None = None):
-    db = SessionLocal()
-    try:
-        ip_address = request.client.host if request else None
-        user_agent = request.headers.get("user-agent") if request else None
-
-        audit = AuditLog(
-            user_id=user_id,
-            event_type=event_type,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            details=details
-        )
-        db.add(audit)
-        db.commit()
-    finally:
-        db.close()
+    ip_address = request.client.host if request and request.client else None
+    user_agent = request.headers.get("user-agent") if request else None
+
+    audit_writer.submit({
+        "user_id": user_id,
+        "action": event_type,
+        "ip_address": ip_address,
+        "user_agent": user_agent[:255] if user_agent else None,
+        "details": details,
+        "created_at": datetime.utcnow(),
+    })
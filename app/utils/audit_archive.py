@@ -0,0 +1,368 @@
+# app/utils/audit_archive.py
+"""
+Rolling archival of old audit logs into compressed segment files.
+
+`audit_logs` is split into fixed UTC time buckets (`audit_archive_bucket_hours`,
+one day by default). Once a bucket is older than `audit_retention_days` its rows
+are appended to that bucket's segment and deleted from the table, keeping the
+hot table small.
+
+Each bucket has two files in `audit_archive_dir`:
+
+    audit-20260101T00.ndjson.gz   append-only; one gzip member per block of
+                                  `audit_archive_block_rows` NDJSON records
+                                  (the whole file also reads with `zcat`)
+    audit-20260101T00.idx.json    offset, length, row count, created_at / id
+                                  range and distinct user_ids / actions of
+                                  every block
+
+Rows are written oldest first, so each archival pass (a "run") is one sorted
+sequence of blocks. Queries only decompress the blocks whose time range
+overlaps and whose user_ids / actions can match the filters, and merge runs
+lazily, so reads stay proportional to the rows asked for.
+
+Every worker process runs the background archiver, so a pass holds an
+exclusive `flock` on `.archive.lock` in the archive directory; a worker that
+finds it taken skips its pass instead of appending to the same segments.
+
+    python -m app.utils.audit_archive            # archive everything past retention now
+"""
+import gzip
+import heapq
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import groupby
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.audit import AuditLog
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, run a single worker
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+RECORD_FIELDS = ("id", "created_at", "user_id", "action", "ip_address", "user_agent", "details")
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_record(log: AuditLog) -> dict:
+    return {
+        "id": log.id,
+        "created_at": log.created_at.isoformat() if log.created_at else None,
+        "user_id": log.user_id,
+        "action": log.action,
+        "ip_address": log.ip_address,
+        "user_agent": log.user_agent,
+        "details": log.details,
+    }
+
+
+def from_record(record: dict) -> AuditLog:
+    # transient instance; never attached to a session
+    return AuditLog(**{**record, "created_at": datetime.fromisoformat(record["created_at"])})
+
+
+def sort_key(log: AuditLog) -> tuple:
+    # created_at is nullable; NULL sorts first, as it does in SQLite
+    return log.created_at or datetime.min, log.id
+
+
+class Segment:
+    """One bucket's archive file and its parsed block index."""
+
+    __slots__ = ("data_path", "bucket_start", "bucket_end", "blocks")
+
+    def __init__(self, data_path: Path, index: dict):
+        self.data_path = data_path
+        self.bucket_start = datetime.fromisoformat(index["bucket_start"])
+        self.bucket_end = datetime.fromisoformat(index["bucket_end"])
+        self.blocks = [
+            {
+                **block,
+                "min_created_at": datetime.fromisoformat(block["min_created_at"]),
+                "max_created_at": datetime.fromisoformat(block["max_created_at"]),
+                # indexes written before these were recorded may match anything
+                "user_ids": frozenset(block["user_ids"]) if "user_ids" in block else None,
+                "actions": frozenset(block["actions"]) if "actions" in block else None,
+            }
+            for block in index["blocks"]
+        ]
+
+    def read_block(self, block: dict) -> List[dict]:
+        with open(self.data_path, "rb") as f:
+            f.seek(block["offset"])
+            data = gzip.decompress(f.read(block["length"]))
+        return [json.loads(line) for line in data.splitlines()]
+
+
+class AuditArchive:
+    def __init__(
+        self,
+        directory: str = "audit_archive",
+        bucket_hours: int = 24,
+        block_rows: int = 1000,
+        retention_days: int = 30,
+        interval_seconds: int = 3600,
+        session_factory=SessionLocal,
+    ):
+        self.directory = Path(directory)
+        self.bucket = timedelta(hours=bucket_hours)
+        self.block_rows = block_rows
+        self.retention = timedelta(days=retention_days)
+        self.interval = interval_seconds
+        self.session_factory = session_factory
+        self._index_cache: dict = {}
+        self._archive_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # --- layout ---
+    def bucket_start(self, ts: datetime) -> datetime:
+        return _EPOCH + ((ts - _EPOCH) // self.bucket) * self.bucket
+
+    def _paths(self, bucket_start: datetime) -> tuple[Path, Path]:
+        stem = "audit-" + bucket_start.strftime("%Y%m%dT%H")
+        return self.directory / f"{stem}.ndjson.gz", self.directory / f"{stem}.idx.json"
+
+    def _load_index(self, index_path: Path) -> Optional[Segment]:
+        try:
+            mtime = index_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        cached = self._index_cache.get(index_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        segment = Segment(
+            index_path.with_name(index_path.name.replace(".idx.json", ".ndjson.gz")),
+            json.loads(index_path.read_text()),
+        )
+        self._index_cache[index_path] = (mtime, segment)
+        return segment
+
+    def segments(self) -> List[Segment]:
+        if not self.directory.is_dir():
+            return []
+        segments = (self._load_index(path) for path in sorted(self.directory.glob("audit-*.idx.json")))
+        return [segment for segment in segments if segment is not None]
+
+    # --- archival ---
+    @contextmanager
+    def _process_lock(self, wait: bool):
+        """Exclusive lock shared by every process archiving into `directory`; yields False if taken."""
+        if fcntl is None:
+            yield True
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".archive.lock", "a+b") as f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if wait else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def archive(self, now: Optional[datetime] = None, wait: bool = False) -> dict:
+        """
+        Move every bucket that ended before the retention cutoff into its segment.
+        If another process is archiving, returns without doing anything unless `wait`.
+        """
+        cutoff = self.bucket_start((now or datetime.utcnow()) - self.retention)
+        archived = {"buckets": 0, "rows": 0}
+        with self._archive_lock, self._process_lock(wait) as acquired:
+            if not acquired:
+                logger.info("Another process is archiving audit logs into %s; skipping", self.directory)
+                return archived
+            db = self.session_factory()
+            try:
+                while True:
+                    oldest = (
+                        db.query(AuditLog.created_at)
+                        .filter(AuditLog.created_at < cutoff)
+                        .order_by(AuditLog.created_at.asc())
+                        .limit(1)
+                        .scalar()
+                    )
+                    if oldest is None:
+                        break
+                    archived["rows"] += self._archive_bucket(db, self.bucket_start(oldest))
+                    archived["buckets"] += 1
+            finally:
+                db.close()
+        return archived
+
+    def _archive_bucket(self, db, start: datetime) -> int:
+        end = start + self.bucket
+        data_path, index_path = self._paths(start)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        in_bucket = db.query(AuditLog).filter(AuditLog.created_at >= start, AuditLog.created_at < end)
+
+        index = (
+            json.loads(index_path.read_text())
+            if index_path.exists()
+            else {"bucket_start": start.isoformat(), "bucket_end": end.isoformat(), "blocks": []}
+        )
+        run = max((block["run"] for block in index["blocks"]), default=-1) + 1
+        rows = in_bucket.order_by(AuditLog.created_at.asc(), AuditLog.id.asc()).yield_per(self.block_rows)
+        archived_ids: List[int] = []
+        with open(data_path, "ab") as f:
+            pending: List[dict] = []
+            for log in rows:
+                pending.append(to_record(log))
+                if len(pending) >= self.block_rows:
+                    index["blocks"].append(self._write_block(f, pending, run))
+                    archived_ids.extend(r["id"] for r in pending)
+                    pending = []
+            if pending:
+                index["blocks"].append(self._write_block(f, pending, run))
+                archived_ids.extend(r["id"] for r in pending)
+            f.flush()
+            os.fsync(f.fileno())
+        if not archived_ids:
+            return 0
+
+        # publish the index before deleting: a crash in between leaves rows in
+        # both places (re-archived as a new run, deduplicated on read), never in neither
+        tmp_path = index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(index, separators=(",", ":")))
+        os.replace(tmp_path, index_path)
+
+        for i in range(0, len(archived_ids), 500):
+            db.query(AuditLog).filter(AuditLog.id.in_(archived_ids[i:i + 500])).delete(synchronize_session=False)
+        db.commit()
+        logger.info("Archived %d audit logs from %s to %s", len(archived_ids), start.isoformat(), data_path)
+        return len(archived_ids)
+
+    @staticmethod
+    def _write_block(f, records: List[dict], run: int) -> dict:
+        data = gzip.compress(
+            b"".join(json.dumps(r, separators=(",", ":")).encode("utf-8") + b"\n" for r in records)
+        )
+        offset = f.tell()
+        f.write(data)
+        ids = [r["id"] for r in records]
+        return {
+            "offset": offset,
+            "length": len(data),
+            "rows": len(records),
+            "run": run,
+            "min_created_at": records[0]["created_at"],
+            "max_created_at": records[-1]["created_at"],
+            "min_id": min(ids),
+            "max_id": max(ids),
+            "user_ids": sorted({r["user_id"] for r in records if r["user_id"] is not None}),
+            "actions": sorted({r["action"] for r in records}),
+        }
+
+    # --- queries ---
+    def iter_logs(
+        self,
+        user_id: int | None = None,
+        action: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        before: tuple[datetime, int] | None = None,
+        descending: bool = False,
+    ) -> Iterator[AuditLog]:
+        """
+        Archived logs matching the filters, ordered by (created_at, id).
+        `before` is a keyset bound: only rows strictly before it are returned.
+        """
+        upper = until
+        if before is not None and (upper is None or before[0] < upper):
+            upper = before[0] + timedelta.resolution
+
+        def overlaps(lo: datetime, hi: datetime) -> bool:
+            # [lo, hi] against [since, upper)
+            return (since is None or hi >= since) and (upper is None or lo < upper)
+
+        def may_match(block: dict) -> bool:
+            # skip blocks without the user / action before decompressing them
+            return (
+                overlaps(block["min_created_at"], block["max_created_at"])
+                and (user_id is None or block["user_ids"] is None or user_id in block["user_ids"])
+                and (action is None or block["actions"] is None or action in block["actions"])
+            )
+
+        def matches(log: AuditLog) -> bool:
+            return (
+                (user_id is None or log.user_id == user_id)
+                and (action is None or log.action == action)
+                and (since is None or log.created_at >= since)
+                and (until is None or log.created_at < until)
+                and (before is None or sort_key(log) < before)
+            )
+
+        def read_run(segment: Segment, blocks: List[dict]) -> Iterator[AuditLog]:
+            for block in reversed(blocks) if descending else blocks:
+                records = segment.read_block(block)
+                for record in reversed(records) if descending else records:
+                    log = from_record(record)
+                    if matches(log):
+                        yield log
+
+        segments = [s for s in self.segments() if overlaps(s.bucket_start, s.bucket_end - timedelta.resolution)]
+        for segment in reversed(segments) if descending else segments:
+            runs = [
+                [block for block in blocks if may_match(block)]
+                for _, blocks in groupby(segment.blocks, key=lambda block: block["run"])
+            ]
+            yield from heapq.merge(
+                *(read_run(segment, blocks) for blocks in runs if blocks), key=sort_key, reverse=descending
+            )
+
+    # --- background archiver ---
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="audit-archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0):
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.archive()
+            except Exception:
+                logger.exception("Audit log archival failed")
+
+
+audit_archive = AuditArchive(
+    directory=settings.audit_archive_dir,
+    bucket_hours=settings.audit_archive_bucket_hours,
+    block_rows=settings.audit_archive_block_rows,
+    retention_days=settings.audit_retention_days,
+    interval_seconds=settings.audit_archive_interval_seconds,
+)
+
+
+def main():
+    result = audit_archive.archive(wait=True)
+    print(f"Archived {result['rows']} audit logs from {result['buckets']} bucket(s) into {audit_archive.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# app/utils/audit_export.py
+"""
+Streaming export of audit logs as NDJSON or CSV, optionally gzip-compressed.
+
+Rows come from `audit_crud.iter_audit_logs()` and are encoded into chunks of
+roughly `CHUNK_SIZE` bytes, so neither the API response nor the CLI ever holds
+more than one fetch batch in memory.
+
+    python -m app.utils.audit_export --since 2026-01-01 --until 2026-02-01 --format csv --gzip -o jan.csv.gz
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from app.config import settings
+from app.crud import audit_crud
+from app.database import SessionLocal
+from app.models.audit import AuditLog
+from app.utils.audit_archive import RECORD_FIELDS, to_record
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+CHUNK_SIZE = 64 * 1024
+
+
+def _ndjson_lines(logs: Iterable[AuditLog]) -> Iterator[str]:
+    for log in logs:
+        yield json.dumps(to_record(log), separators=(",", ":")) + "\n"
+
+
+def _csv_lines(logs: Iterable[AuditLog]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=RECORD_FIELDS)
+    writer.writeheader()
+    for log in logs:
+        writer.writerow(to_record(log))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # with no rows the header has not been flushed yet
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def encode_audit_logs(logs: Iterable[AuditLog], fmt: str = "ndjson", gzip: bool = False) -> Iterator[bytes]:
+    """Encode audit logs to `fmt` and yield byte chunks of about CHUNK_SIZE."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    lines = _ndjson_lines(logs) if fmt == "ndjson" else _csv_lines(logs)
+    # wbits=31 writes a gzip container rather than a raw zlib stream
+    compressor = zlib.compressobj(wbits=31) if gzip else None
+
+    pending, size = [], 0
+    for line in lines:
+        data = line.encode("utf-8")
+        pending.append(data)
+        size += len(data)
+        if size >= CHUNK_SIZE:
+            chunk = b"".join(pending)
+            pending, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+    chunk = b"".join(pending)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def export_filename(fmt: str, gzip: bool = False) -> str:
+    return f"audit-logs.{fmt}" + (".gz" if gzip else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", dest="fmt", choices=list(FORMATS), default="ndjson")
+    parser.add_argument("--gzip", action="store_true", help="gzip-compress the output")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="created_at >= SINCE")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="created_at < UNTIL")
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--action")
+    parser.add_argument("-o", "--output", help="file to write (default: stdout)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        logs = audit_crud.iter_audit_logs(
+            db,
+            batch_size=settings.audit_export_batch_size,
+            user_id=args.user_id,
+            action=args.action,
+            since=args.since,
+            until=args.until,
+        )
+        for chunk in encode_audit_logs(logs, args.fmt, args.gzip):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
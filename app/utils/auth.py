@@ -1,21 +1,19 @@
 from typing import List
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from datetime import datetime
 
 from app.models.rbac import UserSession
-from app.database import SessionLocal
+from app.core.security import decode_access_token, session_key
+from app.core.session_cache import session_cache
+from app.core.rbac import rbac_resolver
+from app.core.token_versions import token_versions
+from app.schemas.user import UserOut
+from app.database import get_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 def role_required(required_roles: List[str]):
     """
     Dependency for FastAPI endpoints to enforce role-based access.
@@ -25,31 +23,66 @@ def role_required(required_roles: List[str]):
             ...
     """
     def dependency(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-        # Fetch session by token
-        session = db.query(UserSession).filter_by(session_token=token, is_active=True).first()
-        if not session or session.revoked:
+        payload = decode_access_token(token)
+        if not payload:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Invalid or revoked session"
             )
 
-        # Check if session has expired
-        if session.expires_at and session.expires_at < datetime.utcnow():
+        key = session_key(payload, token)
+        if session_cache.is_revoked(key):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail="Session expired"
+                detail="Invalid or revoked session"
+            )
+
+        cached = session_cache.get(key)
+        if cached and not cached.is_expired():
+            user = cached.user
+            if not token_versions.is_current(db, user.id, payload.get("tv", 0)):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Invalid or revoked session"
+                )
+        else:
+            # Fetch session by its compact key
+            # the user comes back in the same round trip instead of a lazy load below
+            # always on the primary: a lagging replica could still show a revoked session,
+            # and what is read here is cached
+            session = (
+                db.query(UserSession).options(joinedload(UserSession.user)).filter_by(session_key=key, is_active=True).first()
             )
+            if not session or session.revoked:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Invalid or revoked session"
+                )
+
+            # Check if session has expired
+            if session.expires_at and session.expires_at < datetime.utcnow():
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Session expired"
+                )
+
+            token_versions.set(session.user_id, session.user.token_version)
+            if not token_versions.is_current(db, session.user_id, payload.get("tv", 0)):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Invalid or revoked session"
+                )
 
-        user_roles = {role.name.lower() for role in session.user.roles}
-        required_roles_set = {r.lower() for r in required_roles}
+            user = UserOut.from_orm(session.user)
+            session_cache.put(key, user, user.id, rbac_resolver.resolve(db, user.id).roles, session.expires_at)
 
-        # Check role intersection
-        if not user_roles.intersection(required_roles_set):
+        # Compiled role set; re-resolved only after an RBAC change
+        if not rbac_resolver.resolve(db, user.id).has_any_role(required_roles):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Access denied. Required roles: {required_roles}"
             )
 
-        return session.user  # Return user object for endpoint usage
+        return user  # Return user object for endpoint usage
 
     return dependency
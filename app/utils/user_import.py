@@ -0,0 +1,226 @@
+# app/utils/user_import.py
+"""
+Streaming bulk user import.
+
+Input is CSV (with a header row) or NDJSON, one user per record:
+
+    username, email, and either password (plaintext) or password_hash
+    (an existing bcrypt / argon2 hash, stored as-is); full_name and
+    phone_number are optional
+
+Records are read lazily and handled `user_import_batch_size` at a time.
+Plaintext passwords of a batch are hashed on a process pool while the previous
+batch is inserted, and every batch goes in as one multi-row
+`INSERT ... ON CONFLICT DO NOTHING`, so rows whose username or email already
+exists are skipped rather than aborting the import.
+
+    python -m app.utils.user_import legacy_users.csv
+    python -m app.utils.user_import users.ndjson --format ndjson --workers 8 --batch-size 10000
+"""
+import argparse
+import csv
+import io
+import json
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.security import _hash_password
+from app.database import SessionLocal
+from app.models.user import User
+
+FORMATS = ("csv", "ndjson")
+# pre-hashed passwords stored as-is; both schemes are in pwd_context, so they verify on login
+ACCEPTED_HASHES = (
+    re.compile(r"^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$"),
+    re.compile(r"^\$argon2(id|i|d)\$v=\d+\$m=\d+,t=\d+,p=\d+\$[A-Za-z0-9+/]+\$[A-Za-z0-9+/]+$"),
+)
+_OPTIONAL_FIELDS = ("full_name", "phone_number")
+_FIELDS = ("username", "email", "password", "password_hash") + _OPTIONAL_FIELDS
+_DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class ImportStats:
+    __slots__ = ("read", "created", "skipped", "invalid", "started")
+
+    def __init__(self):
+        self.read = 0
+        self.created = 0
+        self.skipped = 0  # username or email already taken
+        self.invalid = 0
+        self.started = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.read / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "read": self.read,
+            "created": self.created,
+            "skipped": self.skipped,
+            "invalid": self.invalid,
+            "elapsed_seconds": round(time.monotonic() - self.started, 3),
+            "rows_per_second": round(self.rate, 1),
+        }
+
+
+def read_records(stream: TextIO, fmt: str = "csv") -> Iterator[dict]:
+    """
+    Records from `stream`, unvalidated. Open it with errors="surrogateescape" so
+    bytes that are not UTF-8 make their row invalid instead of aborting the read.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield {}  # counted as invalid
+
+
+def _is_text(value) -> bool:
+    if not isinstance(value, str):
+        return False
+    try:
+        value.encode("utf-8")  # fails on the surrogates undecodable input was escaped to
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _normalize(record) -> Optional[dict]:
+    """Row for the users table (password still plaintext under "password"), or None if unusable."""
+    if not isinstance(record, dict):
+        return None  # e.g. an NDJSON line holding an array
+    fields = {field: record.get(field) for field in _FIELDS}
+    if any(value is not None and not _is_text(value) for value in fields.values()):
+        return None
+    username = (fields["username"] or "").strip()
+    email = (fields["email"] or "").strip()
+    password, password_hash = fields["password"], fields["password_hash"]
+    if not username or not email or not (password or password_hash):
+        return None
+    if password_hash and not any(pattern.match(password_hash) for pattern in ACCEPTED_HASHES):
+        return None
+    row = {"username": username, "email": email}
+    row.update({field: fields[field] for field in _OPTIONAL_FIELDS if fields[field]})
+    if password_hash:
+        row["password_hash"] = password_hash
+    else:
+        row["password"] = password
+    return row
+
+
+def _insert_batch(db: Session, rows: List[dict], hashes: Iterable[str], stats: ImportStats):
+    hashes = iter(hashes)
+    for row in rows:
+        if "password" in row:
+            row["password_hash"] = next(hashes)
+            del row["password"]
+        row.setdefault("full_name", None)
+        row.setdefault("phone_number", None)
+    insert = _DIALECT_INSERTS[db.get_bind().dialect.name]
+    result = db.execute(insert(User).values(rows).on_conflict_do_nothing())
+    db.commit()
+    stats.created += result.rowcount
+    stats.skipped += len(rows) - result.rowcount
+
+
+def _batches(records: Iterable, batch_size: int, stats: ImportStats) -> Iterator[List[dict]]:
+    batch: List[dict] = []
+    for record in records:
+        stats.read += 1
+        row = _normalize(record)
+        if row is None:
+            stats.invalid += 1
+            continue
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_users(
+    records: Iterable[dict],
+    session_factory=SessionLocal,
+    batch_size: int | None = None,
+    workers: int | None = None,
+    progress: Callable[[ImportStats], None] | None = None,
+    db: Session | None = None,
+) -> ImportStats:
+    """
+    Import `records`; every batch is committed through one session. Pass `db`
+    to use an existing session (e.g. the request's), which is left open;
+    otherwise one is opened from `session_factory` and closed at the end.
+    """
+    stats = ImportStats()
+    owns_session = db is None
+    if owns_session:
+        db = session_factory()
+    pool = ProcessPoolExecutor(max_workers=workers or settings.user_import_workers)
+    try:
+        pending = None
+        for batch in _batches(records, batch_size or settings.user_import_batch_size, stats):
+            # start hashing this batch, then insert the previous one while the pool works
+            passwords = [row["password"] for row in batch if "password" in row]
+            hashing = (batch, pool.map(_hash_password, passwords, chunksize=max(1, len(passwords) // 64)))
+            if pending is not None:
+                _insert_batch(db, *pending, stats)
+                if progress:
+                    progress(stats)
+            pending = hashing
+        if pending is not None:
+            _insert_batch(db, *pending, stats)
+            if progress:
+                progress(stats)
+    finally:
+        pool.shutdown(cancel_futures=True)
+        if owns_session:
+            db.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="input file, or - for stdin")
+    parser.add_argument("--format", dest="fmt", choices=FORMATS, default="csv")
+    parser.add_argument("--batch-size", type=int, default=settings.user_import_batch_size)
+    parser.add_argument("--workers", type=int, default=settings.user_import_workers)
+    args = parser.parse_args()
+
+    def report(stats: ImportStats):
+        print(
+            f"read {stats.read:,}  created {stats.created:,}  skipped {stats.skipped:,}  "
+            f"invalid {stats.invalid:,}  {stats.rate:,.0f} rows/s",
+            file=sys.stderr,
+        )
+
+    stream = (
+        io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="surrogateescape")
+        if args.path == "-"
+        else open(args.path, encoding="utf-8", errors="surrogateescape", newline="")
+    )
+    with stream:
+        stats = import_users(
+            read_records(stream, args.fmt), batch_size=args.batch_size, workers=args.workers, progress=report
+        )
+    print(json.dumps(stats.as_dict()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/jwt_backends.py
+"""
+Micro-benchmark: sign / verify throughput per JWT backend and algorithm.
+
+    python -m benchmarks.jwt_backends
+    python -m benchmarks.jwt_backends --iterations 5000 --algorithms RS256 EdDSA --json results.json
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from app.core.jwt_backends import BACKENDS, generate_private_key, get_backend
+
+DEFAULT_ALGORITHMS = ["HS256", "RS256", "ES256", "EdDSA"]
+
+
+def _claims() -> dict:
+    now = datetime.utcnow()
+    return {
+        "sub": "benchmark-user",
+        "roles": ["User"],
+        "jti": "bXnQ4Yb3y0o1rC2mJq9Z8w",
+        "iat": now,
+        "exp": now + timedelta(minutes=30),
+    }
+
+
+def _keys(algorithm: str):
+    if algorithm.startswith("HS"):
+        return "benchmark-secret", "benchmark-secret"
+    private_key = generate_private_key(algorithm)
+    return private_key, private_key.public_key()
+
+
+def _ops_per_second(fn, iterations: int) -> float:
+    fn()  # warm up key preparation caches
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - started)
+
+
+def run(backends, algorithms, iterations: int) -> list:
+    results = []
+    keys = {algorithm: _keys(algorithm) for algorithm in algorithms}
+    for name in backends:
+        backend = get_backend(name)
+        for algorithm in algorithms:
+            if not backend.supports(algorithm):
+                results.append({"backend": name, "algorithm": algorithm, "sign_ops": None, "verify_ops": None})
+                continue
+            signing_key, verifying_key = keys[algorithm]
+            claims = _claims()
+            token = backend.encode(claims, signing_key, algorithm, {"kid": "bench"})
+            results.append({
+                "backend": name,
+                "algorithm": algorithm,
+                "sign_ops": round(_ops_per_second(lambda: backend.encode(claims, signing_key, algorithm, {"kid": "bench"}), iterations), 1),
+                "verify_ops": round(_ops_per_second(lambda: backend.decode(token, verifying_key, [algorithm]), iterations), 1),
+            })
+    return results
+
+
+def _print_table(results: list):
+    print(f"{'backend':<14}{'algorithm':<10}{'sign ops/s':>14}{'verify ops/s':>16}")
+    for row in results:
+        sign = f"{row['sign_ops']:,.0f}" if row["sign_ops"] else "unsupported"
+        verify = f"{row['verify_ops']:,.0f}" if row["verify_ops"] else "unsupported"
+        print(f"{row['backend']:<14}{row['algorithm']:<10}{sign:>14}{verify:>16}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--algorithms", nargs="+", default=DEFAULT_ALGORITHMS)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--json", dest="json_path", help="also write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.backends, args.algorithms, args.iterations)
+    _print_table(results)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
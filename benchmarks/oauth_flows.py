@@ -0,0 +1,290 @@
+# benchmarks/oauth_flows.py
+"""
+Load test: throughput and tail latency of the OAuth flows, end to end.
+
+Boots the app in process (lifespan included) on a fresh SQLite file, seeds
+one user per worker, an Admin and a public PKCE client, then drives each
+flow through httpx's ASGITransport at the given concurrency:
+
+    password      POST /auth/token (grant_type=password)
+    auth_code     POST /auth/authorize -> POST /auth/token (authorization_code + PKCE)
+    refresh       POST /auth/token/refresh (rotation)
+    userinfo      GET /auth/userinfo
+    admin_users   GET /admin/users
+
+One iteration of a flow counts as one request in req/s (auth_code is two
+HTTP calls). Per-IP rate limits and the per-account login throttle are
+lifted for the run. Admission control stays on unless --no-admission is
+given; requests it sheds (503) are reported separately from errors, and the
+worker waits out their Retry-After before its next iteration.
+
+    python -m benchmarks.oauth_flows
+    python -m benchmarks.oauth_flows --concurrency 16 --requests 400 --flows password userinfo
+    python -m benchmarks.oauth_flows --save-baseline benchmarks/oauth_baseline.json
+    python -m benchmarks.oauth_flows --baseline benchmarks/oauth_baseline.json --tolerance 0.2
+
+With --baseline the exit status is 1 if any flow's req/s fell, or p95 rose,
+by more than --tolerance, and 2 (nothing compared) if the baseline was
+recorded with a different --concurrency, --requests or admission setting.
+Compare runs made on the same machine only.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+FLOWS = ["password", "auth_code", "refresh", "userinfo", "admin_users"]
+PASSWORD = "BenchP@ss1"
+REDIRECT_URI = "http://127.0.0.1:3000/callback"
+CLIENT_ID = "bench-spa"
+
+
+def _configure(database: Path, admission: bool):
+    # settings are read at import time, so the app must only be imported after this
+    url = f"sqlite:///{database}"
+    os.environ.update({
+        "DATABASE_URL": url,
+        "SQLALCHEMY_URL": url,
+        "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{database}",
+        "DATABASE_REPLICA_URLS": "[]",
+        "RATE_LIMIT_STORAGE_URI": "memory://",
+        "RATE_LIMITS": json.dumps({name: "1000000/minute" for name in ("auth.token", "auth.authorize", "auth.mfa_verify")}),
+        "LOGIN_THROTTLE_THRESHOLD": "0",
+        "ADMISSION_ENABLED": "true" if admission else "false",
+    })
+
+
+def _seed(workers: int):
+    import app.main  # noqa: F401  imports every model before the mappers configure
+    from app.core.security import hash_password
+    from app.database import Base, SessionLocal, engine
+    from app.models.oauth import OAuthClient
+    from app.models.rbac import Role
+    from app.models.user import User
+
+    Base.metadata.create_all(bind=engine)
+    password_hash = hash_password(PASSWORD)  # one bcrypt for everyone keeps seeding fast
+    with SessionLocal() as db:
+        admin = User(username="bench-admin", email="bench-admin@example.com", password_hash=password_hash)
+        admin.roles.append(Role(name="Admin", description="Administrator"))
+        db.add(admin)
+        db.add_all(
+            User(username=f"bench{i}", email=f"bench{i}@example.com", password_hash=password_hash)
+            for i in range(workers)
+        )
+        db.add(OAuthClient(client_id=CLIENT_ID, client_name="Benchmark SPA", redirect_uris=REDIRECT_URI))
+        db.commit()
+
+
+class Worker:
+    """One simulated client: its own user, tokens and refresh token."""
+
+    def __init__(self, http, username: str):
+        self.http = http
+        self.username = username
+        self.access_token = None
+        self.refresh_token = None
+
+    def _headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.access_token}"}
+
+    async def login(self):
+        resp = await self.http.post("/auth/token", data={
+            "grant_type": "password", "username": self.username, "password": PASSWORD,
+        })
+        resp.raise_for_status()
+        body = resp.json()
+        self.access_token, self.refresh_token = body["access_token"], body["refresh_token"]
+
+    async def password(self):
+        await self.login()
+
+    async def auth_code(self):
+        from app.core.utils import generate_code_challenge_s256, generate_code_verifier
+
+        verifier = generate_code_verifier()
+        resp = await self.http.post("/auth/authorize", data={
+            "response_type": "code",
+            "client_id": CLIENT_ID,
+            "redirect_uri": REDIRECT_URI,
+            "username": self.username,
+            "password": PASSWORD,
+            "code_challenge": generate_code_challenge_s256(verifier),
+            "code_challenge_method": "S256",
+        })
+        if resp.status_code != 307:
+            resp.raise_for_status()
+            raise RuntimeError(f"/auth/authorize returned {resp.status_code}")
+        code = parse_qs(urlparse(resp.headers["location"]).query)["code"][0]
+        resp = await self.http.post("/auth/token", data={
+            "grant_type": "authorization_code",
+            "code": code,
+            "client_id": CLIENT_ID,
+            "redirect_uri": REDIRECT_URI,
+            "code_verifier": verifier,
+        })
+        resp.raise_for_status()
+
+    async def refresh(self):
+        resp = await self.http.post("/auth/token/refresh", data={"refresh_token": self.refresh_token})
+        resp.raise_for_status()
+        body = resp.json()
+        self.access_token, self.refresh_token = body["access_token"], body["refresh_token"]
+
+    async def userinfo(self):
+        (await self.http.get("/auth/userinfo", headers=self._headers())).raise_for_status()
+
+    async def admin_users(self):
+        (await self.http.get("/admin/users", params={"limit": 50}, headers=self._headers())).raise_for_status()
+
+
+def _percentile(ordered: list, q: float) -> float:
+    # nearest rank
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+async def _run_flow(workers: list, flow: str, requests: int, warmup: int) -> dict:
+    import httpx
+
+    for worker in workers[:warmup]:
+        await getattr(worker, flow)()
+
+    remaining = requests
+    latencies, errors, shed = [], 0, 0
+
+    async def drive(worker):
+        nonlocal remaining, errors, shed
+        step = getattr(worker, flow)
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                await step()
+            except httpx.HTTPStatusError as exc:
+                if exc.response.status_code == 503:
+                    shed += 1
+                    # back off as asked, like a real client, instead of spinning through the iteration budget
+                    await asyncio.sleep(float(exc.response.headers.get("retry-after", 1)))
+                else:
+                    errors += 1
+                continue
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(drive(worker) for worker in workers))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    row = {"flow": flow, "requests": requests, "errors": errors, "shed": shed, "rps": round(len(latencies) / elapsed, 1)}
+    for name, q in (("p50_ms", 0.50), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+        row[name] = round(_percentile(latencies, q) * 1000, 2) if latencies else None
+    return row
+
+
+async def run(flows: list, concurrency: int, requests: int, warmup: int) -> list:
+    import httpx
+    from app.main import app
+
+    results = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            workers = [Worker(http, f"bench{i}") for i in range(concurrency)]
+            for worker in workers:
+                await worker.login()
+            admins = [Worker(http, "bench-admin") for _ in range(concurrency)]
+            for admin in admins:
+                await admin.login()
+            for flow in flows:
+                results.append(await _run_flow(admins if flow == "admin_users" else workers, flow, requests, warmup))
+    return results
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """Regression messages for flows slower than the baseline beyond `tolerance`."""
+    previous = {row["flow"]: row for row in baseline["results"]}
+    regressions = []
+    for row in results:
+        base = previous.get(row["flow"])
+        if not base:
+            continue
+        if row["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{row['flow']}: {row['rps']} req/s vs baseline {base['rps']}")
+        if row["p95_ms"] is not None and base["p95_ms"] and row["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{row['flow']}: p95 {row['p95_ms']} ms vs baseline {base['p95_ms']}")
+    return regressions
+
+
+def _print_table(results: list, baseline: dict | None):
+    previous = {row["flow"]: row for row in (baseline or {}).get("results", [])}
+    print(f"{'flow':<13}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'shed':>6}{'vs baseline':>14}")
+    for row in results:
+        base = previous.get(row["flow"])
+        delta = f"{(row['rps'] / base['rps'] - 1) * 100:+.1f}%" if base and base["rps"] else ""
+        p50, p95, p99 = (f"{row[k]:.1f}" if row[k] is not None else "-" for k in ("p50_ms", "p95_ms", "p99_ms"))
+        print(f"{row['flow']:<13}{row['rps']:>10,.1f}{p50:>10}{p95:>10}{p99:>10}{row['errors']:>8}{row['shed']:>6}{delta:>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flows", nargs="+", default=FLOWS, choices=FLOWS)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="iterations per flow")
+    parser.add_argument("--warmup", type=int, default=4, help="untimed iterations per flow")
+    parser.add_argument("--no-admission", action="store_true", help="disable load shedding to measure raw capacity")
+    parser.add_argument("--database", help="SQLite file to create (default: a temporary file)")
+    parser.add_argument("--json", dest="json_path", help="also write results to this file")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="write this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        recorded = {key: baseline.get(key) for key in ("concurrency", "requests", "admission")}
+        requested = {"concurrency": args.concurrency, "requests": args.requests, "admission": not args.no_admission}
+        if recorded != requested:
+            # numbers from different settings are not comparable; fail before spending the run
+            parser.exit(2, f"error: {args.baseline} was recorded with {recorded}, this run uses {requested}\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(args.database or Path(tmp) / "bench.db").resolve()
+        if database.exists():
+            parser.error(f"{database} already exists")
+        _configure(database, admission=not args.no_admission)
+        _seed(args.concurrency)
+        results = asyncio.run(run(args.flows, args.concurrency, args.requests, args.warmup))
+
+    _print_table(results, baseline)
+
+    report = {
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "admission": not args.no_admission,
+        "results": results,
+    }
+    for path in filter(None, (args.json_path, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
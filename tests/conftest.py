@@ -1,10 +1,19 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_async_db, get_db
+from app.core.session_cache import session_cache
+from app.core.rbac import rbac_resolver
+from app.core.token_versions import token_versions
+from app.core.rate_limit import limiter
+from app.core.login_throttle import login_throttle
+from app.core.admission import admission_controller
+from app.utils.audit import audit_writer
 
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -13,6 +22,13 @@ engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# the writer is not started here, so log_event() writes synchronously; make it use the test database
+audit_writer.session_factory = TestingSessionLocal
+
+# async routes: same file through aiosqlite; NullPool because TestClient runs
+# each request on its own event loop, so connections must not outlive one
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 
 # ---------------------------------------------------------------------
@@ -20,6 +36,10 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 # ---------------------------------------------------------------------
 @pytest.fixture(scope="function")
 def db_session():
+    session_cache.clear()
+    rbac_resolver.clear()
+    token_versions.clear()
+    login_throttle.clear()
     Base.metadata.create_all(bind=engine)
     session = TestingSessionLocal()
 
@@ -41,7 +61,15 @@ def client(db_session):
         finally:
             pass
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # per-IP limits would otherwise carry over between tests
+    limiter.reset()
+    admission_controller.reset()
     return TestClient(app)
 
 
@@ -60,3 +88,25 @@ def create_test_user(db_session):
         return create_user(db_session, username, email, password)
 
     return _create
+
+
+# ---------------------------------------------------------------------
+# Admin user + bearer header for /admin endpoints
+# ---------------------------------------------------------------------
+@pytest.fixture()
+def admin_headers(client, db_session):
+    from app.crud.user_crud import create_user
+    from app.models.rbac import Role
+
+    admin_user = create_user(db_session, "admin", "admin@example.com", "StrongP@ss1")
+    admin_role = Role(name="Admin", description="Administrator")
+    admin_user.roles.append(admin_role)
+    db_session.commit()
+
+    resp = client.post("/auth/token", data={
+        "grant_type": "password",
+        "username": "admin",
+        "password": "StrongP@ss1"
+    })
+    assert resp.status_code == 200, resp.text
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
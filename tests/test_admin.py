@@ -0,0 +1,141 @@
+# tests/test_admin.py
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+from app.config import settings
+from app.models.audit import AuditLog
+from app.models.rbac import Role, user_roles
+from app.models.user import User
+
+
+def _seed_logs(db_session, count, start=datetime(2026, 1, 1)):
+    for i in range(count):
+        db_session.add(AuditLog(
+            user_id=None,
+            action="login" if i % 2 else "refresh",
+            # pairs share a timestamp so the id tiebreaker is exercised
+            created_at=start + timedelta(minutes=i // 2),
+        ))
+    db_session.commit()
+
+
+def test_audit_logs_keyset_pagination(client, db_session, admin_headers):
+    _seed_logs(db_session, 25)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 10, "since": "2026-01-01T00:00:00", "until": "2026-01-02T00:00:00"}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client.get("/admin/audit-logs", params=params, headers=admin_headers)
+        assert resp.status_code == 200, resp.text
+        body = resp.json()
+        seen.extend(log["id"] for log in body["logs"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    expected = [
+        log.id for log in db_session.query(AuditLog)
+        .filter(AuditLog.created_at >= datetime(2026, 1, 1), AuditLog.created_at < datetime(2026, 1, 2))
+        .order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+    ]
+    assert seen == expected
+    assert len(seen) == 25
+
+
+def test_audit_logs_filters_and_bad_cursor(client, db_session, admin_headers):
+    _seed_logs(db_session, 10)
+
+    resp = client.get("/admin/audit-logs", params={
+        "action": "login",
+        "since": "2026-01-01T00:01:00",
+        "until": "2026-01-01T00:03:00",
+    }, headers=admin_headers)
+    assert resp.status_code == 200, resp.text
+    logs = resp.json()["logs"]
+    assert len(logs) == 2
+    assert all(log["action"] == "login" for log in logs)
+
+    resp = client.get("/admin/audit-logs", params={"cursor": "not-a-cursor"}, headers=admin_headers)
+    assert resp.status_code == 400
+
+
+def test_audit_logs_export_ndjson(client, db_session, admin_headers):
+    _seed_logs(db_session, 6)
+
+    resp = client.get("/admin/audit-logs/export", params={
+        "action": "login",
+        "since": "2026-01-01T00:00:00",
+        "until": "2026-01-02T00:00:00",
+    }, headers=admin_headers)
+    assert resp.status_code == 200, resp.text
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in resp.text.splitlines()]
+    assert len(records) == 3
+    assert [r["id"] for r in records] == sorted(r["id"] for r in records)
+    assert all(r["action"] == "login" for r in records)
+
+
+def test_audit_logs_export_csv_gzip(client, db_session, admin_headers):
+    _seed_logs(db_session, 4)
+
+    resp = client.get("/admin/audit-logs/export", params={
+        "format": "csv",
+        "gzip": True,
+        "until": "2026-01-02T00:00:00",
+    }, headers=admin_headers)
+    assert resp.status_code == 200, resp.text
+    assert 'filename="audit-logs.csv.gz"' in resp.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(resp.content).decode())))
+    assert len(rows) == 4
+    assert rows[0]["action"] == "refresh"
+
+
+def test_audit_logs_export_rejects_unknown_format(client, admin_headers):
+    resp = client.get("/admin/audit-logs/export", params={"format": "xml"}, headers=admin_headers)
+    assert resp.status_code == 422
+
+
+def _users(db_session, count):
+    users = [User(username=f"bulk{i}", email=f"bulk{i}@example.com", password_hash="x") for i in range(count)]
+    db_session.add_all(users)
+    db_session.commit()
+    return [user.id for user in users]
+
+
+def test_bulk_role_assign_and_remove(client, db_session, admin_headers, monkeypatch):
+    monkeypatch.setattr(settings, "admin_bulk_chunk_size", 4)
+    db_session.add(Role(name="Responder"))
+    db_session.commit()
+    user_ids = _users(db_session, 10)
+
+    resp = client.post("/admin/bulk/roles/assign", json={"role": "Responder", "user_ids": user_ids[:6] + [999999]},
+                       headers=admin_headers)
+    assert resp.json() == {"requested": 7, "affected": 6, "chunks": 2}
+    # already-assigned users are skipped
+    resp = client.post("/admin/bulk/roles/assign", json={"role": "Responder", "user_ids": user_ids}, headers=admin_headers)
+    assert resp.json()["affected"] == 4
+    assert db_session.query(user_roles).count() == 10 + 1  # + the admin's own role
+
+    resp = client.post("/admin/bulk/roles/remove", json={"role": "Responder", "user_ids": user_ids[:3]},
+                       headers=admin_headers)
+    assert resp.json()["affected"] == 3
+    audit = db_session.query(AuditLog).filter(AuditLog.action.like("bulk role%")).all()
+    assert len(audit) == 3
+
+
+def test_bulk_session_revoke(client, db_session, admin_headers, create_test_user):
+    create_test_user()
+    login = client.post("/auth/token", data={"grant_type": "password", "username": "user1", "password": "StrongP@ss1"})
+    user_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    assert client.get("/auth/userinfo", headers=user_headers).status_code == 200
+    user_id = db_session.query(User).filter_by(username="user1").one().id
+
+    resp = client.post("/admin/bulk/sessions/revoke", json={"user_ids": [user_id]}, headers=admin_headers)
+    assert resp.json() == {"requested": 1, "affected": 1, "chunks": 1}
+    assert client.get("/auth/userinfo", headers=user_headers).status_code == 403
+    # the admin's own session is untouched
+    assert client.get("/admin/dashboard", headers=admin_headers).status_code == 200
@@ -0,0 +1,103 @@
+# tests/test_admission.py
+from app.core.admission import AIMDLimiter, admission_controller
+
+
+def test_aimd_limit_grows_when_fast_and_busy_and_backs_off_when_slow():
+    now = [0.0]
+    limiter = AIMDLimiter("login", initial=4, min_limit=2, max_limit=5, target_ms=100, clock=lambda: now[0])
+    assert all(limiter.try_acquire() for _ in range(4))
+    assert not limiter.try_acquire()
+    assert limiter.stats()["shed"] == 1
+
+    for _ in range(4):
+        limiter.release(0.01)
+    assert limiter.limit > 4
+
+    for _ in range(20):
+        assert limiter.try_acquire()
+        now[0] += 0.5
+        limiter.release(0.5)
+    assert limiter.limit == 2
+
+    limiter.try_acquire()
+    limiter.release(0.01, overloaded=True)  # a 503 counts as slow
+    assert limiter.limit == 2 and limiter.in_flight == 0
+
+
+def test_one_slow_round_cuts_the_limit_once():
+    now = [100.0]
+    limiter = AIMDLimiter("login", initial=10, min_limit=2, max_limit=64, target_ms=100, clock=lambda: now[0])
+    for _ in range(8):
+        limiter.try_acquire()
+    now[0] += 0.5
+    for _ in range(8):
+        limiter.release(0.5)  # all admitted before the first cut
+    assert limiter.limit == 9
+
+    limiter.try_acquire()
+    now[0] += 0.5
+    limiter.release(0.5)  # admitted after it
+    assert limiter.limit == 9 * 0.9
+
+
+def test_idle_budget_does_not_grow():
+    limiter = AIMDLimiter("validation", initial=8, min_limit=2, max_limit=64, target_ms=100)
+    for _ in range(50):
+        limiter.try_acquire()
+        limiter.release(0.001)
+    assert limiter.limit == 8
+
+
+def test_full_login_budget_sheds_token_endpoint_but_not_validation(client):
+    login = admission_controller.budgets["login"]
+    held = 0
+    while login.try_acquire():
+        held += 1
+    try:
+        resp = client.post("/auth/token", data={"grant_type": "password", "username": "a", "password": "b"})
+        assert resp.status_code == 503
+        assert resp.headers["Retry-After"] == "1"
+
+        # validation has its own budget
+        assert client.get("/auth/userinfo").status_code == 401
+    finally:
+        for _ in range(held):
+            login.release(0.0)
+    assert client.post("/auth/token", data={"grant_type": "password", "username": "a", "password": "b"}).status_code == 401
+    assert admission_controller.stats()["login"]["shed"] >= 1
+
+
+def test_code_exchange_uses_the_token_budget(client):
+    login = admission_controller.budgets["login"]
+    held = 0
+    while login.try_acquire():
+        held += 1
+    try:
+        # the endpoint still sees the form the middleware read the grant type from
+        resp = client.post("/auth/token", data={
+            "grant_type": "authorization_code", "code": "nope", "client_id": "x",
+            "redirect_uri": "http://127.0.0.1/cb", "code_verifier": "v" * 43,
+        })
+        assert resp.status_code == 400, resp.text
+        assert client.post("/auth/token", data={"grant_type": "password", "username": "a", "password": "b"}).status_code == 503
+    finally:
+        for _ in range(held):
+            login.release(0.0)
+
+
+def test_repeated_grant_type_uses_the_path_budget(client):
+    login = admission_controller.budgets["login"]
+    held = 0
+    while login.try_acquire():
+        held += 1
+    try:
+        # the form parser takes the last grant_type, so this must not ride on the token budget
+        resp = client.post(
+            "/auth/token",
+            content="grant_type=authorization_code&grant_type=password&username=a&password=b",
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        assert resp.status_code == 503
+    finally:
+        for _ in range(held):
+            login.release(0.0)
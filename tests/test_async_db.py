@@ -0,0 +1,29 @@
+# tests/test_async_db.py
+import pytest
+
+from app.database import async_database_url
+
+
+def test_async_database_url_maps_drivers():
+    assert async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert (
+        async_database_url("postgresql+psycopg2://u:p@db:5432/identity")
+        == "postgresql+asyncpg://u:p@db:5432/identity"
+    )
+    with pytest.raises(ValueError):
+        async_database_url("mysql://u:p@db/identity")
+
+
+def test_refresh_rekeys_session_to_new_access_token(client, create_test_user):
+    create_test_user()
+    login = client.post("/auth/token", data={"grant_type": "password", "username": "user1", "password": "StrongP@ss1"})
+    old_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    assert client.post("/auth/me", headers=old_headers).status_code == 200
+
+    refreshed = client.post("/auth/token/refresh", data={"refresh_token": login.json()["refresh_token"]})
+    assert refreshed.status_code == 200, refreshed.text
+    new_headers = {"Authorization": f"Bearer {refreshed.json()['access_token']}"}
+    assert client.post("/auth/me", headers=new_headers).status_code == 200
+    assert client.post("/auth/me", headers=old_headers).status_code == 403
+    # the rotated-out refresh token no longer works
+    assert client.post("/auth/token/refresh", data={"refresh_token": login.json()["refresh_token"]}).status_code == 401
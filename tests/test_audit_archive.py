@@ -0,0 +1,118 @@
+# tests/test_audit_archive.py
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.audit import AuditLog
+from app.utils.audit_archive import AuditArchive, Segment
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    archive = AuditArchive(
+        directory=str(tmp_path), bucket_hours=24, block_rows=3, retention_days=30,
+        session_factory=TestingSessionLocal,
+    )
+    # the admin API reads through the module-level instance
+    monkeypatch.setattr("app.crud.audit_crud.audit_archive", archive)
+    return archive
+
+
+def _seed(db_session, start, count, step=timedelta(hours=5)):
+    for i in range(count):
+        db_session.add(AuditLog(action="login" if i % 2 else "refresh", created_at=start + i * step))
+    db_session.commit()
+
+
+def test_archive_moves_old_buckets_to_segments(db_session, archive, tmp_path):
+    now = datetime(2026, 3, 1)
+    _seed(db_session, datetime(2026, 1, 1), 10)  # five rows on each of Jan 1 and 2
+    _seed(db_session, now - timedelta(days=1), 2)  # still hot
+
+    result = archive.archive(now=now)
+
+    assert result == {"buckets": 2, "rows": 10}
+    assert db_session.query(AuditLog).count() == 2
+    segment = tmp_path / "audit-20260101T00.ndjson.gz"
+    index = json.loads((tmp_path / "audit-20260101T00.idx.json").read_text())
+    lines = gzip.decompress(segment.read_bytes()).splitlines()
+    assert len(lines) == sum(block["rows"] for block in index["blocks"]) == 5
+    assert len(index["blocks"]) == 2
+    assert archive.archive(now=now) == {"buckets": 0, "rows": 0}
+
+
+def test_late_rows_append_a_new_run(db_session, archive):
+    now = datetime(2026, 3, 1)
+    _seed(db_session, datetime(2026, 1, 1), 4)
+    archive.archive(now=now)
+    db_session.add(AuditLog(action="late", created_at=datetime(2026, 1, 1, 1)))
+    db_session.commit()
+
+    assert archive.archive(now=now)["rows"] == 1
+    logs = list(archive.iter_logs(since=datetime(2026, 1, 1), until=datetime(2026, 1, 2)))
+    assert [log.action for log in logs] == ["refresh", "late", "login", "refresh", "login"]
+
+
+def test_admin_api_pages_across_hot_table_and_archive(client, db_session, admin_headers, archive):
+    _seed(db_session, datetime(2026, 1, 1), 8)
+    _seed(db_session, datetime.utcnow() - timedelta(hours=1), 3, step=timedelta(minutes=1))
+    archive.archive()
+    assert db_session.query(AuditLog).filter(AuditLog.created_at < datetime(2026, 2, 1)).count() == 0
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 4, "since": "2026-01-01T00:00:00", "action": "refresh"}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/admin/audit-logs", params=params, headers=admin_headers).json()
+        seen.extend((log["created_at"], log["id"]) for log in body["logs"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert len(seen) == 4 + 2
+    assert seen == sorted(seen, reverse=True)
+
+    resp = client.get("/admin/audit-logs/export", params={"until": "2026-02-01T00:00:00"}, headers=admin_headers)
+    assert [json.loads(line)["action"] for line in resp.text.splitlines()] == ["refresh", "login"] * 4
+
+
+def test_archiver_skips_while_another_process_holds_the_lock(db_session, archive, tmp_path):
+    fcntl = pytest.importorskip("fcntl")
+    _seed(db_session, datetime(2026, 1, 1), 4)
+    tmp_path.mkdir(exist_ok=True)
+    with open(tmp_path / ".archive.lock", "a+b") as other_worker:
+        fcntl.flock(other_worker.fileno(), fcntl.LOCK_EX)
+        assert archive.archive(now=datetime(2026, 3, 1)) == {"buckets": 0, "rows": 0}
+        assert db_session.query(AuditLog).count() == 4
+    assert archive.archive(now=datetime(2026, 3, 1)) == {"buckets": 1, "rows": 4}
+
+
+def test_filtered_reads_skip_blocks_without_the_user_or_action(db_session, archive, monkeypatch):
+    for i in range(9):
+        db_session.add(AuditLog(user_id=i // 3 + 1, action=f"action{i // 3}", created_at=datetime(2026, 1, 1, i)))
+    db_session.commit()
+    archive.archive(now=datetime(2026, 3, 1))
+
+    reads = []
+    read_block = Segment.read_block
+    monkeypatch.setattr(Segment, "read_block", lambda self, block: reads.append(block) or read_block(self, block))
+
+    assert [log.user_id for log in archive.iter_logs(user_id=2)] == [2, 2, 2]
+    assert [log.action for log in archive.iter_logs(action="action2")] == ["action2"] * 3
+    assert list(archive.iter_logs(action="missing")) == []
+    assert len(reads) == 2
+
+
+def test_admin_api_orders_rows_without_created_at(client, db_session, admin_headers, archive):
+    db_session.add(AuditLog(action="undated"))
+    _seed(db_session, datetime(2026, 1, 1), 4)
+    db_session.query(AuditLog).filter_by(action="undated").update({"created_at": None})
+    db_session.commit()
+    archive.archive(now=datetime(2026, 3, 1))
+
+    resp = client.get("/admin/audit-logs", params={"limit": 10}, headers=admin_headers)
+    assert resp.status_code == 200
+    assert [log["action"] for log in resp.json()["logs"]][-1] == "undated"  # NULL sorts first, so last here
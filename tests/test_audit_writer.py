@@ -0,0 +1,36 @@
+# tests/test_audit_writer.py
+from datetime import datetime
+from app.models.audit import AuditLog
+from app.utils.audit import AuditWriter
+from tests.conftest import TestingSessionLocal
+
+
+def _row(action):
+    return {"user_id": None, "action": action, "created_at": datetime.utcnow()}
+
+
+def test_background_writer_flushes_batches_on_stop(db_session):
+    writer = AuditWriter(session_factory=TestingSessionLocal, batch_size=10, flush_interval_ms=5000)
+    writer.start()
+    for i in range(25):
+        assert writer.submit(_row(f"event {i}"))
+    writer.stop()
+
+    assert db_session.query(AuditLog).count() == 25
+    stats = writer.stats()
+    assert stats["queued"] == 25 and stats["flushed"] == 25 and stats["dropped"] == 0
+
+
+def test_drop_policy_counts_overflow(db_session):
+    writer = AuditWriter(session_factory=TestingSessionLocal, max_queue=2, overflow_policy="drop")
+    # simulate a running flusher that is stalled so the queue fills up
+    writer._thread = type("Stalled", (), {"is_alive": lambda self: True})()
+    results = [writer.submit(_row("event")) for _ in range(5)]
+    assert results.count(True) == 2
+    assert writer.stats()["dropped"] == 3
+
+
+def test_writes_synchronously_when_not_started(db_session):
+    writer = AuditWriter(session_factory=TestingSessionLocal)
+    writer.submit(_row("sync event"))
+    assert db_session.query(AuditLog).filter(AuditLog.event_type == "sync event").count() == 1
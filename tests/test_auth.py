@@ -1,6 +1,10 @@
 # tests/test_auth.py
 import time
+from urllib.parse import parse_qs, urlparse
+
 import pyotp
+from app.core.utils import generate_code_challenge_s256, generate_code_verifier
+from app.models.oauth import OAuthClient
 from app.models.rbac import Role
 from app.models.audit import AuditLog
 
@@ -130,3 +134,32 @@ def test_setup_and_verify_mfa(client, create_test_user):
     code = totp.now()
     verify_resp = client.post("/auth/mfa/verify", json={"code": code}, headers={"Authorization": f"Bearer {user.token}"})
     assert verify_resp.status_code == 200
+
+
+def test_authorization_code_pkce_exchange(client, db_session, create_test_user):
+    create_test_user()
+    db_session.add(OAuthClient(client_id="spa", client_name="SPA", redirect_uris="http://127.0.0.1:3000/callback"))
+    db_session.commit()
+    verifier = generate_code_verifier()
+
+    resp = client.post("/auth/authorize", data={
+        "response_type": "code",
+        "client_id": "spa",
+        "redirect_uri": "http://127.0.0.1:3000/callback",
+        "username": "user1",
+        "password": "StrongP@ss1",
+        "code_challenge": generate_code_challenge_s256(verifier),
+        "code_challenge_method": "S256",
+    }, follow_redirects=False)
+    assert resp.status_code == 307, resp.text
+    code = parse_qs(urlparse(resp.headers["location"]).query)["code"][0]
+
+    token_resp = client.post("/auth/token", data={
+        "grant_type": "authorization_code",
+        "code": code,
+        "client_id": "spa",
+        "redirect_uri": "http://127.0.0.1:3000/callback",
+        "code_verifier": verifier,
+    })
+    assert token_resp.status_code == 200, token_resp.text
+    assert {"access_token", "refresh_token", "id_token"} <= token_resp.json().keys()
@@ -0,0 +1,40 @@
+# tests/test_crypto_executor.py
+import threading
+import pytest
+from app.core.crypto_executor import CryptoExecutor, CryptoQueueFull
+
+
+def test_run_records_per_operation_stats():
+    executor = CryptoExecutor(kind="thread", max_workers=2, max_queue=4)
+    try:
+        assert executor.run("add", lambda a, b: a + b, 2, 3) == 5
+        stats = executor.stats()
+        assert stats["operations"]["add"]["count"] == 1
+        assert stats["pending"] == 0
+    finally:
+        executor.shutdown()
+
+
+def test_queue_limit_rejects_excess_work():
+    executor = CryptoExecutor(kind="thread", max_workers=1, max_queue=1)
+    gate = threading.Event()
+    try:
+        future = executor.submit("slow", gate.wait, 5)
+        with pytest.raises(CryptoQueueFull):
+            executor.submit("slow", gate.wait, 5)
+        gate.set()
+        future.result()
+        assert executor.stats()["rejected"] == 1
+    finally:
+        gate.set()
+        executor.shutdown()
+
+
+def test_arun_can_be_awaited():
+    import asyncio
+
+    executor = CryptoExecutor(kind="thread", max_workers=1, max_queue=2)
+    try:
+        assert asyncio.run(executor.arun("mul", lambda a, b: a * b, 4, 5)) == 20
+    finally:
+        executor.shutdown()
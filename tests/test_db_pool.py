@@ -0,0 +1,70 @@
+# tests/test_db_pool.py
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from app.core.db_pool import InstrumentedQueuePool, pool_options, pool_stats
+from app.database import get_async_db, get_db
+from app.main import app
+
+
+def test_pool_stats_track_checkouts_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    held = engine.connect()
+    assert pool_stats(engine)["checked_out"] == 1
+    with pytest.raises(PoolTimeout):
+        engine.connect()
+    held.close()
+
+    stats = pool_stats(engine)
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["wait_seconds_max"] >= 0.05
+
+    engine.dispose()  # counters survive the pool being recreated
+    assert pool_stats(engine)["timeouts"] == 1
+
+
+def test_pool_options_leave_in_memory_sqlite_alone():
+    assert pool_options("sqlite://") == {}
+    assert pool_options("postgresql+psycopg2://u:p@db/identity")["poolclass"] is InstrumentedQueuePool
+
+
+def test_one_session_per_request(client, db_session, admin_headers):
+    opened = []
+
+    def counting_get_db():
+        opened.append(db_session)
+        yield db_session
+
+    app.dependency_overrides[get_db] = counting_get_db
+    # role_required and the route both depend on get_db
+    assert client.get("/admin/users", headers=admin_headers).status_code == 200
+    assert len(opened) == 1
+
+
+def test_mixing_sync_and_async_sessions_is_logged(caplog):
+    request = SimpleNamespace(state=SimpleNamespace(), method="GET", url=SimpleNamespace(path="/mixed"), client=None)
+
+    async def both():
+        sync_db = get_db(request)
+        next(sync_db)
+        async_db = get_async_db(request)
+        await async_db.__anext__()
+        await async_db.aclose()
+        sync_db.close()
+
+    with caplog.at_level(logging.WARNING, logger="app.database"):
+        asyncio.run(both())
+    assert "GET /mixed depends on both get_db and get_async_db" in caplog.text
@@ -0,0 +1,141 @@
+# tests/test_db_routing.py
+import asyncio
+import shutil
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.core.db_routing import Replica, ReplicaRouter, pin_to_primary, routing_session_class
+from app.core.dependencies import get_current_user
+from app.core.security import create_session
+from app.core.session_cache import session_cache
+from app.core.token_versions import bump_token_version, token_versions
+from app.database import Base
+from app.models.user import User
+
+
+def _user(username):
+    return User(username=username, email=f"{username}@example.com", password_hash="x")
+
+
+@pytest.fixture()
+def databases(tmp_path):
+    """A primary and a "replica" SQLite file that deliberately hold different users."""
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    for engine, username in ((primary, "on_primary"), (replica, "on_replica")):
+        Base.metadata.create_all(bind=engine)
+        with sessionmaker(bind=engine)() as db:
+            db.add(_user(username))
+            db.commit()
+    yield tmp_path, primary, replica
+    primary.dispose()
+    replica.dispose()
+
+
+def _router(replica_engine, lag=0.0, **overrides):
+    options = {"lag_tolerance_seconds": {"admin": 5}, "read_your_writes_seconds": 10}
+    options.update(overrides)
+    router = ReplicaRouter([Replica("replica", replica_engine)], lag_probe=lambda engine: lag, **options)
+    router.refresh_lags()
+    return router
+
+
+def _usernames(db, read_type=None):
+    query = db.query(User.username)
+    if read_type:
+        query = query.execution_options(read_type=read_type)
+    return sorted(name for (name,) in query.all())
+
+
+def test_tagged_reads_go_to_replica(databases):
+    _, primary, replica = databases
+    Session = sessionmaker(bind=primary, class_=routing_session_class(_router(replica)))
+    with Session() as db:
+        assert _usernames(db, "admin") == ["on_replica"]
+        assert _usernames(db) == ["on_primary"]  # untagged reads stay on the primary
+
+
+def test_lag_over_tolerance_or_unprobed_replica_falls_back(databases):
+    _, primary, replica = databases
+    lagging = sessionmaker(bind=primary, class_=routing_session_class(_router(replica, lag=30.0)))
+    with lagging() as db:
+        assert _usernames(db, "admin") == ["on_primary"]
+
+    router = ReplicaRouter([Replica("replica", replica)], {"admin": 5})  # never probed
+    with sessionmaker(bind=primary, class_=routing_session_class(router))() as db:
+        assert _usernames(db, "admin") == ["on_primary"]
+
+
+def test_read_your_writes(databases):
+    _, primary, replica = databases
+    router = _router(replica)
+    Session = sessionmaker(bind=primary, class_=routing_session_class(router))
+
+    with Session(info={"client_key": "10.0.0.1"}) as db:
+        db.add(_user("new"))
+        db.flush()
+        # a session that has written stays on the primary
+        assert _usernames(db, "admin") == ["new", "on_primary"]
+        db.commit()
+
+    # so does the writing client, for read_your_writes_seconds
+    with Session(info={"client_key": "10.0.0.1"}) as db:
+        assert _usernames(db, "admin") == ["new", "on_primary"]
+    with Session(info={"client_key": "10.0.0.2"}) as db:
+        assert _usernames(db, "admin") == ["on_replica"]
+        pin_to_primary(db)
+        assert _usernames(db, "admin") == ["new", "on_primary"]
+
+
+def test_async_session_routes_to_replica_async_engine(databases):
+    tmp_path, _, replica = databases
+    async_primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}", poolclass=NullPool)
+    async_replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}", poolclass=NullPool)
+    router = ReplicaRouter([Replica("replica", replica, async_replica)], {"admin": 5}, lag_probe=lambda engine: 0.0)
+    router.refresh_lags()
+    Session = async_sessionmaker(async_primary, sync_session_class=routing_session_class(router, is_async=True))
+
+    async def read():
+        async with Session() as db:
+            tagged = (await db.execute(select(User.username).execution_options(read_type="admin"))).scalars().all()
+            untagged = (await db.execute(select(User.username))).scalars().all()
+            return tagged, untagged
+
+    assert asyncio.run(read()) == (["on_replica"], ["on_primary"])
+
+
+def test_current_user_validity_is_never_read_from_a_lagging_replica(tmp_path):
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    Base.metadata.create_all(bind=primary)
+    with sessionmaker(bind=primary)() as db:
+        db.add(_user("alice"))
+        db.commit()
+        user = db.query(User).filter_by(username="alice").one()
+        session, _, access_token = create_session(user, db, 30, 1)
+        user_id = user.id
+    # the replica is a snapshot taken before the revocation below
+    shutil.copy(tmp_path / "primary.db", tmp_path / "replica.db")
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+
+    with sessionmaker(bind=primary)() as db:
+        bump_token_version(db, user_id)
+    session_cache.clear()
+
+    Session = sessionmaker(bind=primary, class_=routing_session_class(_router(replica, lag_tolerance_seconds={"session": 5})))
+    try:
+        with Session() as db:
+            with pytest.raises(HTTPException) as exc:
+                get_current_user(access_token, db)
+            assert exc.value.status_code == 403
+            # the stale replica version must not have been cached either
+            assert token_versions.get(db, user_id) == 1
+            assert session_cache.get(session.session_key) is None
+    finally:
+        token_versions.clear()
+        primary.dispose()
+        replica.dispose()
@@ -0,0 +1,135 @@
+# tests/test_jwks.py
+import pytest
+
+from app.core.security import rotate_keys
+from app.config import settings
+from app.core.discovery import discovery_documents
+from app.core.keyring import KeyRing, jwk_thumbprint
+
+
+@pytest.fixture
+def rs256(monkeypatch):
+    # the ring is only published for asymmetric algorithms
+    monkeypatch.setattr(settings, "algorithm", "RS256")
+    discovery_documents.rebuild()
+    yield
+    monkeypatch.undo()
+    discovery_documents.rebuild()
+
+
+def test_jwks_served_with_etag_and_304(client, rs256):
+    resp = client.get("/.well-known/jwks.json")
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["keys"][0]["kty"] == "RSA"
+    etag = resp.headers["etag"]
+    assert "max-age" in resp.headers["cache-control"]
+
+    not_modified = client.get("/.well-known/jwks.json", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+
+def test_hs256_publishes_no_keys(client, monkeypatch):
+    monkeypatch.setattr(settings, "algorithm", "HS256")
+    discovery_documents.rebuild()
+    try:
+        assert client.get("/.well-known/jwks.json").json() == {"keys": []}
+        assert client.get("/.well-known/openid-configuration").json()["id_token_signing_alg_values_supported"] == ["HS256"]
+    finally:
+        monkeypatch.undo()
+        discovery_documents.rebuild()
+
+
+def test_openid_configuration_points_at_jwks(client):
+    resp = client.get("/.well-known/openid-configuration")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["jwks_uri"].endswith("/.well-known/jwks.json")
+    assert body["issuer"] == settings.issuer
+
+
+def test_rotate_keys_republishes_jwks(client, rs256, tmp_path, monkeypatch):
+    from app.core import discovery, security
+
+    ring = KeyRing(max_retired=2)
+    ring.load(settings.private_key_path, settings.key_id)
+    original_kid = ring.active.kid
+    assert original_kid == jwk_thumbprint(ring.active.public_key)
+    assert ring.get(settings.key_id) is ring.active  # tokens issued under the old KEY_ID kid
+    monkeypatch.setattr(security, "key_ring", ring)
+    monkeypatch.setattr(discovery, "key_ring", ring)
+    discovery_documents.rebuild()
+    before = client.get("/.well-known/jwks.json").headers["etag"]
+
+    private_path, public_path = tmp_path / "private.pem", tmp_path / "public.pem"
+    monkeypatch.setattr(settings, "private_key_path", str(private_path))
+    monkeypatch.setattr(settings, "public_key_path", str(public_path))
+    try:
+        rotate_keys(str(private_path), str(public_path))
+
+        after = client.get("/.well-known/jwks.json", headers={"If-None-Match": before})
+        assert after.status_code == 200
+        assert after.headers["etag"] != before
+        # the retired key stays published during the overlap window
+        kids = [key["kid"] for key in after.json()["keys"]]
+        assert kids == [ring.active.kid, original_kid]
+    finally:
+        monkeypatch.undo()
+        settings.load_keys()
+        discovery_documents.rebuild()
+
+
+def test_tokens_signed_before_rotation_still_verify(monkeypatch, tmp_path):
+    from app.core import security
+
+    ring = KeyRing(max_retired=1)
+    ring.rotate()
+    monkeypatch.setattr(security, "key_ring", ring)
+    monkeypatch.setattr(settings, "algorithm", "RS256")
+
+    old_token = security.create_access_token({"sub": "user1"})
+    ring.rotate()
+    new_token = security.create_access_token({"sub": "user1"})
+
+    assert security.decode_access_token(old_token)["sub"] == "user1"
+    assert security.decode_access_token(new_token)["sub"] == "user1"
+
+    ring.rotate()  # the first key falls out of the ring
+    assert security.decode_access_token(old_token) is None
+
+
+def test_rotated_keys_survive_restart_and_reach_other_workers(tmp_path, monkeypatch):
+    from app.core import security
+
+    private_path, public_path = tmp_path / "private.pem", tmp_path / "public.pem"
+    private_path.write_bytes(open(settings.private_key_path, "rb").read())
+    monkeypatch.setattr(settings, "private_key_path", str(private_path))
+    monkeypatch.setattr(settings, "public_key_path", str(public_path))
+    monkeypatch.setattr(settings, "algorithm", "RS256")
+    monkeypatch.setattr(security.discovery_documents, "rebuild", lambda: None)
+
+    # two workers loaded the same key files
+    worker, other = KeyRing(max_retired=2), KeyRing(max_retired=2)
+    worker.load(str(private_path))
+    other.load(str(private_path))
+    try:
+        monkeypatch.setattr(security, "key_ring", worker)
+        old_token = security.create_access_token({"sub": "user1"})
+        security.rotate_keys(str(private_path), str(public_path))
+        new_token = security.create_access_token({"sub": "user1"})
+
+        # the other worker learns the new kid on first sight
+        monkeypatch.setattr(security, "key_ring", other)
+        assert security.decode_access_token(new_token)["sub"] == "user1"
+        assert security.decode_access_token(old_token)["sub"] == "user1"
+
+        # and so does a fresh process
+        restarted = KeyRing(max_retired=2)
+        restarted.load(str(private_path))
+        monkeypatch.setattr(security, "key_ring", restarted)
+        assert restarted.active.kid == worker.active.kid
+        assert security.decode_access_token(new_token)["sub"] == "user1"
+        assert security.decode_access_token(old_token)["sub"] == "user1"
+    finally:
+        monkeypatch.undo()
+        settings.load_keys()
@@ -0,0 +1,83 @@
+# tests/test_jwt_backends.py
+import base64
+import hashlib
+import hmac
+import json
+from datetime import datetime, timedelta
+import pytest
+from app.core.jwt_backends import BACKENDS, JWTBackendError, generate_private_key, get_backend
+
+ALGORITHMS = ["HS256", "RS256", "ES256", "EdDSA"]
+CASES = [
+    (name, alg) for name in BACKENDS for alg in ALGORITHMS if get_backend(name).supports(alg)
+]
+
+
+def _keys(algorithm):
+    if algorithm.startswith("HS"):
+        return "test-secret", "test-secret"
+    private_key = generate_private_key(algorithm)
+    return private_key, private_key.public_key()
+
+
+@pytest.mark.parametrize("backend_name,algorithm", CASES)
+def test_round_trip_and_tamper_detection(backend_name, algorithm):
+    backend = get_backend(backend_name)
+    signing_key, verifying_key = _keys(algorithm)
+    claims = {"sub": "user1", "exp": datetime.utcnow() + timedelta(minutes=5)}
+
+    token = backend.encode(claims, signing_key, algorithm, {"kid": "k1"})
+    assert backend.decode(token, verifying_key, [algorithm])["sub"] == "user1"
+
+    header, payload, signature = token.split(".")
+    tampered = ".".join([header, payload[:-2] + ("AA" if payload[-2:] != "AA" else "BB"), signature])
+    with pytest.raises(JWTBackendError):
+        backend.decode(tampered, verifying_key, [algorithm])
+
+
+@pytest.mark.parametrize("backend_name,algorithm", CASES)
+def test_expired_token_rejected(backend_name, algorithm):
+    backend = get_backend(backend_name)
+    signing_key, verifying_key = _keys(algorithm)
+    token = backend.encode({"sub": "u", "exp": datetime.utcnow() - timedelta(minutes=5)}, signing_key, algorithm)
+    with pytest.raises(JWTBackendError):
+        backend.decode(token, verifying_key, [algorithm])
+
+
+@pytest.mark.parametrize("algorithm", ["RS256", "ES256"])
+def test_backends_interoperate(algorithm):
+    signing_key, verifying_key = _keys(algorithm)
+    claims = {"sub": "user1", "exp": datetime.utcnow() + timedelta(minutes=5)}
+    for signer in BACKENDS:
+        token = get_backend(signer).encode(claims, signing_key, algorithm)
+        for verifier in BACKENDS:
+            assert get_backend(verifier).decode(token, verifying_key, [algorithm])["sub"] == "user1"
+
+
+def _hs256(header, payload, secret="test-secret"):
+    def enc(raw: bytes) -> str:
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    signing_input = enc(json.dumps(header).encode()) + "." + enc(json.dumps(payload).encode())
+    signature = hmac.new(secret.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return signing_input + "." + enc(signature)
+
+
+@pytest.mark.parametrize("backend_name", list(BACKENDS))
+@pytest.mark.parametrize("token", [
+    "WzFd.e30.x",  # header is the JSON array [1]
+    "e30.e30.x",  # header without alg
+    "éé.e30.x",
+    _hs256({"alg": "HS256"}, [1]),
+    _hs256({"alg": "HS256"}, {"sub": "u", "exp": "tomorrow"}),
+    _hs256({"alg": "HS256"}, {"sub": "u", "nbf": [1]}),
+    _hs256({"alg": "HS256"}, {"sub": "u"})[:-1] + "é",
+])
+def test_malformed_tokens_raise_backend_error(backend_name, token):
+    with pytest.raises(JWTBackendError):
+        get_backend(backend_name).decode(token, "test-secret", ["HS256"])
+
+
+def test_malformed_bearer_token_is_401(client):
+    resp = client.get("/auth/userinfo", headers={"Authorization": "Bearer WzFd.e30.x"})
+    assert resp.status_code == 401
@@ -0,0 +1,100 @@
+# tests/test_login_throttle.py
+from app.core.login_throttle import LoginThrottle, login_throttle
+from app.crud import user_crud
+from app.models.oauth import OAuthClient
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_failures_decay_over_the_sliding_window():
+    clock = FakeClock()
+    throttle = LoginThrottle(threshold=3, window_seconds=100, width=1024, depth=4, clock=clock)
+    for _ in range(3):
+        assert throttle.retry_after("alice") is None
+        throttle.record_failure("Alice")  # usernames are case-folded
+    assert throttle.retry_after("alice") is not None
+    assert throttle.retry_after("bob") is None
+
+    clock.now = 150  # half of the previous window still counts
+    assert throttle.failures("alice") == 1.5
+    assert throttle.retry_after("alice") is None
+
+    clock.now = 350  # two windows later nothing is left
+    assert throttle.failures("alice") == 0
+
+
+def test_retry_after_covers_the_block():
+    clock = FakeClock()
+    throttle = LoginThrottle(threshold=2, window_seconds=100, width=1024, depth=4, clock=clock)
+    for _ in range(4):
+        throttle.record_failure("carol")
+    clock.now = 40
+    wait = throttle.retry_after("carol")
+    clock.now += wait - 1
+    assert throttle.retry_after("carol") is not None
+    clock.now += 1
+    assert throttle.retry_after("carol") is None
+
+
+def test_many_usernames_do_not_throttle_others():
+    throttle = LoginThrottle(threshold=5, window_seconds=900, width=1 << 14, depth=4)
+    for i in range(20000):
+        throttle.record_failure(f"user{i}")
+    assert throttle.retry_after("legit-user") is None
+
+
+def test_password_grant_refuses_before_bcrypt(client, create_test_user, monkeypatch):
+    create_test_user(username="victim", email="victim@example.com")
+    monkeypatch.setattr(login_throttle, "threshold", 3)
+    verified = []
+    real_verify = user_crud.averify_password
+
+    async def counting_verify(*args):
+        verified.append(1)
+        return await real_verify(*args)
+
+    monkeypatch.setattr(user_crud, "averify_password", counting_verify)
+    form = {"grant_type": "password", "username": "victim", "password": "wrong"}
+    statuses = [client.post("/auth/token", data=form).status_code for _ in range(4)]
+    assert statuses == [401, 401, 401, 429]
+    assert len(verified) == 3
+
+    # the right password is refused too while the account is throttled
+    resp = client.post("/auth/token", data={**form, "password": "StrongP@ss1"})
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
+    assert len(verified) == 3
+
+
+def test_authorize_form_shares_the_account_throttle(client, db_session, create_test_user, monkeypatch):
+    create_test_user(username="victim", email="victim@example.com")
+    db_session.add(OAuthClient(client_id="spa", client_name="SPA", redirect_uris="http://127.0.0.1:3000/callback"))
+    db_session.commit()
+    monkeypatch.setattr(login_throttle, "threshold", 3)
+    verified = []
+    real_verify = user_crud.verify_password
+    monkeypatch.setattr(user_crud, "verify_password", lambda *args: verified.append(1) or real_verify(*args))
+
+    form = {
+        "response_type": "code",
+        "client_id": "spa",
+        "redirect_uri": "http://127.0.0.1:3000/callback",
+        "username": "victim",
+        "password": "wrong",
+    }
+    statuses = [client.post("/auth/authorize", data=form, follow_redirects=False).status_code for _ in range(3)]
+    assert statuses == [401, 401, 401]
+    resp = client.post("/auth/authorize", data=form, follow_redirects=False)
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
+    assert len(verified) == 3
+
+    # failures counted on the authorize form throttle the token endpoint too
+    token_resp = client.post("/auth/token", data={"grant_type": "password", "username": "victim", "password": "StrongP@ss1"})
+    assert token_resp.status_code == 429
@@ -0,0 +1,40 @@
+# tests/test_metrics.py
+from app.core.metrics import Histogram, MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("op_seconds", "Op latency.", ("op",), buckets=(0.1, 1.0)))
+    histogram.observe(0.05, "sign")
+    histogram.observe(0.5, "sign")
+    histogram.observe(5.0, "sign")
+
+    text = registry.render()
+    assert "# TYPE op_seconds histogram" in text
+    assert 'op_seconds_bucket{op="sign",le="0.1"} 1' in text
+    assert 'op_seconds_bucket{op="sign",le="1.0"} 2' in text
+    assert 'op_seconds_bucket{op="sign",le="+Inf"} 3' in text
+    assert 'op_seconds_count{op="sign"} 3' in text
+
+
+def test_metrics_endpoint_reports_routes_and_hot_path_timers(client, create_test_user):
+    create_test_user()
+    client.post("/auth/token", data={"grant_type": "password", "username": "user1", "password": "StrongP@ss1"})
+    client.get("/no-such-route")
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    text = resp.text
+    assert 'http_request_duration_seconds_count{method="POST",route="/auth/token"}' in text
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"}' in text
+    for operation in ("verify_password", "create_access_token", "create_id_token", "create_session", "log_event"):
+        assert f'auth_operation_duration_seconds_count{{operation="{operation}"}}' in text
+    assert 'db_pool_checked_out{engine="primary"}' in text
+    assert "crypto_executor_pending" in text
+
+
+def test_rate_limited_requests_are_counted(client):
+    for _ in range(6):
+        client.post("/auth/token", data={"grant_type": "password", "username": "nobody", "password": "x"})
+    assert 'http_rate_limited_total{route="/auth/token"}' in client.get("/metrics").text
@@ -0,0 +1,70 @@
+# tests/test_permission_index.py
+from sqlalchemy import insert
+
+from app.config import settings
+from app.core.permission_index import PermissionIndex, PermissionIndexCache, permission_index
+from app.core.security import decode_access_token
+from app.models.rbac import Permission, Role
+
+
+def test_bitmap_round_trip_uses_dense_positions():
+    index = PermissionIndex([(10, "admin.all"), (1, "posts.read"), (2, "posts.write")])
+    assert index.names == ["posts.read", "posts.write", "admin.all"]
+    bitmap = index.encode(["posts.read", "admin.all", "unknown"])
+    assert index.decode(bitmap) == frozenset({"posts.read", "admin.all"})
+
+    # deleting a permission shifts later bits, so the version must change with it
+    smaller = PermissionIndex([(1, "posts.read"), (10, "admin.all")])
+    assert smaller.names == ["posts.read", "admin.all"]
+    assert smaller.version != index.version
+
+
+def test_index_picks_up_permissions_created_by_other_workers(db_session):
+    now = [0.0]
+    cache = PermissionIndexCache(ttl_seconds=60, clock=lambda: now[0])
+    db_session.add(Permission(name="posts.read"))
+    db_session.commit()
+    first = cache.get(db_session)
+
+    def other_worker_creates(name):
+        # a plain connection, so this process's RBAC version is not bumped
+        with db_session.get_bind().begin() as conn:
+            conn.execute(insert(Permission).values(name=name))
+
+    other_worker_creates("posts.write")
+    assert cache.get(db_session) is first
+    assert "posts.write" in cache.get(db_session, ["posts.write"]).positions  # unknown name forces a rebuild
+
+    other_worker_creates("posts.delete")
+    now[0] += 61
+    assert "posts.delete" in cache.document(db_session).body.decode()
+
+
+def test_access_token_carries_permission_bitmap(client, db_session, create_test_user, monkeypatch):
+    monkeypatch.setattr(settings, "permission_bitmap_claim", True)
+    user = create_test_user()
+    user.roles.append(Role(name="Editor", permissions=[Permission(name="posts.read"), Permission(name="posts.write")]))
+    db_session.add(Permission(name="posts.delete"))
+    db_session.commit()
+
+    resp = client.post("/auth/token", data={"grant_type": "password", "username": "user1", "password": "StrongP@ss1"})
+    assert resp.status_code == 200, resp.text
+    claims = decode_access_token(resp.json()["access_token"])
+
+    doc = client.get("/.well-known/permission-index.json")
+    assert doc.status_code == 200
+    body = doc.json()
+    assert claims["perm_ver"] == body["version"]
+    index = permission_index.get(db_session)
+    assert index.decode(claims["perm_bits"]) == frozenset({"posts.read", "posts.write"})
+    assert set(body["permissions"].values()) == {"posts.read", "posts.write", "posts.delete"}
+
+    cached = client.get("/.well-known/permission-index.json", headers={"If-None-Match": doc.headers["etag"]})
+    assert cached.status_code == 304
+
+
+def test_permission_claims_are_opt_in(client, create_test_user):
+    create_test_user()
+    resp = client.post("/auth/token", data={"grant_type": "password", "username": "user1", "password": "StrongP@ss1"})
+    claims = decode_access_token(resp.json()["access_token"])
+    assert "perm_bits" not in claims and claims["roles"] == []
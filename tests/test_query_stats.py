@@ -0,0 +1,61 @@
+# tests/test_query_stats.py
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.config import settings
+from app.core.query_stats import QueryStatsMiddleware
+
+
+def _app(engine, repeats):
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def read_items(item_id: int):
+        with engine.connect() as conn:
+            for i in range(repeats):
+                conn.execute(text("SELECT :i"), {"i": i})
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_debug_headers_count_statements(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "debug", True)
+    engine = create_engine(f"sqlite:///{tmp_path / 'q.db'}")
+    resp = _app(engine, repeats=3).get("/items/1")
+    assert resp.headers["x-db-query-count"] == "3"
+    assert float(resp.headers["x-db-query-time-ms"]) >= 0
+    assert resp.headers["x-db-n-plus-one"] == "0"
+
+
+def test_headers_only_in_debug_mode(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "debug", False)
+    engine = create_engine(f"sqlite:///{tmp_path / 'q.db'}")
+    assert "x-db-query-count" not in _app(engine, repeats=1).get("/items/1").headers
+
+
+def test_repeated_statement_is_logged_as_n_plus_one(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "n_plus_one_threshold", 5)
+    engine = create_engine(f"sqlite:///{tmp_path / 'q.db'}")
+    with caplog.at_level(logging.WARNING, logger="app.core.query_stats"):
+        _app(engine, repeats=5).get("/items/1")
+    assert "Possible N+1 in /items/{item_id}: 5 x SELECT ?" in caplog.text
+
+
+def test_slow_statement_is_logged_with_route(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "slow_query_ms", 0)
+    engine = create_engine(f"sqlite:///{tmp_path / 'q.db'}")
+    with caplog.at_level(logging.WARNING, logger="app.core.query_stats"):
+        _app(engine, repeats=1).get("/items/1")
+    assert "Slow query" in caplog.text and "/items/{item_id}" in caplog.text
+
+
+def test_admin_request_is_counted(client, admin_headers, monkeypatch):
+    monkeypatch.setattr(settings, "debug", True)
+    resp = client.get("/admin/users", headers=admin_headers)
+    assert resp.status_code == 200
+    assert int(resp.headers["x-db-query-count"]) >= 1
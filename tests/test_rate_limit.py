@@ -0,0 +1,56 @@
+# tests/test_rate_limit.py
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter, SlidingWindowCounterRateLimiter
+
+from app.core.rate_limit import SQLiteStorage
+
+
+def test_sqlite_storage_is_shared_between_workers(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'limits.db'}"
+    # two storages on one file stand in for two worker processes
+    workers = [SlidingWindowCounterRateLimiter(storage_from_string(uri)) for _ in range(2)]
+    assert isinstance(workers[0].storage, SQLiteStorage)
+    limit = parse("3/minute")
+
+    assert [workers[i % 2].hit(limit, "10.0.0.1") for i in range(4)] == [True, True, True, False]
+    assert workers[1].hit(limit, "10.0.0.2")  # other keys are unaffected
+
+    workers[0].storage.reset()
+    assert workers[1].hit(limit, "10.0.0.1")
+
+
+def test_sqlite_storage_fixed_window(tmp_path):
+    limiter = FixedWindowRateLimiter(storage_from_string(f"sqlite:///{tmp_path / 'limits.db'}"))
+    limit = parse("2/hour")
+    assert limiter.hit(limit, "k") and limiter.hit(limit, "k")
+    assert not limiter.hit(limit, "k")
+    reset_at, remaining = limiter.get_window_stats(limit, "k")
+    assert remaining == 0 and reset_at > 0
+
+
+def test_sqlite_storage_purges_expired_windows(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr("app.core.rate_limit.time.time", lambda: now[0])
+    storage = SQLiteStorage(f"sqlite:///{tmp_path / 'limits.db'}")
+    limiter = SlidingWindowCounterRateLimiter(storage)
+    limit = parse("100/minute")
+
+    for _ in range(30):  # half an hour of traffic, one new row per minute
+        assert limiter.hit(limit, "10.0.0.1")
+        now[0] += 60
+    assert limiter.hit(limit, "10.0.0.1")
+    rows = storage._conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+    assert rows <= 3  # current and previous window, plus at most one awaiting the next purge
+
+
+def test_token_endpoint_returns_429_with_retry_after(client):
+    form = {"grant_type": "password", "username": "nobody", "password": "x"}
+    statuses = [client.post("/auth/token", data=form).status_code for _ in range(6)]
+    assert statuses[:5] == [401] * 5
+    assert statuses[5] == 429
+
+    resp = client.post("/auth/token", data=form)
+    assert resp.status_code == 429
+    assert resp.json()["detail"].startswith("Rate limit exceeded")
+    assert int(resp.headers["Retry-After"]) >= 1
@@ -0,0 +1,57 @@
+# tests/test_rbac.py
+from sqlalchemy import insert
+
+from app.core.rbac import rbac_resolver
+from app.models.rbac import Permission, Role, user_roles
+from app.models.user import User
+
+
+def _user_with_role(db_session, create_test_user):
+    user = create_test_user()
+    role = Role(name="Editor", permissions=[Permission(name="posts.write"), Permission(name="posts.read")])
+    user.roles.append(role)
+    db_session.commit()
+    return user, role
+
+
+def test_resolve_compiles_roles_and_permissions(db_session, create_test_user):
+    user, _ = _user_with_role(db_session, create_test_user)
+
+    grants = rbac_resolver.resolve(db_session, user.id)
+    assert grants.roles == frozenset({"Editor"})
+    assert grants.permissions == frozenset({"posts.write", "posts.read"})
+    assert grants.has_any_role(["editor", "Admin"])
+
+    hits = rbac_resolver.hits
+    assert rbac_resolver.resolve(db_session, user.id) is grants
+    assert rbac_resolver.hits == hits + 1
+
+
+def test_committed_rbac_changes_invalidate_grants(db_session, create_test_user):
+    user, role = _user_with_role(db_session, create_test_user)
+    rbac_resolver.resolve(db_session, user.id)
+
+    role.permissions.append(Permission(name="posts.delete"))
+    db_session.flush()
+    # not visible to the cache until committed
+    assert not rbac_resolver.resolve(db_session, user.id).has_permission("posts.delete")
+    db_session.commit()
+    assert rbac_resolver.resolve(db_session, user.id).has_permission("posts.delete")
+
+    admin = Role(name="Admin")
+    db_session.add(admin)
+    db_session.commit()
+    db_session.execute(insert(user_roles).values(user_id=user.id, role_id=admin.id))
+    db_session.commit()
+    assert "Admin" in rbac_resolver.resolve(db_session, user.id).roles
+
+
+def test_role_required_sees_role_removal_immediately(client, db_session, admin_headers):
+    assert client.get("/admin/dashboard", headers=admin_headers).status_code == 200
+
+    admin = db_session.query(User).filter_by(username="admin").one()
+    admin.roles.clear()
+    db_session.commit()
+
+    # the session itself is still cached; only the grants were invalidated
+    assert client.get("/admin/dashboard", headers=admin_headers).status_code == 403
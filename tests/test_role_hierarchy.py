@@ -0,0 +1,68 @@
+# tests/test_role_hierarchy.py
+import pytest
+from sqlalchemy import select
+
+from app.core.rbac import rbac_resolver
+from app.crud import rbac_crud
+from app.models.rbac import Permission, Role, role_closure
+
+
+def _roles(db_session, *names):
+    roles = [Role(name=name, permissions=[Permission(name=f"{name.lower()}.perm")]) for name in names]
+    db_session.add_all(roles)
+    db_session.commit()
+    return roles
+
+
+def _closure(db_session):
+    return set(db_session.execute(select(role_closure.c.descendant_id, role_closure.c.ancestor_id)).tuples())
+
+
+def test_closure_tracks_edges_and_rejects_cycles(db_session):
+    viewer, editor, admin = _roles(db_session, "Viewer", "Editor", "Admin")
+    rbac_crud.add_role_parent(db_session, editor, viewer)
+    rbac_crud.add_role_parent(db_session, admin, editor)
+    assert rbac_crud.ancestor_ids(db_session, admin.id) == {editor.id, viewer.id}
+
+    with pytest.raises(rbac_crud.RoleCycleError):
+        rbac_crud.add_role_parent(db_session, viewer, admin)
+    with pytest.raises(rbac_crud.RoleCycleError):
+        rbac_crud.add_role_parent(db_session, viewer, viewer)
+
+    # a second path to Viewer survives removing the first
+    rbac_crud.add_role_parent(db_session, admin, viewer)
+    rbac_crud.remove_role_parent(db_session, editor, viewer)
+    assert rbac_crud.ancestor_ids(db_session, admin.id) == {editor.id, viewer.id}
+    assert rbac_crud.ancestor_ids(db_session, editor.id) == set()
+
+    incremental = _closure(db_session)
+    rbac_crud.rebuild_role_closure(db_session)
+    assert _closure(db_session) == incremental
+
+    assert rbac_crud.effective_permission_names(db_session, admin) == {"admin.perm", "editor.perm", "viewer.perm"}
+
+
+def test_grants_include_inherited_roles_and_permissions(db_session, create_test_user):
+    viewer, editor = _roles(db_session, "Viewer", "Editor")
+    user = create_test_user()
+    user.roles.append(editor)
+    db_session.commit()
+    assert rbac_resolver.resolve(db_session, user.id).permissions == {"editor.perm"}
+
+    rbac_crud.add_role_parent(db_session, editor, viewer)
+    grants = rbac_resolver.resolve(db_session, user.id)
+    assert grants.roles == {"Editor", "Viewer"}
+    assert grants.permissions == {"editor.perm", "viewer.perm"}
+
+
+def test_admin_role_parent_endpoints(client, db_session, admin_headers):
+    _roles(db_session, "Viewer", "Editor")
+    resp = client.post("/admin/roles/Editor/parents", params={"parent": "Viewer"}, headers=admin_headers)
+    assert resp.status_code == 200, resp.text
+    assert client.get("/admin/roles/Editor/permissions", headers=admin_headers).json() == ["editor.perm", "viewer.perm"]
+
+    resp = client.post("/admin/roles/Viewer/parents", params={"parent": "Editor"}, headers=admin_headers)
+    assert resp.status_code == 409
+
+    assert client.delete("/admin/roles/Editor/parents/Viewer", headers=admin_headers).status_code == 200
+    assert client.get("/admin/roles/Editor/permissions", headers=admin_headers).json() == ["editor.perm"]
@@ -0,0 +1,37 @@
+# tests/test_session_cache.py
+from app.core.session_cache import SessionCache
+
+
+def _cache(**overrides):
+    options = {"ttl_seconds": 30, "max_entries": 2, "revoked_ttl_seconds": 60}
+    options.update(overrides)
+    return SessionCache(**options)
+
+
+def test_put_get_and_lru_eviction():
+    cache = _cache()
+    cache.put("a", "user-a", 1, ["User"])
+    cache.put("b", "user-b", 2, ["User"])
+    assert cache.get("a").user == "user-a"  # "a" becomes most recently used
+    cache.put("c", "user-c", 3, ["Admin"])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c").roles == frozenset({"Admin"})
+
+
+def test_revoke_user_moves_sessions_to_negative_set():
+    cache = _cache(max_entries=10)
+    cache.put("a", "user", 1, [])
+    cache.put("b", "user", 1, [])
+    cache.revoke_user(1)
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.is_revoked("a") and cache.is_revoked("b")
+    # a revoked key is never re-admitted
+    cache.put("a", "user", 1, [])
+    assert cache.get("a") is None
+
+
+def test_zero_ttl_disables_positive_cache():
+    cache = _cache(ttl_seconds=0)
+    cache.put("a", "user", 1, [])
+    assert cache.get("a") is None
@@ -0,0 +1,50 @@
+# tests/test_token_version.py
+from app.core.security import decode_access_token, verify_password
+from app.crud.user_crud import change_password
+from app.models.rbac import UserSession
+
+
+def _login(client):
+    resp = client.post("/auth/token", data={"grant_type": "password", "username": "user1", "password": "StrongP@ss1"})
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def test_bumping_token_version_revokes_everything_issued_before(client, db_session, create_test_user):
+    user = create_test_user()
+    tokens = _login(client)
+    assert decode_access_token(tokens["access_token"])["tv"] == 0
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/auth/userinfo", headers=headers).status_code == 200  # now cached
+
+    change_password(db_session, user, "N3wStrongP@ss")
+    assert user.token_version == 1
+    # no session rows were rewritten
+    assert db_session.query(UserSession).filter_by(user_id=user.id, revoked=False).count() == 1
+
+    assert client.get("/auth/userinfo", headers=headers).status_code == 403
+    resp = client.post("/auth/token/refresh", data={"refresh_token": tokens["refresh_token"]})
+    assert resp.status_code == 401
+
+    fresh = client.post("/auth/token", data={"grant_type": "password", "username": "user1", "password": "N3wStrongP@ss"})
+    assert decode_access_token(fresh.json()["access_token"])["tv"] == 1
+    assert client.get("/auth/userinfo", headers={"Authorization": f"Bearer {fresh.json()['access_token']}"}).status_code == 200
+
+
+def test_password_change_and_version_bump_commit_together(db_session, create_test_user, monkeypatch):
+    user = create_test_user()
+    commit, commits = db_session.commit, []
+
+    def commit_once():
+        # a second commit would mean the password could land without the version bump
+        commits.append(1)
+        if len(commits) > 1:
+            raise RuntimeError("connection lost")
+        commit()
+
+    monkeypatch.setattr(db_session, "commit", commit_once)
+    change_password(db_session, user, "N3wStrongP@ss")
+    monkeypatch.undo()
+
+    db_session.refresh(user)
+    assert verify_password("N3wStrongP@ss", user.password_hash) and user.token_version == 1
@@ -0,0 +1,84 @@
+# tests/test_user_import.py
+import csv
+import io
+import json
+
+from app.core.security import hash_password, verify_password
+from app.models.user import User
+from app.utils.user_import import import_users, read_records
+from tests.conftest import TestingSessionLocal
+
+ARGON2_HASH = "$argon2id$v=19$m=65536,t=3,p=4$c29tZXNhbHQ$RdescudvJCsgt3ub+b+dWRWJTmaaJObG"
+
+
+def test_import_hashes_plaintext_and_keeps_existing_hashes(db_session):
+    legacy_hash = hash_password("LegacyP@ss1")
+    csv_input = io.StringIO()
+    csv.writer(csv_input).writerows([
+        ["username", "email", "password", "password_hash"],
+        ["alice", "alice@example.com", "Al1ceP@ss", ""],
+        ["bob", "bob@example.com", "", legacy_hash],
+        ["carol", "carol@example.com", "", ARGON2_HASH],
+        ["dave", "dave@example.com", "", "$argon2id$v=19$m=65536"],
+        ["", "nobody@example.com", "x", ""],
+        ["alice", "alice2@example.com", "Other1!", ""],
+    ])
+    csv_input.seek(0)
+    progress = []
+    stats = import_users(
+        read_records(csv_input, "csv"), session_factory=TestingSessionLocal, batch_size=2, workers=2,
+        progress=lambda s: progress.append(s.read),
+    )
+
+    assert (stats.read, stats.created, stats.skipped, stats.invalid) == (6, 3, 1, 2)
+    assert len(progress) == 2
+    users = {u.username: u for u in db_session.query(User)}
+    assert set(users) == {"alice", "bob", "carol"}
+    assert verify_password("Al1ceP@ss", users["alice"].password_hash)
+    assert users["bob"].password_hash == legacy_hash
+    assert users["carol"].password_hash == ARGON2_HASH
+
+
+def test_admin_import_endpoint(client, db_session, admin_headers):
+    body = "\n".join(json.dumps({"username": f"u{i}", "email": f"u{i}@example.com", "password": "P@ssw0rd!"})
+                     for i in range(3))
+    resp = client.post(
+        "/admin/users/import",
+        params={"format": "ndjson"},
+        files={"file": ("users.ndjson", body + "\n{broken\n", "application/x-ndjson")},
+        headers=admin_headers,
+    )
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["created"] == 3 and resp.json()["invalid"] == 1
+    assert db_session.query(User).filter(User.username.like("u%")).count() == 3
+
+
+def test_admin_import_counts_malformed_rows_as_invalid(client, db_session, admin_headers):
+    lines = [
+        json.dumps({"username": "ok", "email": "ok@example.com", "password": "P@ssw0rd!"}).encode(),
+        b"[1]",
+        b'"just a string"',
+        json.dumps({"username": 5, "email": "five@example.com", "password": "P@ssw0rd!"}).encode(),
+        json.dumps({"username": "phone", "email": "phone@example.com", "password": "P@ssw0rd!", "phone_number": 5}).encode(),
+        b'{"username": "caf\xe9", "email": "cafe@example.com", "password": "P@ssw0rd!"}',
+    ]
+    resp = client.post(
+        "/admin/users/import",
+        params={"format": "ndjson"},
+        files={"file": ("users.ndjson", b"\n".join(lines), "application/x-ndjson")},
+        headers=admin_headers,
+    )
+    assert resp.status_code == 200, resp.text
+    assert (resp.json()["read"], resp.json()["created"], resp.json()["invalid"]) == (6, 1, 5)
+    assert db_session.query(User).filter(User.email.in_(["ok@example.com", "cafe@example.com"])).count() == 1
+
+
+def test_import_leaves_a_passed_session_open(db_session, monkeypatch):
+    closed = []
+    monkeypatch.setattr(db_session, "close", lambda: closed.append(True))
+    records = [{"username": "kept", "email": "kept@example.com", "password_hash": ARGON2_HASH}]
+
+    stats = import_users(records, db=db_session, workers=1)
+
+    assert stats.created == 1 and not closed
+    assert db_session.query(User).filter_by(username="kept").count() == 1